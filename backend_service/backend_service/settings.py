@@ -20,6 +20,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mlapi.metrics.MetricsMiddleware',  # first, so /metrics latencies include the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,6 +49,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend_service.wsgi.application'
+ASGI_APPLICATION = 'backend_service.asgi.application'
 
 DATABASES = {
     'default': {
@@ -78,3 +80,32 @@ USE_L10N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+
+# ML service proxy (mlapi.ml_client)
+ML_SERVICE_URL = os.environ.get('ML_SERVICE_URL', 'http://localhost:8001/predict')
+ML_SERVICE_TIMEOUT = float(os.environ.get('ML_SERVICE_TIMEOUT', '10'))  # seconds, per attempt
+ML_SERVICE_CONNECT_TIMEOUT = float(os.environ.get('ML_SERVICE_CONNECT_TIMEOUT', '2'))
+ML_SERVICE_RETRIES = int(os.environ.get('ML_SERVICE_RETRIES', '1'))  # extra attempts on connection errors/timeouts
+ML_SERVICE_MAX_CONNECTIONS = int(os.environ.get('ML_SERVICE_MAX_CONNECTIONS', '100'))
+ML_SERVICE_MAX_KEEPALIVE = int(os.environ.get('ML_SERVICE_MAX_KEEPALIVE', '20'))
+ML_SERVICE_HTTP2 = os.environ.get('ML_SERVICE_HTTP2', 'False') == 'True'  # needs `pip install httpx[http2]`
+# Serve /api/predict/ with the async view. It pools connections on the event loop under ASGI
+# (e.g. `uvicorn backend_service.asgi:application`) and uses the pooled sync client under WSGI/runserver
+ML_PROXY_ASYNC = os.environ.get('ML_PROXY_ASYNC', 'True') == 'True'
+
+# Transaction logging (mlapi.transaction_writer): buffer records and bulk-insert them off the request path
+TRANSACTION_LOG_ASYNC = os.environ.get('TRANSACTION_LOG_ASYNC', 'True') == 'True'
+TRANSACTION_LOG_BATCH_SIZE = int(os.environ.get('TRANSACTION_LOG_BATCH_SIZE', '100'))
+TRANSACTION_LOG_FLUSH_INTERVAL = float(os.environ.get('TRANSACTION_LOG_FLUSH_INTERVAL', '1.0'))  # seconds
+TRANSACTION_LOG_MAX_QUEUE = int(os.environ.get('TRANSACTION_LOG_MAX_QUEUE', '10000'))
+TRANSACTION_LOG_OVERFLOW = os.environ.get('TRANSACTION_LOG_OVERFLOW', 'sync')  # 'sync', 'block' or 'drop'
+# How request keypoints are stored (mlapi.payload_store): 'text' (JSON), 'blob' (float16, compressed) or 'file'
+TRANSACTION_PAYLOAD_STORAGE = os.environ.get('TRANSACTION_PAYLOAD_STORAGE', 'blob')
+TRANSACTION_PAYLOAD_COMPRESSION = os.environ.get('TRANSACTION_PAYLOAD_COMPRESSION', 'gzip')  # 'gzip', 'zstd' or '' for none
+TRANSACTION_PAYLOAD_DIR = os.environ.get('TRANSACTION_PAYLOAD_DIR', str(BASE_DIR / 'transaction_payloads'))
+TRANSACTION_HISTORY_PAGE_SIZE = int(os.environ.get('TRANSACTION_HISTORY_PAGE_SIZE', '50'))
+
+# Firebase ID token cache (mlapi.firebase_utils): skip re-verification and user lookups for repeat tokens
+FIREBASE_TOKEN_CACHE_SIZE = int(os.environ.get('FIREBASE_TOKEN_CACHE_SIZE', '1024'))  # 0 disables the cache
+FIREBASE_TOKEN_CACHE_TTL = float(os.environ.get('FIREBASE_TOKEN_CACHE_TTL', '300'))  # seconds, capped by the token's exp
+FIREBASE_LAST_LOGIN_INTERVAL = float(os.environ.get('FIREBASE_LAST_LOGIN_INTERVAL', '300'))  # seconds between last_login writes
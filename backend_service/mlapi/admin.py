@@ -16,6 +16,8 @@ class UserAdmin(admin.ModelAdmin):
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'timestamp', 'status')
-    search_fields = ('user__email', 'status', 'request_data', 'response_data')
+    list_display = ('user', 'timestamp', 'status', 'gesture', 'confidence')
+    # Payload columns are large; search the structured prediction fields instead
+    search_fields = ('user__email', 'status', 'gesture')
     readonly_fields = ('timestamp',)
+    exclude = ('keypoints',)
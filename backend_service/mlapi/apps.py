@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class MlapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mlapi'
+
+    def ready(self):
+        from .transaction_writer import install_shutdown_hooks
+        install_shutdown_hooks()
@@ -1,5 +1,11 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
 import firebase_admin
 from firebase_admin import auth, credentials
+from django.conf import settings
 from .models import User
 from django.utils import timezone
 
@@ -8,11 +14,100 @@ if not firebase_admin._apps:
     cred = credentials.ApplicationDefault()
     firebase_admin.initialize_app(cred)
 
+class TokenCache:
+    """
+    LRU cache of verified ID tokens -> (user pk, firebase uid).
+
+    Only identifiers are cached, never User instances: callers modify the
+    instance they get (touch_last_login), so each request loads its own row by
+    primary key. Keys are SHA-256 hashes of the token, so raw tokens are never
+    kept in memory. An entry expires at the token's own `exp` or after `ttl` seconds,
+    whichever comes first; a `max_size` of 0 disables the cache.
+    """
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(id_token):
+        return hashlib.sha256(id_token.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                ids, expires_at = entry
+                if time.time() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return ids
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, user, token_exp):
+        if self.max_size <= 0:
+            return
+        expires_at = min(token_exp, time.time() + self.ttl)
+        with self._lock:
+            self._entries[key] = ((user.pk, user.firebase_uid), expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            size, hits, misses = len(self._entries), self.hits, self.misses
+        total = hits + misses
+        return {
+            'size': size,
+            'max_size': self.max_size,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'FIREBASE_TOKEN_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'FIREBASE_TOKEN_CACHE_TTL', 300),
+)
+
+def touch_last_login(user):
+    """Update last_login at most once per FIREBASE_LAST_LOGIN_INTERVAL seconds."""
+    now = timezone.now()
+    interval = timedelta(seconds=getattr(settings, 'FIREBASE_LAST_LOGIN_INTERVAL', 300))
+    if user.last_login is None or now - user.last_login >= interval:
+        # update() skips auto_now and touches only this column
+        User.objects.filter(pk=user.pk).update(last_login=now)
+        user.last_login = now
+
 def get_firebase_user(request):
     auth_header = request.headers.get('Authorization')
     if not auth_header or not auth_header.startswith('Bearer '):
         return None
     id_token = auth_header.split(' ')[1]
+    key = TokenCache.key(id_token)
+    cached = token_cache.get(key)
+    if cached is not None:
+        pk, firebase_uid = cached
+        # A fresh instance per request; the row may have been deleted since it was cached
+        user = User.objects.filter(pk=pk, firebase_uid=firebase_uid).first()
+        if user is not None:
+            touch_last_login(user)
+            return user
+        token_cache.discard(key)
     try:
         decoded_token = auth.verify_id_token(id_token)
         firebase_uid = decoded_token['uid']
@@ -22,8 +117,8 @@ def get_firebase_user(request):
             'email': email,
             'display_name': display_name
         })
-        user.last_login = timezone.now()
-        user.save()
+        touch_last_login(user)
+        token_cache.put(key, user, decoded_token['exp'])
         return user
     except Exception as e:
         return None
@@ -0,0 +1,87 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from mlapi import firebase_utils
+from mlapi.firebase_utils import TokenCache, get_firebase_user, token_cache
+from mlapi.models import User
+
+BENCH_UID = 'bench-firebase-user'
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of resolving the Firebase user: the previous path (verify_id_token, "
+        "get_or_create and save on every request) against the token cache on a miss and on a hit. "
+        "Without --token, verify_id_token is replaced by a stub that sleeps --verify-ms, so only the "
+        "database work is real."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--token', default=None, help='A real Firebase ID token (needs GOOGLE_APPLICATION_CREDENTIALS)')
+        parser.add_argument('--verify-ms', type=float, default=1.0, help='Simulated verify_id_token cost without --token')
+
+    def handle(self, *args, **options):
+        real_verify = firebase_utils.auth.verify_id_token
+        if options['token']:
+            id_token = options['token']
+            verify = real_verify
+        else:
+            id_token = 'bench.token.' + 'x' * 900  # Firebase ID tokens are ~1 KB
+            delay = options['verify_ms'] / 1000
+
+            def verify(token):
+                time.sleep(delay)
+                return {'uid': BENCH_UID, 'email': 'bench@example.com', 'name': 'Bench', 'exp': time.time() + 3600}
+
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {id_token}')
+
+        def previous_path():
+            decoded_token = verify(id_token)
+            user, _ = User.objects.get_or_create(firebase_uid=decoded_token['uid'], defaults={
+                'email': decoded_token.get('email', ''),
+                'display_name': decoded_token.get('name', ''),
+            })
+            user.last_login = timezone.now()
+            user.save()
+            return user
+
+        def cache_miss():
+            token_cache.clear()
+            return get_firebase_user(request)
+
+        firebase_utils.auth.verify_id_token = verify
+        try:
+            rows = [
+                ('previous (no cache)', self.time_calls(previous_path, options['requests'])),
+                ('token cache miss', self.time_calls(cache_miss, options['requests'])),
+            ]
+            token_cache.clear()
+            hits_before = token_cache.hits
+            rows.append(('token cache hit', self.time_calls(lambda: get_firebase_user(request), options['requests'])))
+            hits = token_cache.hits - hits_before
+        finally:
+            firebase_utils.auth.verify_id_token = real_verify
+            token_cache.clear()
+            if not options['token']:
+                User.objects.filter(firebase_uid=BENCH_UID).delete()
+
+        self.stdout.write(f"{options['requests']} requests per mode, verify_id_token: "
+                          f"{'real' if options['token'] else '%.1f ms stub' % options['verify_ms']}")
+        self.stdout.write(f"{'mode':<22}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, latencies_ms in rows:
+            self.stdout.write(f"{name:<22}{latencies_ms.mean():>10.3f}{np.percentile(latencies_ms, 50):>10.3f}"
+                              f"{np.percentile(latencies_ms, 99):>10.3f}")
+        self.stdout.write(f"Cache hits in the hit run: {hits} of {options['requests']}")
+
+    @staticmethod
+    def time_calls(fn, count):
+        fn()  # warm-up
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            if fn() is None:
+                raise SystemExit("Token could not be verified")
+            latencies.append(time.perf_counter() - start)
+        return np.array(latencies) * 1000
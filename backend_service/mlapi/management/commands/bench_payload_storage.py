@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from mlapi.models import Transaction
+from mlapi.payload_store import STORAGE_MODES, load_keypoints
+from mlapi.transaction_summary_serializer import TransactionSummarySerializer
+from mlapi.transaction_writer import get_dummy_user, make_record, write_transactions
+
+class Command(BaseCommand):
+    help = (
+        "Compare transaction payload storage modes (text, blob, file): stored bytes per row, bulk insert "
+        "time, history query time and keypoint decode time. Rows are written inside a transaction that is "
+        "rolled back, and the file store goes to a temporary directory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument('--seq-len', type=int, default=20)
+        parser.add_argument('--compression', default='gzip', help="'gzip', 'zstd' or '' for none")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        # MediaPipe-like frames: full-precision floats, with the hand blocks often missing (zeros)
+        samples = rng.random((options['rows'], options['seq_len'], 1662), dtype=np.float32)
+        samples[::2, :, 1536:1599] = 0
+        samples[::3, :, 1599:] = 0
+        response = json.dumps({'gesture': 'Hello', 'confidence': 0.93, 'pred_idx': 3, 'actions': [0.01] * 10})
+
+        self.stdout.write(f"{options['rows']} rows of {options['seq_len']}x1662 keypoints, compression={options['compression'] or 'none'}")
+        self.stdout.write(f"{'mode':<8}{'KB/row':>10}{'insert ms/row':>15}{'history ms':>12}{'decode ms/row':>15}{'max |err|':>11}")
+        with tempfile.TemporaryDirectory() as payload_dir:
+            for mode in STORAGE_MODES:
+                with override_settings(TRANSACTION_PAYLOAD_STORAGE=mode, TRANSACTION_PAYLOAD_DIR=payload_dir,
+                                       TRANSACTION_PAYLOAD_COMPRESSION=options['compression']):
+                    self.run_mode(mode, samples, response, payload_dir)
+
+    def run_mode(self, mode, samples, response, payload_dir):
+        user = get_dummy_user()
+        with transaction.atomic():
+            start_id = (Transaction.objects.order_by('-pk').values_list('pk', flat=True).first() or 0)
+            # The views log JSON bodies as text, so that is what the writer gets
+            records = [make_record(user, json.dumps({'keypoints': s.tolist()}), response, 'success') for s in samples]
+            start = time.perf_counter()
+            write_transactions(records)
+            insert_ms = (time.perf_counter() - start) * 1000 / len(records)
+
+            rows = list(Transaction.objects.filter(pk__gt=start_id).order_by('pk'))
+            stored = 0
+            for row in rows:
+                stored += len(row.request_data.encode()) + len(row.keypoints or b'')
+                if row.keypoints_hash:
+                    stored += os.path.getsize(os.path.join(payload_dir, row.keypoints_hash[:2], f'{row.keypoints_hash}.islk'))
+
+            start = time.perf_counter()
+            TransactionSummarySerializer(Transaction.objects.filter(pk__gt=start_id).order_by('-timestamp'), many=True).data
+            history_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            decoded = [load_keypoints(row) for row in rows]
+            decode_ms = (time.perf_counter() - start) * 1000 / len(rows)
+            max_err = max(float(np.max(np.abs(d - s))) for d, s in zip(decoded, samples))
+            transaction.set_rollback(True)
+        self.stdout.write(f"{mode:<8}{stored / len(rows) / 1024:>10.1f}{insert_ms:>15.3f}{history_ms:>12.1f}{decode_ms:>15.3f}{max_err:>11.1e}")
@@ -0,0 +1,106 @@
+import json
+import time
+from datetime import timedelta
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.utils import timezone
+from mlapi.firebase_utils import TokenCache, token_cache
+from mlapi.models import Transaction, User
+
+BENCH_UID_PREFIX = 'bench-history-'
+BENCH_TOKEN = 'bench-history-token'
+
+class Command(BaseCommand):
+    help = (
+        "Seed transactions (1M by default, kept for reuse under bench-history-* users) and measure "
+        "/api/transactions/ page latency: first and deep cursor pages, per user and anonymous, against "
+        "the previous unpaginated listing that parsed response_data on every row."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--pages', type=int, default=20, help='How many cursor pages to follow for the deep-page timing')
+        parser.add_argument('--repeats', type=int, default=20)
+        parser.add_argument('--cleanup', action='store_true', help='Delete the seeded users and transactions and exit')
+
+    def handle(self, *args, **options):
+        seeded_users = User.objects.filter(firebase_uid__startswith=BENCH_UID_PREFIX)
+        if options['cleanup']:
+            Transaction.objects.filter(user__in=seeded_users).delete()
+            seeded_users.delete()
+            self.stdout.write("Seeded benchmark data removed.")
+            return
+        if Transaction.objects.filter(user__in=seeded_users).count() != options['rows']:
+            self.seed(options['rows'], options['users'])
+        user = seeded_users.order_by('pk').first()
+        token_cache.put(TokenCache.key(BENCH_TOKEN), user, time.time() + 3600)
+
+        client = Client()
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {BENCH_TOKEN}'}
+        self.stdout.write(f"{Transaction.objects.count()} transactions, {user.transactions.count()} for the measured user")
+        self.stdout.write(f"{'request':<34}{'p50 ms':>10}{'p99 ms':>10}")
+        self.report('user, previous full list', self.time_previous(user, options['repeats']))
+        self.report('user, first page', self.time_pages(client, auth, 1, options['repeats']))
+        self.report(f"user, page {options['pages']}", self.time_pages(client, auth, options['pages'], options['repeats']))
+        self.report('anonymous, first page', self.time_pages(client, {}, 1, options['repeats']))
+        self.report(f"anonymous, page {options['pages']}", self.time_pages(client, {}, options['pages'], options['repeats']))
+        plan = Transaction.objects.filter(user=user).order_by('-timestamp').only('id', 'timestamp', 'status', 'gesture')[:50].explain()
+        self.stdout.write(f"Query plan (user page): {plan}")
+
+    def seed(self, rows, users):
+        self.stdout.write(f"Seeding {rows} transactions for {users} users...")
+        Transaction.objects.filter(user__firebase_uid__startswith=BENCH_UID_PREFIX).delete()
+        User.objects.filter(firebase_uid__startswith=BENCH_UID_PREFIX).delete()
+        User.objects.bulk_create([
+            User(firebase_uid=f'{BENCH_UID_PREFIX}{i}', email=f'{BENCH_UID_PREFIX}{i}@example.com') for i in range(users)
+        ])
+        user_ids = list(User.objects.filter(firebase_uid__startswith=BENCH_UID_PREFIX).values_list('pk', flat=True))
+        rng = np.random.default_rng(0)
+        now = timezone.now()
+        gestures = [f'G{i}' for i in range(10)]
+        for start in range(0, rows, 10000):
+            count = min(10000, rows - start)
+            owners = rng.integers(0, len(user_ids), count)
+            ages = rng.integers(0, 365 * 24 * 3600, count)
+            preds = rng.integers(0, len(gestures), count)
+            Transaction.objects.bulk_create([
+                Transaction(
+                    user_id=user_ids[owners[i]],
+                    timestamp=now - timedelta(seconds=int(ages[i])),
+                    response_data=json.dumps({'gesture': gestures[preds[i]], 'confidence': 0.9, 'pred_idx': int(preds[i])}),
+                    status='success',
+                    gesture=gestures[preds[i]],
+                    confidence=0.9,
+                    pred_idx=int(preds[i]),
+                )
+                for i in range(count)
+            ])
+
+    def time_pages(self, client, headers, pages, repeats):
+        latencies = []
+        for _ in range(repeats):
+            url = '/api/transactions/'
+            for _ in range(pages):
+                start = time.perf_counter()
+                response = client.get(url, **headers)
+                elapsed = time.perf_counter() - start
+                url = response.json()['next']
+            latencies.append(elapsed)  # latency of the last page fetched
+        return np.array(latencies) * 1000
+
+    def time_previous(self, user, repeats):
+        # What TransactionHistoryView did before: every row, every column, json.loads per row
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            data = []
+            for t in Transaction.objects.filter(user=user).order_by('-timestamp'):
+                data.append({'id': t.id, 'timestamp': t.timestamp, 'status': t.status,
+                             'gesture': json.loads(t.response_data).get('gesture')})
+            latencies.append(time.perf_counter() - start)
+        return np.array(latencies) * 1000
+
+    def report(self, name, latencies_ms):
+        self.stdout.write(f"{name:<34}{np.percentile(latencies_ms, 50):>10.2f}{np.percentile(latencies_ms, 99):>10.2f}")
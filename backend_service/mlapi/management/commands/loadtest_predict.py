@@ -0,0 +1,63 @@
+import asyncio
+import json
+import time
+import httpx
+import numpy as np
+from django.core.management.base import BaseCommand
+from mlapi.keypoints_codec import KEYPOINTS_CONTENT_TYPE, encode_keypoints
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running /api/predict/ endpoint and report requests/sec and latency percentiles. "
+        "Run it once against the WSGI deployment (ML_PROXY_ASYNC=False, e.g. gunicorn -w 4) and once "
+        "against the ASGI one (uvicorn backend_service.asgi:application --workers 4) to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000/api/predict/')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--binary', action='store_true', help='Send application/x-isl-keypoints instead of JSON')
+        parser.add_argument('--token', default=None, help='Firebase ID token for the Authorization header')
+
+    def handle(self, *args, **options):
+        keypoints = np.random.rand(20, 1662).astype(np.float32)
+        if options['binary']:
+            body, content_type = encode_keypoints(keypoints), KEYPOINTS_CONTENT_TYPE
+        else:
+            body, content_type = json.dumps({'keypoints': keypoints.tolist()}).encode(), 'application/json'
+        headers = {'Content-Type': content_type}
+        if options['token']:
+            headers['Authorization'] = f"Bearer {options['token']}"
+        latencies, statuses, elapsed = asyncio.run(self.run(options, body, headers))
+
+        latencies_ms = np.array(latencies) * 1000
+        ok = sum(1 for s in statuses if s == 200)
+        self.stdout.write(f"Requests: {len(latencies)} (concurrency {options['concurrency']}), 200 OK: {ok}")
+        self.stdout.write(f"Throughput: {len(latencies) / elapsed:.1f} req/s")
+        self.stdout.write(
+            "Latency ms: p50 {:.1f}  p90 {:.1f}  p99 {:.1f}  max {:.1f}".format(
+                *np.percentile(latencies_ms, [50, 90, 99]), latencies_ms.max()
+            )
+        )
+
+    async def run(self, options, body, headers):
+        latencies, statuses = [], []
+        remaining = options['requests']
+        limits = httpx.Limits(max_connections=options['concurrency'])
+        async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+            async def worker():
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    start = time.perf_counter()
+                    try:
+                        response = await client.post(options['url'], content=body, headers=headers)
+                        statuses.append(response.status_code)
+                    except httpx.HTTPError:
+                        statuses.append(None)
+                    latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(options['concurrency'])))
+            return latencies, statuses, time.perf_counter() - start
@@ -0,0 +1,47 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mlapi.models import Transaction
+
+class Command(BaseCommand):
+    help = (
+        "Delete payload files under TRANSACTION_PAYLOAD_DIR that no transaction references (file storage mode). "
+        "A file is shared by every row with the same payload, so it is not deleted with its transactions; run this "
+        "after deleting transactions or reverting migration 0004."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=float, default=3600,
+            help="Keep files younger than this many seconds: the transaction writer stores a payload file before "
+                 "it inserts the row that references it",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be deleted")
+
+    def handle(self, *args, **options):
+        payload_dir = settings.TRANSACTION_PAYLOAD_DIR
+        if not os.path.isdir(payload_dir):
+            self.stdout.write(f"No payload directory at {payload_dir}")
+            return
+        cutoff = time.time() - options['min_age']
+        referenced = set(Transaction.objects.exclude(keypoints_hash='').values_list('keypoints_hash', flat=True))
+        deleted = kept = freed = 0
+        for prefix in sorted(os.listdir(payload_dir)):
+            prefix_dir = os.path.join(payload_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                path = os.path.join(prefix_dir, name)
+                # .tmp files are left behind by writes that were interrupted before their rename
+                orphan = name.endswith('.tmp') or (name.endswith('.islk') and name[:-5] not in referenced)
+                stat = os.stat(path)
+                if not orphan or stat.st_mtime > cutoff:
+                    kept += 1
+                    continue
+                if not options['dry_run']:
+                    os.remove(path)
+                deleted += 1
+                freed += stat.st_size
+        action = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(f"{action} {deleted} unreferenced payload files ({freed / 2**20:.1f} MB); kept {kept}")
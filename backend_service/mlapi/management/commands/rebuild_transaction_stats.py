@@ -0,0 +1,14 @@
+import time
+from django.core.management.base import BaseCommand
+from mlapi.stats import rebuild_rollups
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily per-user and global stats rollups from the Transaction table. Needed only after "
+        "rows were inserted or changed outside the transaction writer (e.g. bulk imports or manual deletes)."
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows = rebuild_rollups()
+        self.stdout.write(f"Rebuilt {rows} per-user rollup rows in {time.perf_counter() - start:.1f}s")
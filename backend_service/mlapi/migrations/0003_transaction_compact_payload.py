@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlapi', '0002_transaction_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='gesture',
+            field=models.CharField(blank=True, max_length=128, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='keypoints',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='keypoints_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='pred_idx',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='request_data',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
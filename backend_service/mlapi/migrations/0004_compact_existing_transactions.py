@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import zlib
+import numpy as np
+from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 200
+
+# Frozen copy of the payload conversion as of this migration (mlapi.payload_store and
+# mlapi.keypoints_codec may change later): float16 keypoints in the version 1 binary
+# format, gzip-compressed, stored per TRANSACTION_PAYLOAD_STORAGE.
+HEADER = struct.Struct('<4sBBBxII')
+MAGIC = b'ISLK'
+DTYPES = {1: np.dtype('<f4'), 2: np.dtype('<f2')}
+
+def encode_payload(keypoints):
+    data = gzip.compress(np.ascontiguousarray(keypoints, dtype='<f2').tobytes(), compresslevel=1)
+    return HEADER.pack(MAGIC, 1, 2, 1, keypoints.shape[0], keypoints.shape[1]) + data
+
+def decode_payload(body):
+    magic, version, dtype_code, compression, rows, cols = HEADER.unpack_from(body)
+    if magic != MAGIC or version != 1 or dtype_code not in DTYPES:
+        raise ValueError('Unsupported keypoints payload')
+    data = body[HEADER.size:]
+    if compression == 1:
+        data = gzip.decompress(data)
+    elif compression == 2:
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif compression != 0:
+        raise ValueError(f'Unsupported payload compression code: {compression}')
+    return np.frombuffer(data, dtype=DTYPES[dtype_code]).reshape(rows, cols).astype(np.float32)
+
+def payload_path(digest):
+    return os.path.join(settings.TRANSACTION_PAYLOAD_DIR, digest[:2], f'{digest}.islk')
+
+def store_file(payload):
+    digest = hashlib.sha256(payload).hexdigest()
+    path = payload_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    return digest
+
+def keypoints_from_request_data(request_data):
+    try:
+        arr = np.asarray(json.loads(request_data)['keypoints'], dtype=np.float32)
+    except (ValueError, KeyError, TypeError):
+        return None
+    return arr if arr.ndim == 2 else None
+
+def prediction_fields(response_data, log_status):
+    fields = {'gesture': None, 'confidence': None, 'pred_idx': None}
+    if log_status != 'success':
+        return fields
+    try:
+        data = json.loads(response_data)
+    except ValueError:
+        return fields
+    if isinstance(data, dict):
+        for name in fields:
+            fields[name] = data.get(name)
+    return fields
+
+def pk_chunks(queryset):
+    """
+    The rows of `queryset` in pk order, BATCH_SIZE at a time. The pks are listed
+    up front so that updating the table never disturbs an open cursor over it.
+    """
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        yield list(queryset.model.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).order_by('pk'))
+
+def compact_transactions(apps, schema_editor):
+    """Move existing JSON payloads to the configured storage and fill the prediction columns."""
+    Transaction = apps.get_model('mlapi', 'Transaction')
+    mode = getattr(settings, 'TRANSACTION_PAYLOAD_STORAGE', 'blob')
+    for rows in pk_chunks(Transaction.objects.filter(keypoints__isnull=True, keypoints_hash='')):
+        for row in rows:
+            keypoints = keypoints_from_request_data(row.request_data) if mode in ('blob', 'file') else None
+            if keypoints is not None:
+                payload = encode_payload(keypoints)
+                row.request_data = ''
+                if mode == 'file':
+                    row.keypoints_hash = store_file(payload)
+                else:
+                    row.keypoints = payload
+            for name, value in prediction_fields(row.response_data, row.status).items():
+                setattr(row, name, value)
+        Transaction.objects.bulk_update(rows, ['request_data', 'keypoints', 'keypoints_hash', 'gesture', 'confidence', 'pred_idx'])
+
+def restore_json_payloads(apps, schema_editor):
+    """
+    Write compact payloads back as JSON text (values keep their float16 precision).
+    Payloads whose file is missing or that cannot be decoded are left empty.
+    Payload files are left in TRANSACTION_PAYLOAD_DIR (see manage.py prune_payload_files).
+    """
+    Transaction = apps.get_model('mlapi', 'Transaction')
+    unavailable = 0
+    for rows in pk_chunks(Transaction.objects.exclude(keypoints__isnull=True, keypoints_hash='')):
+        for row in rows:
+            try:
+                if row.keypoints:
+                    keypoints = decode_payload(bytes(row.keypoints))
+                else:
+                    with open(payload_path(row.keypoints_hash), 'rb') as f:
+                        keypoints = decode_payload(f.read())
+                row.request_data = json.dumps({'keypoints': keypoints.tolist()})
+            except (OSError, EOFError, ValueError, ImportError, struct.error, zlib.error):  # e.g. FileNotFoundError in file mode
+                unavailable += 1
+            row.keypoints = None
+            row.keypoints_hash = ''
+        Transaction.objects.bulk_update(rows, ['request_data', 'keypoints', 'keypoints_hash'])
+    if unavailable:
+        print(f'\n  {unavailable} transaction payloads were missing or unreadable; their request_data is left empty.')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlapi', '0003_transaction_compact_payload'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_transactions, restore_json_payloads),
+    ]
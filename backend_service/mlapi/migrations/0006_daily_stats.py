@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlapi', '0005_transaction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlobalDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('gesture', models.CharField(blank=True, default='', max_length=128)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'gesture'), name='mlapi_global_daily_stats_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('gesture', models.CharField(blank=True, default='', max_length=128)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='mlapi.user')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date', 'gesture'), name='mlapi_user_daily_stats_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+BATCH_SIZE = 5000
+
+def build_rollups(apps, schema_editor):
+    """Fill the rollup tables from the existing transactions (frozen copy of stats.rebuild_rollups)."""
+    Transaction = apps.get_model('mlapi', 'Transaction')
+    UserDailyStats = apps.get_model('mlapi', 'UserDailyStats')
+    GlobalDailyStats = apps.get_model('mlapi', 'GlobalDailyStats')
+    UserDailyStats.objects.all().delete()
+    GlobalDailyStats.objects.all().delete()
+    grouped = (
+        Transaction.objects
+        .annotate(day=TruncDate('timestamp'))
+        .values('user_id', 'day', 'gesture')
+        .annotate(
+            n=Count('id'),
+            ok=Count('id', filter=Q(status='success')),
+            conf=Sum('confidence', filter=Q(status='success')),
+        )
+        .order_by()
+    )
+    # Rows with gesture NULL and '' fall into the same rollup row
+    merged = {}
+    for g in grouped:
+        key = (g['user_id'], g['day'], g['gesture'] or '')
+        counters = merged.setdefault(key, [0, 0, 0.0])
+        counters[0] += g['n']
+        counters[1] += g['ok']
+        counters[2] += g['conf'] or 0.0
+    UserDailyStats.objects.bulk_create(
+        [UserDailyStats(user_id=user_id, date=date, gesture=gesture, total=n, successes=ok, confidence_sum=conf)
+         for (user_id, date, gesture), (n, ok, conf) in merged.items()],
+        batch_size=BATCH_SIZE,
+    )
+    totals = (
+        UserDailyStats.objects.values('date', 'gesture')
+        .annotate(n=Sum('total'), ok=Sum('successes'), conf=Sum('confidence_sum'))
+        .order_by()
+    )
+    GlobalDailyStats.objects.bulk_create(
+        [GlobalDailyStats(date=g['date'], gesture=g['gesture'], total=g['n'], successes=g['ok'], confidence_sum=g['conf'])
+         for g in totals],
+        batch_size=BATCH_SIZE,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlapi', '0006_daily_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlapi', '0007_build_daily_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='mlapi_txn_user_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='mlapi_txn_ts_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-timestamp', '-id'], name='mlapi_txn_user_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-timestamp', '-id'], name='mlapi_txn_ts_id_idx'),
+        ),
+    ]
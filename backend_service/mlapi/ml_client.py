@@ -0,0 +1,76 @@
+import asyncio
+import time
+import httpx
+from django.conf import settings
+from .metrics import ML_SERVICE_LATENCY
+
+# Long-lived, pooled HTTP clients for calls to the ML service. The sync client
+# is shared by all WSGI threads; an async client is bound to the event loop it
+# was created on, so one is kept per running loop. Async clients are only
+# pooled for the ASGI server's long-lived loop: under WSGI, AsyncPredictView
+# uses the sync client instead of creating one on each throwaway loop.
+_sync_client = None
+_async_clients = {}
+_closing = set()  # aclose() tasks of stale clients, referenced until they finish
+
+def _client_options():
+    return {
+        'timeout': httpx.Timeout(settings.ML_SERVICE_TIMEOUT, connect=settings.ML_SERVICE_CONNECT_TIMEOUT),
+        'limits': httpx.Limits(
+            max_connections=settings.ML_SERVICE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.ML_SERVICE_MAX_KEEPALIVE,
+        ),
+        'http2': settings.ML_SERVICE_HTTP2,
+    }
+
+def get_client():
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = httpx.Client(**_client_options())
+    return _sync_client
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        # Close clients of loops that have gone away (e.g. a test's or async_to_sync's loop)
+        for old_loop in [l for l in _async_clients if l.is_closed()]:
+            task = loop.create_task(_aclose_stale(_async_clients.pop(old_loop)))
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+        client = _async_clients[loop] = httpx.AsyncClient(**_client_options())
+    return client
+
+async def _aclose_stale(client):
+    try:
+        await client.aclose()
+    except RuntimeError:
+        pass  # The sockets are closed; only the cleanup scheduled on the dead loop fails
+
+def post_predict(body, content_type):
+    """POST a keypoints body to the ML service, retrying connection errors and timeouts."""
+    for attempt in range(settings.ML_SERVICE_RETRIES + 1):
+        started = time.perf_counter()
+        try:
+            response = get_client().post(settings.ML_SERVICE_URL, content=body, headers={'Content-Type': content_type})
+        except httpx.TransportError:
+            ML_SERVICE_LATENCY.observe(time.perf_counter() - started, 'error')
+            if attempt == settings.ML_SERVICE_RETRIES:
+                raise
+        else:
+            ML_SERVICE_LATENCY.observe(time.perf_counter() - started, str(response.status_code))
+            return response
+
+async def apost_predict(body, content_type):
+    """Async version of post_predict."""
+    for attempt in range(settings.ML_SERVICE_RETRIES + 1):
+        started = time.perf_counter()
+        try:
+            response = await get_async_client().post(settings.ML_SERVICE_URL, content=body, headers={'Content-Type': content_type})
+        except httpx.TransportError:
+            ML_SERVICE_LATENCY.observe(time.perf_counter() - started, 'error')
+            if attempt == settings.ML_SERVICE_RETRIES:
+                raise
+        else:
+            ML_SERVICE_LATENCY.observe(time.perf_counter() - started, str(response.status_code))
+            return response
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class User(models.Model):
     firebase_uid = models.CharField(max_length=128, unique=True)
@@ -12,41 +13,59 @@ class User(models.Model):
 
 class Transaction(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
-    timestamp = models.DateTimeField(auto_now_add=True)
-    request_data = models.TextField()
+    # Set when the request is handled, not when the background writer inserts the row
+    timestamp = models.DateTimeField(default=timezone.now)
+    # JSON request body; empty when the keypoints are stored compactly (see payload_store)
+    request_data = models.TextField(blank=True, default='')
+    keypoints = models.BinaryField(null=True, blank=True)
+    keypoints_hash = models.CharField(max_length=64, blank=True, default='')
     response_data = models.TextField()
     status = models.CharField(max_length=20)
+    gesture = models.CharField(max_length=128, null=True, blank=True)
+    confidence = models.FloatField(null=True, blank=True)
+    pred_idx = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # History pages: one user's transactions newest first, and everyone's for anonymous requests
+            # (id breaks timestamp ties for the cursor pagination, see pagination.py)
+            models.Index(fields=['user', '-timestamp', '-id'], name='mlapi_txn_user_ts_id_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='mlapi_txn_ts_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.timestamp} - {self.status}"
 
-class MLLog(models.Model):
-    timestamp = models.DateTimeField(auto_now_add=True)
-    request_data = models.TextField()
-    response_data = models.TextField()
-    status = models.CharField(max_length=20)
+class DailyStats(models.Model):
+    """Rollup of one day's transactions for one gesture ('' for predictions without a gesture)."""
+    date = models.DateField()
+    gesture = models.CharField(max_length=128, blank=True, default='')
+    total = models.PositiveIntegerField(default=0)
+    successes = models.PositiveIntegerField(default=0)
+    confidence_sum = models.FloatField(default=0)
 
-    def __str__(self):
-        return f"{self.timestamp} - {self.status}"
+    class Meta:
+        abstract = True
 
-from django.db import models
+class UserDailyStats(DailyStats):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
 
-class User(models.Model):
-    firebase_uid = models.CharField(max_length=128, unique=True)
-    email = models.EmailField(unique=True)
-    display_name = models.CharField(max_length=128, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    last_login = models.DateTimeField(auto_now=True)
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date', 'gesture'], name='mlapi_user_daily_stats_uniq'),
+        ]
 
-    def __str__(self):
-        return self.email or self.firebase_uid
+class GlobalDailyStats(DailyStats):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'gesture'], name='mlapi_global_daily_stats_uniq'),
+        ]
 
-class Transaction(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
+class MLLog(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     request_data = models.TextField()
     response_data = models.TextField()
     status = models.CharField(max_length=20)
 
     def __str__(self):
-        return f"{self.user.email} - {self.timestamp} - {self.status}"
+        return f"{self.timestamp} - {self.status}"
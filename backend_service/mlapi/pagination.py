@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Cursor pages over (-timestamp, -id), served by the (user, -timestamp, -id)
+    and (-timestamp, -id) indexes: each page is an index range scan no matter
+    how deep the client has paged, unlike OFFSET pagination. The id tie-breaker
+    gives rows with equal timestamps (common with bulk inserts from the
+    transaction writer) a stable order, so pages neither skip nor repeat them.
+    """
+    ordering = ('-timestamp', '-id')
+    page_size = settings.TRANSACTION_HISTORY_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,16 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from .keypoints_codec import KEYPOINTS_CONTENT_TYPE, decode_keypoints
+from .metrics import PAYLOAD_DECODE
+
+class KeypointsBinaryParser(BaseParser):
+    """Parses `application/x-isl-keypoints` bodies into {'keypoints': float32 ndarray}."""
+    media_type = KEYPOINTS_CONTENT_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read()
+        try:
+            with PAYLOAD_DECODE.time():
+                return {'keypoints': decode_keypoints(body)}
+        except ValueError as e:
+            raise ParseError(f'Invalid keypoints payload: {e}')
@@ -0,0 +1,102 @@
+"""
+Compact storage of Transaction request payloads.
+
+TRANSACTION_PAYLOAD_STORAGE selects how the keypoint matrix of a prediction
+request is kept:
+  'text' - the request body as JSON text in `request_data` (the original behaviour)
+  'blob' - float16 keypoints in the binary keypoints_codec format, compressed,
+           in the `keypoints` column
+  'file' - the same encoded payload in a content-addressed file under
+           TRANSACTION_PAYLOAD_DIR; the row only holds its SHA-256 in `keypoints_hash`
+
+The gesture, confidence and pred_idx of successful predictions are always
+copied from the response into their own columns.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from django.conf import settings
+from .keypoints_codec import decode_keypoints, encode_keypoints
+
+STORAGE_MODES = ('text', 'blob', 'file')
+
+def storage_mode():
+    mode = getattr(settings, 'TRANSACTION_PAYLOAD_STORAGE', 'blob')
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown TRANSACTION_PAYLOAD_STORAGE: {mode}")
+    return mode
+
+def encode_payload(keypoints):
+    compression = getattr(settings, 'TRANSACTION_PAYLOAD_COMPRESSION', 'gzip') or None
+    return encode_keypoints(keypoints, dtype='float16', compression=compression)
+
+def payload_path(digest):
+    return os.path.join(settings.TRANSACTION_PAYLOAD_DIR, digest[:2], f'{digest}.islk')
+
+def store_file(payload):
+    """Write an encoded payload to the file store (once per content) and return its SHA-256."""
+    digest = hashlib.sha256(payload).hexdigest()
+    path = payload_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    return digest
+
+def keypoints_from_request_data(request_data):
+    """The keypoint matrix of a logged JSON request body, or None if it has none."""
+    try:
+        keypoints = json.loads(request_data)['keypoints']
+        arr = np.asarray(keypoints, dtype=np.float32)
+    except (ValueError, KeyError, TypeError):
+        return None
+    return arr if arr.ndim == 2 else None
+
+def prediction_fields(response_data, log_status):
+    """gesture/confidence/pred_idx column values from an ML service response."""
+    fields = {'gesture': None, 'confidence': None, 'pred_idx': None}
+    if log_status != 'success':
+        return fields
+    try:
+        data = json.loads(response_data)
+    except ValueError:
+        return fields
+    if isinstance(data, dict):
+        for name in fields:
+            fields[name] = data.get(name)
+    return fields
+
+def payload_fields(request_data, mode=None):
+    """
+    Column values for one logged request. `request_data` is the JSON body text
+    or a keypoints ndarray (binary requests). Requests without a parsable
+    keypoint matrix are kept as text in every mode.
+    """
+    mode = mode or storage_mode()
+    if isinstance(request_data, np.ndarray):
+        keypoints = request_data
+    elif mode != 'text':
+        keypoints = keypoints_from_request_data(request_data)
+    else:
+        keypoints = None
+    if mode == 'text' or keypoints is None:
+        if isinstance(request_data, np.ndarray):
+            request_data = json.dumps({'keypoints': request_data.tolist()})
+        return {'request_data': request_data, 'keypoints': None, 'keypoints_hash': ''}
+    payload = encode_payload(keypoints)
+    if mode == 'file':
+        return {'request_data': '', 'keypoints': None, 'keypoints_hash': store_file(payload)}
+    return {'request_data': '', 'keypoints': payload, 'keypoints_hash': ''}
+
+def load_keypoints(transaction):
+    """The float32 keypoint matrix of a Transaction, whichever way it was stored (None if unavailable)."""
+    if transaction.keypoints:
+        return decode_keypoints(bytes(transaction.keypoints))
+    if transaction.keypoints_hash:
+        with open(payload_path(transaction.keypoints_hash), 'rb') as f:
+            return decode_keypoints(f.read())
+    return keypoints_from_request_data(transaction.request_data)
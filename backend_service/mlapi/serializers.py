@@ -12,7 +12,8 @@ class TransactionSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     class Meta:
         model = Transaction
-        fields = ['id', 'user', 'timestamp', 'request_data', 'response_data', 'status']
+        fields = ['id', 'user', 'timestamp', 'request_data', 'keypoints_hash', 'response_data', 'status',
+                  'gesture', 'confidence', 'pred_idx']
 
 class MLLogSerializer(serializers.ModelSerializer):
     class Meta:
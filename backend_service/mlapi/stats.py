@@ -0,0 +1,120 @@
+"""
+Daily per-user and global transaction rollups.
+
+UserDailyStats/GlobalDailyStats hold one row per date and gesture (per user, or
+across all users) with counters that are incremented in the same database
+transaction that inserts the Transaction rows (see
+transaction_writer.write_transactions), so the stats API reads a few hundred
+rollup rows however long the history is.
+rebuild_rollups recomputes them from scratch (manage.py rebuild_transaction_stats).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import GlobalDailyStats, Transaction, UserDailyStats
+
+TOP_GESTURES = 5
+
+def _increment(model, lookup, total, successes, confidence_sum):
+    changes = {
+        'total': F('total') + total,
+        'successes': F('successes') + successes,
+        'confidence_sum': F('confidence_sum') + confidence_sum,
+    }
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, total=total, successes=successes, confidence_sum=confidence_sum)
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**lookup).update(**changes)
+
+def apply_rollups(transactions):
+    """Add freshly inserted Transaction objects to the rollups (call inside their DB transaction)."""
+    per_user = defaultdict(lambda: [0, 0, 0.0])
+    for t in transactions:
+        counters = per_user[(t.user_id, timezone.localdate(t.timestamp), t.gesture or '')]
+        counters[0] += 1
+        if t.status == 'success':
+            counters[1] += 1
+            counters[2] += t.confidence or 0.0
+    per_day = defaultdict(lambda: [0, 0, 0.0])
+    for (user_id, date, gesture), counters in per_user.items():
+        _increment(UserDailyStats, {'user_id': user_id, 'date': date, 'gesture': gesture}, *counters)
+        for i, value in enumerate(counters):
+            per_day[(date, gesture)][i] += value
+    for (date, gesture), counters in per_day.items():
+        _increment(GlobalDailyStats, {'date': date, 'gesture': gesture}, *counters)
+
+def rebuild_rollups(batch_size=5000):
+    """Recompute both rollup tables from the Transaction table (migration 0007 holds a frozen copy)."""
+    with transaction.atomic():
+        UserDailyStats.objects.all().delete()
+        GlobalDailyStats.objects.all().delete()
+        grouped = (
+            Transaction.objects
+            .annotate(day=TruncDate('timestamp'))
+            .values('user_id', 'day', 'gesture')
+            .annotate(
+                n=Count('id'),
+                ok=Count('id', filter=Q(status='success')),
+                conf=Sum('confidence', filter=Q(status='success')),
+            )
+            .order_by()
+        )
+        rows = [
+            UserDailyStats(user_id=g['user_id'], date=g['day'], gesture=g['gesture'] or '',
+                           total=g['n'], successes=g['ok'], confidence_sum=g['conf'] or 0.0)
+            for g in grouped
+        ]
+        # Rows with gesture NULL and '' fall into the same rollup row
+        merged = {}
+        for row in rows:
+            key = (row.user_id, row.date, row.gesture)
+            if key in merged:
+                merged[key].total += row.total
+                merged[key].successes += row.successes
+                merged[key].confidence_sum += row.confidence_sum
+            else:
+                merged[key] = row
+        UserDailyStats.objects.bulk_create(merged.values(), batch_size=batch_size)
+        totals = (
+            UserDailyStats.objects.values('date', 'gesture')
+            .annotate(n=Sum('total'), ok=Sum('successes'), conf=Sum('confidence_sum'))
+            .order_by()
+        )
+        GlobalDailyStats.objects.bulk_create(
+            [GlobalDailyStats(date=g['date'], gesture=g['gesture'], total=g['n'], successes=g['ok'], confidence_sum=g['conf'])
+             for g in totals],
+            batch_size=batch_size,
+        )
+    return len(merged)
+
+def summarize(stats_queryset, days):
+    """Predictions per day, top gestures, success rate and mean confidence over the last `days` days."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    per_day = defaultdict(lambda: [0, 0])
+    per_gesture = defaultdict(int)
+    total = successes = 0
+    confidence_sum = 0.0
+    for row in stats_queryset.filter(date__gte=since).values_list('date', 'gesture', 'total', 'successes', 'confidence_sum'):
+        date, gesture, n, ok, conf = row
+        per_day[date][0] += n
+        per_day[date][1] += ok
+        if gesture:
+            per_gesture[gesture] += ok
+        total += n
+        successes += ok
+        confidence_sum += conf
+    top = sorted(per_gesture.items(), key=lambda item: item[1], reverse=True)[:TOP_GESTURES]
+    return {
+        'days': [{'date': d, 'predictions': c[0], 'successes': c[1]} for d, c in sorted(per_day.items())],
+        'top_gestures': [{'gesture': g, 'count': c} for g, c in top],
+        'predictions': total,
+        'success_rate': successes / total if total else None,
+        'mean_confidence': confidence_sum / successes if successes else None,
+    }
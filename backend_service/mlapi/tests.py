@@ -0,0 +1,198 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import httpx
+import numpy as np
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import firebase_utils, metrics, payload_store, transaction_writer, views
+from .keypoints_codec import HEADER, KEYPOINTS_CONTENT_TYPE, MAGIC, VERSION, decode_keypoints, encode_keypoints
+from .models import Transaction, User
+from .views import AsyncPredictView, PredictView, TransactionHistoryView
+
+BAD_GZIP = b'not gzip at all'
+GZIP_BOMB = gzip.compress(bytes(10 * 1024 * 1024))  # 10 MB of zeros for a (20, 1662) float32 header
+
+
+def gzip_payload(data, rows=20, cols=1662):
+    return HEADER.pack(MAGIC, VERSION, 1, 1, rows, cols) + data
+
+
+BAD_BODIES = (gzip_payload(BAD_GZIP), gzip_payload(GZIP_BOMB), gzip_payload(GZIP_BOMB, rows=0), gzip_payload(b'', rows=2**32 - 1))
+
+
+class KeypointsCodecTests(SimpleTestCase):
+    def test_gzip_round_trip(self):
+        keypoints = np.random.default_rng(0).random((20, 1662)).astype(np.float32)
+        np.testing.assert_array_equal(decode_keypoints(encode_keypoints(keypoints, compression='gzip')), keypoints)
+
+    def test_malformed_gzip_raises_value_error(self):
+        truncated = gzip.compress(np.zeros(20 * 1662, np.float32).tobytes())[:100]
+        for data in (BAD_GZIP, truncated):
+            with self.assertRaises(ValueError):
+                decode_keypoints(gzip_payload(data))
+
+    def test_oversized_gzip_raises_value_error(self):
+        with self.assertRaisesRegex(ValueError, 'larger than'):
+            decode_keypoints(gzip_payload(GZIP_BOMB))
+
+    def test_forged_header_shape_raises_value_error(self):
+        # rows=0 used to disable the output cap; a huge shape overflowed it (OverflowError, a 500)
+        for rows, cols in ((0, 1662), (20, 0), (2**32 - 1, 2**32 - 1)):
+            with self.assertRaisesRegex(ValueError, 'Unsupported payload shape'):
+                decode_keypoints(gzip_payload(GZIP_BOMB, rows, cols))
+
+
+class PredictPayloadTests(SimpleTestCase):
+    """Malformed binary bodies are rejected with 400 before the ML service is called."""
+
+    def test_sync_view_rejects_bad_gzip(self):
+        for body in BAD_BODIES:
+            request = RequestFactory().post('/api/predict/', data=body, content_type=KEYPOINTS_CONTENT_TYPE)
+            self.assertEqual(PredictView.as_view()(request).status_code, 400)
+
+    async def test_async_view_rejects_bad_gzip(self):
+        for body in BAD_BODIES:
+            request = AsyncRequestFactory().post('/api/predict/', data=body, content_type=KEYPOINTS_CONTENT_TYPE)
+            response = await AsyncPredictView.as_view()(request)
+            self.assertEqual(response.status_code, 400)
+
+
+class PredictUpstreamTests(SimpleTestCase):
+    """A 200 from upstream whose body is not JSON (e.g. a proxy error page) is an error, not a crash."""
+
+    def setUp(self):
+        self.upstream = httpx.Response(200, text='<html>Bad gateway</html>')
+        self.body = b'{"keypoints": [[0.0]]}'
+
+    def test_sync_view_reports_non_json_body(self):
+        with mock.patch.object(views, 'post_predict', return_value=self.upstream), \
+                mock.patch.object(views, 'log_transaction') as log:
+            request = RequestFactory().post('/api/predict/', data=self.body, content_type='application/json')
+            response = PredictView.as_view()(request)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.data, {'error': '<html>Bad gateway</html>'})
+        self.assertEqual(log.call_args.args[3], 'error')
+
+    async def test_async_view_reports_non_json_body(self):
+        with mock.patch.object(views, 'apost_predict', mock.AsyncMock(return_value=self.upstream)), \
+                mock.patch.object(views, 'alog_transaction', mock.AsyncMock()) as log:
+            request = AsyncRequestFactory().post('/api/predict/', data=self.body, content_type='application/json')
+            response = await AsyncPredictView.as_view()(request)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('Bad gateway', response.content.decode())
+        self.assertEqual(log.call_args.args[3], 'error')
+
+
+class TransactionWriterTests(SimpleTestCase):
+    def test_failed_batch_is_logged_and_counted(self):
+        writer = transaction_writer.TransactionWriter()
+        with mock.patch.object(transaction_writer, 'write_transactions', side_effect=RuntimeError('db down')), \
+                self.assertLogs('mlapi.transaction_writer', 'ERROR') as logs:
+            writer._flush([{}, {}, {}])
+        self.assertEqual(writer.stats()['failed'], 3)
+        self.assertIn('Failed to write 3 transactions', logs.output[0])
+        self.assertIn('RuntimeError: db down', logs.output[0])
+
+    def test_dropped_count_is_exact_under_concurrency(self):
+        writer = transaction_writer.TransactionWriter(max_queue=1, overflow='drop')
+        writer._queue.put_nowait({})  # full; no writer thread consumes it
+        writer._ensure_started = lambda: None
+
+        def submit_many():
+            for _ in range(500):
+                writer.submit({})
+
+        threads = [threading.Thread(target=submit_many) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(writer.stats()['dropped'], 8 * 500)
+
+
+class MetricsShardTests(SimpleTestCase):
+    def test_shards_of_exited_threads_are_pruned_without_a_scrape(self):
+        counter = metrics.Counter('test_thread_requests_total', 'Requests counted from short-lived threads.')
+        for _ in range(5 * metrics.PRUNE_EVERY):
+            thread = threading.Thread(target=counter.inc)
+            thread.start()
+            thread.join()
+        # One new shard per thread (as under a thread-per-request server); exited ones are folded in as new ones arrive
+        self.assertLessEqual(len(metrics._shards), metrics.PRUNE_EVERY)
+        self.assertEqual(metrics._collect()[(counter.name, ())], [5 * metrics.PRUNE_EVERY])
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        firebase_utils.token_cache.clear()
+        self.addCleanup(firebase_utils.token_cache.clear)
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer test.token')
+        verify = mock.patch.object(firebase_utils.auth, 'verify_id_token', return_value={
+            'uid': 'uid-1', 'email': 'user@example.com', 'name': 'User', 'exp': 4102444800,
+        })
+        self.verify = verify.start()
+        self.addCleanup(verify.stop)
+
+    def test_cache_hits_return_a_fresh_instance(self):
+        first = firebase_utils.get_firebase_user(self.request)
+        first.last_login = None  # callers modify the instance they get
+        second = firebase_utils.get_firebase_user(self.request)
+        self.assertEqual(self.verify.call_count, 1)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.pk, first.pk)
+        self.assertIsNotNone(second.last_login)
+
+    def test_deleted_user_is_not_served_from_the_cache(self):
+        firebase_utils.get_firebase_user(self.request).delete()
+        user = firebase_utils.get_firebase_user(self.request)
+        self.assertEqual(self.verify.call_count, 2)
+        self.assertEqual(user.firebase_uid, 'uid-1')
+
+
+class TransactionHistoryPaginationTests(TestCase):
+    def test_pages_neither_skip_nor_repeat_rows_with_equal_timestamps(self):
+        user = User.objects.create(firebase_uid='pager', email='pager@example.com')
+        Transaction.objects.bulk_create([
+            Transaction(user=user, timestamp=timezone.now().replace(microsecond=0), response_data='{}', status='success')
+            for _ in range(25)
+        ])  # one bulk insert, as from the transaction writer: every timestamp ties
+        seen, url = [], '/api/transactions/?page_size=4'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                data = TransactionHistoryView.as_view()(RequestFactory().get(url)).data
+            # SQLite happens to return ties in a stable order; other databases need the explicit tie-breaker
+            self.assertRegex(queries[-1]['sql'], r'ORDER BY .*"timestamp" DESC, .*"id" DESC')
+            seen.extend(row['id'] for row in data['results'])
+            url = data['next']
+        # Ties are broken by id, newest first, so the order is the same on every query
+        self.assertEqual(seen, sorted(Transaction.objects.values_list('id', flat=True), reverse=True))
+
+
+class PrunePayloadFilesTests(TestCase):
+    def test_deletes_only_old_unreferenced_files(self):
+        payload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, payload_dir, ignore_errors=True)
+        with override_settings(TRANSACTION_PAYLOAD_DIR=payload_dir):
+            referenced, orphan, recent = (payload_store.store_file(bytes([i]) * 10) for i in range(3))
+            user = User.objects.create(firebase_uid='pruner', email='pruner@example.com')
+            Transaction.objects.create(user=user, keypoints_hash=referenced, response_data='{}', status='success')
+            old = time.time() - 7200
+            for digest in (referenced, orphan):
+                os.utime(payload_store.payload_path(digest), (old, old))
+            out = io.StringIO()
+            call_command('prune_payload_files', stdout=out)
+            self.assertIn('Deleted 1 unreferenced payload files', out.getvalue())
+            self.assertTrue(os.path.exists(payload_store.payload_path(referenced)))
+            self.assertFalse(os.path.exists(payload_store.payload_path(orphan)))
+            self.assertTrue(os.path.exists(payload_store.payload_path(recent)))  # may belong to a row not written yet
@@ -0,0 +1,220 @@
+import atexit
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .metrics import Gauge, TRANSACTION_WRITE, TRANSACTIONS_DROPPED, TRANSACTIONS_WRITTEN
+from .models import User, Transaction
+from .payload_store import payload_fields, prediction_fields
+from .stats import apply_rollups
+
+logger = logging.getLogger(__name__)
+
+def get_dummy_user():
+    # Use or create a dummy user for unauthenticated requests
+    user, _ = User.objects.get_or_create(
+        firebase_uid='dummy',
+        defaults={
+            'email': 'dummy@example.com',
+            'display_name': 'Dummy User'
+        }
+    )
+    return user
+
+def make_record(user, request_data, response_data, log_status):
+    """
+    Capture one transaction without touching the database.
+
+    `request_data` is the logged request text, or a keypoints ndarray from a
+    binary payload; either is encoded for storage off the request path.
+    """
+    return {
+        'user_id': user.pk if user is not None else None,
+        'timestamp': timezone.now(),
+        'request_data': request_data,
+        'response_data': response_data,
+        'status': log_status,
+    }
+
+def write_transactions(records):
+    """Insert records with one bulk_create and add them to the daily stats rollups."""
+    dummy_id = None
+    rows = []
+    for record in records:
+        user_id = record['user_id']
+        if user_id is None:
+            if dummy_id is None:
+                dummy_id = get_dummy_user().pk
+            user_id = dummy_id
+        rows.append(Transaction(
+            user_id=user_id,
+            timestamp=record['timestamp'],
+            response_data=record['response_data'],
+            status=record['status'],
+            **payload_fields(record['request_data']),
+            **prediction_fields(record['response_data'], record['status']),
+        ))
+    with TRANSACTION_WRITE.time(), transaction.atomic():
+        Transaction.objects.bulk_create(rows)
+        apply_rollups(rows)
+    TRANSACTIONS_WRITTEN.inc(amount=len(rows))
+
+class TransactionWriter:
+    """
+    Buffers transaction records in a bounded in-memory queue and writes them
+    from a background thread with bulk_create, whenever `batch_size` records
+    are waiting or `flush_interval` seconds have passed since the first one.
+
+    When the queue is full, `overflow` decides what `submit` does:
+      'sync'  - return False so the caller writes the record inline (no loss)
+      'block' - wait up to `block_timeout` seconds for space, then return False
+      'drop'  - discard the record and count it in `dropped`
+    A batch that fails to insert is logged and counted in `failed`. Both losses
+    are also counted in the transactions_dropped_total metric. Pending records
+    are flushed on shutdown (see install_shutdown_hooks).
+    """
+    def __init__(self, batch_size=100, flush_interval=1.0, max_queue=10000, overflow='sync', block_timeout=1.0):
+        if overflow not in ('sync', 'block', 'drop'):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # submit() runs on request threads, _flush() on the writer thread
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Start lazily, and again in forked worker processes (threads don't survive fork)
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='transaction-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, record):
+        """Queue a record from make_record. Returns False if the caller should write it inline."""
+        self._ensure_started()
+        try:
+            if self.overflow == 'block':
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            if self.overflow == 'drop':
+                with self._stats_lock:
+                    self.dropped += 1
+                TRANSACTIONS_DROPPED.inc('overflow')
+                return True
+            return False
+
+    def stop(self):
+        """Flush everything queued so far and stop the background thread."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+    def _flush(self, batch):
+        try:
+            write_transactions(batch)
+            with self._stats_lock:
+                self.written += len(batch)
+        except Exception:
+            with self._stats_lock:
+                self.failed += len(batch)
+            TRANSACTIONS_DROPPED.inc('write_failed', amount=len(batch))
+            logger.exception('Failed to write %d transactions', len(batch))
+        finally:
+            close_old_connections()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+        # Drain whatever is left on shutdown
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftover.append(item)
+        if leftover:
+            self._flush(leftover)
+
+writer = TransactionWriter(
+    batch_size=getattr(settings, 'TRANSACTION_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'TRANSACTION_LOG_FLUSH_INTERVAL', 1.0),
+    max_queue=getattr(settings, 'TRANSACTION_LOG_MAX_QUEUE', 10000),
+    overflow=getattr(settings, 'TRANSACTION_LOG_OVERFLOW', 'sync'),
+)
+
+Gauge('transaction_writer_queue_depth', 'Transaction records waiting for the background writer.', lambda: writer._queue.qsize())
+
+def install_shutdown_hooks():
+    """
+    Flush the writer at interpreter exit and on SIGTERM/SIGINT.
+
+    The signal hooks are needed because uvicorn re-raises the signal after its
+    own graceful shutdown, which terminates the process without running atexit.
+    Each hook flushes, then hands the signal to the previously installed handler.
+    """
+    atexit.register(writer.stop)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(signum)
+
+        def handler(signum, frame, previous=previous):
+            writer.stop()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(signum, signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+
+        try:
+            signal.signal(signum, handler)
+        except ValueError:
+            return  # Not the main thread; rely on atexit
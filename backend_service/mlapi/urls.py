@@ -1,11 +1,14 @@
 
 
+from django.conf import settings
 from django.urls import path
-from .views import PredictView, LogListView, UserProfileView, TransactionHistoryView
+from .views import PredictView, AsyncPredictView, LogListView, UserProfileView, TransactionHistoryView, StatsView, ServiceStatsView
 
 urlpatterns = [
-    path('predict/', PredictView.as_view(), name='predict'),
+    path('predict/', (AsyncPredictView if settings.ML_PROXY_ASYNC else PredictView).as_view(), name='predict'),
     path('logs/', LogListView.as_view(), name='logs'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('transactions/', TransactionHistoryView.as_view(), name='transactions'),
+    path('stats/', StatsView.as_view(), name='stats'),
+    path('service-stats/', ServiceStatsView.as_view(), name='service-stats'),
 ]
@@ -3,16 +3,27 @@
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions
-from .models import MLLog, User, Transaction
+from rest_framework import generics, status, permissions
+from rest_framework.parsers import JSONParser
+from .models import MLLog, User, Transaction, UserDailyStats, GlobalDailyStats
 from .serializers import MLLogSerializer, UserSerializer, TransactionSerializer
 from .transaction_summary_serializer import TransactionSummarySerializer
+from .pagination import TransactionCursorPagination
+from .stats import summarize
+from .parsers import KeypointsBinaryParser
+from .keypoints_codec import KEYPOINTS_CONTENT_TYPE, decode_keypoints
+from .ml_client import post_predict, apost_predict
+from .transaction_writer import make_record, write_transactions, writer as transaction_writer
+from .firebase_utils import get_firebase_user, token_cache
+from .metrics import PAYLOAD_DECODE
 import json
-import httpx
-from django.utils import timezone
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from asgiref.sync import sync_to_async
-import firebase_admin
-from firebase_admin import auth, credentials
 from opentelemetry import trace
 from opentelemetry.instrumentation.django import DjangoInstrumentor
 
@@ -20,69 +31,107 @@ from opentelemetry.instrumentation.django import DjangoInstrumentor
 DjangoInstrumentor().instrument()
 tracer = trace.get_tracer(__name__)
 
-# Initialize Firebase Admin SDK (ensure GOOGLE_APPLICATION_CREDENTIALS is set)
-if not firebase_admin._apps:
-    cred = credentials.ApplicationDefault()
-    firebase_admin.initialize_app(cred)
+def log_transaction(user, request_log, response_data, log_status):
+    record = make_record(user, request_log, response_data, log_status)
+    if settings.TRANSACTION_LOG_ASYNC and transaction_writer.submit(record):
+        return
+    write_transactions([record])
 
-def get_firebase_user(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None
-    id_token = auth_header.split(' ')[1]
+async def alog_transaction(user, request_log, response_data, log_status):
+    record = make_record(user, request_log, response_data, log_status)
+    if settings.TRANSACTION_LOG_ASYNC:
+        if transaction_writer.overflow == 'block':
+            # A full queue would block the event loop; wait in a worker thread instead
+            accepted = await sync_to_async(transaction_writer.submit, thread_sensitive=False)(record)
+        else:
+            accepted = transaction_writer.submit(record)
+        if accepted:
+            return
+    await sync_to_async(write_transactions)([record])
+
+def parse_prediction(response_data):
+    """The ML service's prediction object, or None if its body is not a JSON object (e.g. a proxy error page)."""
     try:
-        decoded_token = auth.verify_id_token(id_token)
-        firebase_uid = decoded_token['uid']
-        email = decoded_token.get('email', '')
-        display_name = decoded_token.get('name', '')
-        user, _ = User.objects.get_or_create(firebase_uid=firebase_uid, defaults={
-            'email': email,
-            'display_name': display_name
-        })
-        user.last_login = timezone.now()
-        user.save()
-        return user
-    except Exception as e:
+        prediction = json.loads(response_data)
+    except ValueError:
         return None
+    return prediction if isinstance(prediction, dict) else None
 
 class PredictView(APIView):
     permission_classes = [permissions.AllowAny]
+    parser_classes = [JSONParser, KeypointsBinaryParser]
     def post(self, request):
         with tracer.start_as_current_span("predict-transaction"):
             user = get_firebase_user(request)
+            # Read the raw body before parsing so it can be forwarded unchanged
+            body = request.body
             req_json = request.data
+            if request.content_type.startswith(KEYPOINTS_CONTENT_TYPE):
+                forward_content_type = KEYPOINTS_CONTENT_TYPE
+                request_log = req_json['keypoints']  # serialized by the transaction writer
+            else:
+                forward_content_type = "application/json"
+                request_log = body.decode('utf-8')
             try:
-                with httpx.Client() as client:
-                    ml_response = client.post(
-                        "http://localhost:8001/predict",
-                        json=req_json,
-                        headers={"Content-Type": "application/json"}
-                    )
+                ml_response = post_predict(body, forward_content_type)
                 response_data = ml_response.text
                 log_status = "success" if ml_response.status_code == 200 else "error"
             except Exception as e:
                 response_data = str(e)
                 log_status = "error"
-            if user is None:
-                # Use or create a dummy user for unauthenticated requests
-                user, _ = User.objects.get_or_create(
-                    firebase_uid='dummy',
-                    defaults={
-                        'email': 'dummy@example.com',
-                        'display_name': 'Dummy User'
-                    }
-                )
-            Transaction.objects.create(
-                user=user,
-                request_data=json.dumps(req_json),
-                response_data=response_data,
-                status=log_status
-            )
-            if log_status == "success":
-                return Response(json.loads(response_data), status=status.HTTP_200_OK)
+            prediction = parse_prediction(response_data) if log_status == "success" else None
+            if prediction is None:
+                log_status = "error"
+            log_transaction(user, request_log, response_data, log_status)
+            if prediction is not None:
+                return Response(prediction, status=status.HTTP_200_OK)
             else:
                 return Response({"error": response_data}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncPredictView(View):
+    """
+    Async version of PredictView for ASGI deployments: the ML round-trip is
+    awaited on a pooled httpx.AsyncClient, so one process can hold many
+    in-flight predictions. Firebase verification runs in a worker thread via
+    sync_to_async; the transaction is handed to the background writer. Served
+    under WSGI (e.g. runserver), it falls back to the pooled sync client.
+    """
+    async def post(self, request):
+        with tracer.start_as_current_span("predict-transaction"):
+            user = await sync_to_async(get_firebase_user, thread_sensitive=False)(request)
+            body = request.body
+            try:
+                if request.content_type == KEYPOINTS_CONTENT_TYPE:
+                    forward_content_type = KEYPOINTS_CONTENT_TYPE
+                    with PAYLOAD_DECODE.time():
+                        request_log = decode_keypoints(body)  # serialized by the transaction writer
+                else:
+                    forward_content_type = "application/json"
+                    request_log = body.decode('utf-8')
+            except ValueError as e:
+                return JsonResponse({"detail": f"Invalid keypoints payload: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                if isinstance(request, ASGIRequest):
+                    ml_response = await apost_predict(body, forward_content_type)
+                else:
+                    # Under WSGI every request runs on a new event loop (async_to_sync), where an
+                    # async client could not be pooled; use the shared sync client instead
+                    ml_response = await sync_to_async(post_predict, thread_sensitive=False)(body, forward_content_type)
+                response_data = ml_response.text
+                log_status = "success" if ml_response.status_code == 200 else "error"
+            except Exception as e:
+                response_data = str(e)
+                log_status = "error"
+            prediction = parse_prediction(response_data) if log_status == "success" else None
+            if prediction is None:
+                log_status = "error"
+            await alog_transaction(user, request_log, response_data, log_status)
+            if prediction is not None:
+                return JsonResponse(prediction, status=status.HTTP_200_OK)
+            else:
+                return JsonResponse({"error": response_data}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class LogListView(APIView):
     def get(self, request):
         logs = MLLog.objects.all().order_by('-timestamp')
@@ -97,16 +146,43 @@ class UserProfileView(APIView):
         serializer = UserSerializer(user)
         return Response(serializer.data)
 
-class TransactionHistoryView(APIView):
+class TransactionHistoryView(generics.ListAPIView):
+    """Newest-first transaction history, one cursor page at a time (ordering comes from the paginator)."""
+    permission_classes = [permissions.AllowAny]
+    serializer_class = TransactionSummarySerializer
+    pagination_class = TransactionCursorPagination
+
+    def get_queryset(self):
+        user = get_firebase_user(self.request)
+        # Only the listed columns; the payload columns are never loaded
+        transactions = Transaction.objects.only(*TransactionSummarySerializer.Meta.fields)
+        if user:
+            transactions = transactions.filter(user=user)
+        return transactions
+
+class StatsView(APIView):
+    """Per-user (when authenticated) and global usage stats over the last `days` days, read from the rollups."""
     permission_classes = [permissions.AllowAny]
     def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        days = min(max(days, 1), 365)
         user = get_firebase_user(request)
-        if user:
-            transactions = Transaction.objects.filter(user=user).order_by('-timestamp')
-        else:
-            transactions = Transaction.objects.all().order_by('-timestamp')
-        serializer = TransactionSummarySerializer(transactions, many=True)
-        return Response(serializer.data)
+        return Response({
+            'days': days,
+            'user': summarize(UserDailyStats.objects.filter(user=user), days) if user else None,
+            'global': summarize(GlobalDailyStats.objects.all(), days),
+        })
+
+class ServiceStatsView(APIView):
+    permission_classes = [permissions.AllowAny]
+    def get(self, request):
+        return Response({
+            'firebase_token_cache': token_cache.stats(),
+            'transaction_writer': transaction_writer.stats(),
+        })
 
 class ProfileView(APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
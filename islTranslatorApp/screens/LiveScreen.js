@@ -169,9 +169,11 @@ export default function LiveScreen({ navigation }) {
       const res = await fetch('http://192.168.0.165:8000/api/transactions/', {
         headers: headers
       });
+      // The history API is cursor-paginated: {next, previous, results}, newest first
       const data = await res.json();
-      if (Array.isArray(data) && data.length > 0) {
-        setLastTransaction(data[0]);
+      const latest = data.results?.[0];
+      if (latest) {
+        setLastTransaction(latest);
       } else {
         setLastTransaction({ error: 'No transactions found.' });
       }
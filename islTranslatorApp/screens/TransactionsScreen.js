@@ -12,35 +12,60 @@ export default function TransactionsScreen({ navigation }) {
   const [transactions, setTransactions] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [nextUrl, setNextUrl] = useState(null);
+  const [stats, setStats] = useState(null);
   const { getAuthToken } = useAuth();
 
-  useEffect(() => {
-    const fetchTransactions = async () => {
-      try {
-        const authToken = await getAuthToken();
-        const headers = {};
-        if (authToken) {
-          headers['Authorization'] = `Bearer ${authToken}`;
-        }
-        
-        const res = await fetch('http://192.168.0.165:8000/api/transactions/', {
-          headers: headers
-        });
-        const data = await res.json();
-        if (Array.isArray(data)) {
-          setTransactions(data);
-        } else {
-          setError('No transactions found.');
-        }
-      } catch (e) {
-        setError(e.message);
-      } finally {
-        setLoading(false);
+  // The history API is cursor-paginated: {next, previous, results}
+  const fetchTransactions = async (url, append) => {
+    try {
+      const authToken = await getAuthToken();
+      const headers = {};
+      if (authToken) {
+        headers['Authorization'] = `Bearer ${authToken}`;
+      }
+
+      const res = await fetch(url, {
+        headers: headers
+      });
+      const data = await res.json();
+      if (Array.isArray(data.results)) {
+        setTransactions(prev => (append ? [...prev, ...data.results] : data.results));
+        setNextUrl(data.next);
+      } else {
+        setError('No transactions found.');
       }
-    };
-    fetchTransactions();
+    } catch (e) {
+      setError(e.message);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const fetchStats = async () => {
+    try {
+      const authToken = await getAuthToken();
+      const headers = authToken ? { Authorization: `Bearer ${authToken}` } : {};
+      const res = await fetch('http://192.168.0.165:8000/api/stats/?days=30', { headers: headers });
+      const data = await res.json();
+      setStats(data.user || data.global);
+    } catch (e) {
+      // Stats are optional; the history list still works without them
+    }
+  };
+
+  useEffect(() => {
+    fetchTransactions('http://192.168.0.165:8000/api/transactions/', false);
+    fetchStats();
   }, [getAuthToken]);
 
+  const loadMore = () => {
+    if (nextUrl && !loading) {
+      setLoading(true);
+      fetchTransactions(nextUrl, true);
+    }
+  };
+
   const renderTransaction = ({ item }) => (
     <View style={styles.card}>
       {Object.entries(item).map(([key, value]) => (
@@ -56,6 +81,16 @@ export default function TransactionsScreen({ navigation }) {
     <View style={styles.container}>
       <Button title="Back" onPress={() => navigation.goBack()} />
       <Text style={styles.title}>History</Text>
+      {stats && stats.predictions > 0 && (
+        <View style={styles.statsCard}>
+          <Text>Last 30 days: {stats.predictions} predictions</Text>
+          <Text>Success rate: {Math.round(stats.success_rate * 100)}%</Text>
+          {stats.mean_confidence !== null && <Text>Mean confidence: {stats.mean_confidence.toFixed(2)}</Text>}
+          {stats.top_gestures.length > 0 && (
+            <Text>Top gestures: {stats.top_gestures.map(g => `${g.gesture} (${g.count})`).join(', ')}</Text>
+          )}
+        </View>
+      )}
       {loading && <ActivityIndicator style={{ marginTop: 20 }} />}
       {error ? (
         <Text style={styles.error}>{error}</Text>
@@ -64,6 +99,8 @@ export default function TransactionsScreen({ navigation }) {
           data={transactions}
           keyExtractor={item => String(item.id)}
           renderItem={renderTransaction}
+          onEndReached={loadMore}
+          onEndReachedThreshold={0.5}
           contentContainerStyle={{ paddingBottom: 24 }}
         />
       )}
@@ -89,6 +126,12 @@ const styles = StyleSheet.create({
     marginVertical: 8,
     textAlign: 'center',
   },
+  statsCard: {
+    backgroundColor: '#f1f5f9',
+    borderRadius: 12,
+    padding: 12,
+    marginBottom: 8,
+  },
   card: {
     backgroundColor: '#e0f2fe',
     borderRadius: 12,
@@ -0,0 +1,72 @@
+"""
+Epoch time of the per-file KeypointsSequence vs PackedKeypointsSequence.
+
+Packs the tree (float32 and float16) into temporary directories, checks that
+the packed batches hold the same values as the per-file loader, then times
+full passes over every batch (no model, just data loading). The first epoch
+of each loader may include cold page-cache reads; later epochs show the
+steady state.
+
+Usage (from ml_service):
+    python bench_dataset.py [--data ISL_Keypoints] [--epochs 3] [--batch-size 8]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from model import KeypointsSequence, PackedKeypointsSequence, keypoints_base
+from ml_service.packed_dataset import pack_dataset
+
+
+def epoch_times(seq, epochs):
+    times = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        for i in range(len(seq)):
+            seq[i]
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=keypoints_base)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=8)
+    args = parser.parse_args()
+
+    files = KeypointsSequence(args.data, batch_size=args.batch_size)
+    seq_len = files.max_seq_len
+    results = {'per-file .npy': epoch_times(files, args.epochs)}
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in ('float32', 'float16'):
+            path = os.path.join(tmp, dtype)
+            pack_dataset(args.data, path, dtype)
+            packed = PackedKeypointsSequence(path, batch_size=args.batch_size, max_seq_len=seq_len)
+
+            # Same values for the same samples (float16 within its rounding)
+            index = {sample: i for i, sample in enumerate(packed.samples)}
+            for i in np.random.default_rng(0).permutation(len(files.samples))[:64]:
+                expected = np.load(files.samples[i]).astype(np.float32)[:seq_len]
+                got = packed.data.gather([packed.order[index[os.path.relpath(files.samples[i], args.data)]]], seq_len)[0][0]
+                assert np.array_equal(got[len(expected):], np.zeros_like(got[len(expected):]))
+                if dtype == 'float32':
+                    assert np.array_equal(got[:len(expected)], expected), files.samples[i]
+                else:
+                    assert np.allclose(got[:len(expected)], expected, rtol=1e-3, atol=1e-3), files.samples[i]
+            size = os.path.getsize(os.path.join(path, 'frames.npy'))
+            results[f'packed {dtype} ({size / 2**20:.0f} MB)'] = epoch_times(packed, args.epochs)
+
+    print(f"{len(files.samples)} samples, {len(files)} batches of {args.batch_size}, seq_len {seq_len}")
+    baseline = np.mean(results['per-file .npy'][1:] or results['per-file .npy'])
+    for name, times in results.items():
+        steady = np.mean(times[1:] or times)
+        print(f"{name:<28} epoch 1 {times[0]:.3f}s  steady {steady:.3f}s  "
+              f"({len(files.samples) / steady:.0f} samples/s, {baseline / steady:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
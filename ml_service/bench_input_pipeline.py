@@ -0,0 +1,76 @@
+"""
+Training throughput (steps/s in model.fit) for each input pipeline:
+KeypointsSequence (per-file generator), the tf.data pipeline without and
+with a RAM cache, and PackedKeypointsSequence.
+
+Every run trains a fresh copy of the model from model.py on the same data,
+so the numbers include the model's own step time. The first epoch also
+fills the tf.data cache, so it is reported separately.
+
+Usage (from ml_service):
+    python bench_input_pipeline.py [--data ISL_Keypoints] [--epochs 3] [--batch-size 8]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+
+from model import KeypointsSequence, PackedKeypointsSequence, build_model, keypoints_base, make_tf_dataset
+from ml_service.packed_dataset import pack_dataset
+
+
+class EpochTimer(Callback):
+    def on_train_begin(self, logs=None):
+        self.times = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.times.append(time.perf_counter() - self.start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=keypoints_base)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--shuffle-buffer', type=int, default=1024)
+    args = parser.parse_args()
+
+    gen = KeypointsSequence(args.data, batch_size=args.batch_size)
+    steps = len(gen)
+    inputs = {
+        'sequence (per-file)': lambda: gen,
+        'tf.data, no cache': lambda: make_tf_dataset(gen.samples, gen.labels, gen.max_seq_len, args.batch_size,
+                                                     cache=None, shuffle_buffer=args.shuffle_buffer),
+        'tf.data, RAM cache': lambda: make_tf_dataset(gen.samples, gen.labels, gen.max_seq_len, args.batch_size,
+                                                      cache='memory', shuffle_buffer=args.shuffle_buffer),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        pack_dataset(args.data, os.path.join(tmp, 'packed'))
+        inputs['packed memmap'] = lambda: PackedKeypointsSequence(os.path.join(tmp, 'packed'), args.batch_size,
+                                                                   max_seq_len=gen.max_seq_len)
+        for name, make_input in inputs.items():
+            tf.random.set_seed(0)
+            model = build_model((gen.max_seq_len, gen.feature_dim), len(gen.label_map))
+            timer = EpochTimer()
+            model.fit(make_input(), epochs=args.epochs, callbacks=[timer], verbose=0)
+            results[name] = timer.times
+
+    print(f"\n{len(gen.samples)} samples, {steps} steps/epoch (batch {args.batch_size}), seq_len {gen.max_seq_len}, "
+          f"{os.cpu_count()} CPUs")
+    baseline = None
+    for name, times in results.items():
+        later = times[1:] or times
+        rate = steps * len(later) / sum(later)
+        baseline = baseline or rate
+        print(f"{name:<22} epoch 1 {steps / times[0]:7.1f} steps/s   epochs 2+ {rate:7.1f} steps/s ({rate / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Build the ISL_Keypoints tree that model.py trains on from local copies of the
+dictionary videos listed in ISL_Dictionary_words.csv.
+
+Expected video layout (one folder per row of the CSV, as downloaded):
+
+    <videos>/<Folder Name>/<gesture>/<sample>.mp4    several samples per gesture
+    <videos>/<Folder Name>/<gesture>.mp4             one sample, named after the gesture
+
+Output: <out>/<Folder Name>/<gesture>/<sample>.npy, a (frames, 1662) float32
+array per video (see ml_service/keypoints.py).
+
+Videos are processed by a pool of single-threaded worker processes, each with
+its own MediaPipe Holistic instance. Every .npy is written to a temporary file
+and renamed into place, and each finished video is appended to
+<out>/manifest.jsonl (video path, size, mtime, SHA-256 of its content, output
+path). A rerun skips videos whose size and mtime match the manifest; with
+--verify their content hash is checked instead. A crash mid-run loses at most
+the videos that were in flight.
+
+Usage (from ml_service):
+    python build_dataset.py videos/ [--out ISL_Keypoints] [--workers 8] [--folders A,B]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ml_service.keypoints import video_keypoints
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+WORDS_CSV = 'ISL_Dictionary_words.csv'
+MANIFEST = 'manifest.jsonl'
+
+_holistic = None
+
+
+def init_worker():
+    global _holistic
+    import mediapipe as mp
+    _holistic = mp.solutions.holistic.Holistic(
+        static_image_mode=False,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+def csv_folders(path):
+    """Folder names from the dictionary CSV, without the 'All Dictionary Videos' archive."""
+    with open(path, newline='') as f:
+        return [row['Folder Name'] for row in csv.DictReader(f) if not row['Folder Name'].startswith('All ')]
+
+
+def resolve_folder(videos_root, name):
+    """The folder for a CSV name under `videos_root` (names may carry stray spaces), or None."""
+    for candidate in (name, name.strip()):
+        if os.path.isdir(os.path.join(videos_root, candidate)):
+            return candidate
+    return None
+
+
+def find_videos(videos_root, folders):
+    """[(video relative path, output relative path)] for the given top-level folders."""
+    jobs = []
+    for folder in folders:
+        folder_path = os.path.join(videos_root, folder)
+        for entry in sorted(os.listdir(folder_path)):
+            entry_path = os.path.join(folder_path, entry)
+            if os.path.isdir(entry_path):
+                gesture, names = entry, sorted(os.listdir(entry_path))
+                videos = [(os.path.join(folder, gesture, name), os.path.splitext(name)[0]) for name in names]
+            else:
+                gesture = sample = os.path.splitext(entry)[0]
+                videos = [(os.path.join(folder, entry), sample)]
+            for video, sample in videos:
+                if video.lower().endswith(VIDEO_EXTENSIONS):
+                    jobs.append((video, os.path.join(folder.strip(), gesture.strip(), sample + '.npy')))
+    return jobs
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_atomic(path, array):
+    """np.save to a temporary file in the target directory, then rename it into place."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp, 'wb') as f:
+            np.save(f, array)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_manifest(out_dir):
+    """Latest manifest entry per video. Lines cut short by a crash are ignored."""
+    entries = {}
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[entry['video']] = entry
+    return entries
+
+
+def compact_manifest(out_dir, entries):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        for video in sorted(entries):
+            f.write(json.dumps(entries[video]) + '\n')
+    os.replace(tmp, path)
+
+
+def process_video(videos_root, out_dir, video, output, known_sha256):
+    """Hash one video and extract its keypoints (unless its content matches `known_sha256`)."""
+    path = os.path.join(videos_root, video)
+    try:
+        stat = os.stat(path)
+        sha256 = file_sha256(path)
+        entry = {'video': video, 'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha256, 'output': output}
+        if sha256 == known_sha256 and os.path.exists(os.path.join(out_dir, output)):
+            return dict(entry, unchanged=True)
+        started = time.perf_counter()
+        keypoints, fps = video_keypoints(path, _holistic)
+        if not len(keypoints):
+            raise ValueError("no frames decoded")
+        save_atomic(os.path.join(out_dir, output), keypoints)
+        return dict(entry, frames=len(keypoints), fps=fps, seconds=round(time.perf_counter() - started, 3))
+    except Exception as e:
+        return {'video': video, 'error': f"{type(e).__name__}: {e}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('videos', help='Root folder of the downloaded dictionary videos')
+    parser.add_argument('--out', default='ISL_Keypoints')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--csv', default=WORDS_CSV, help='Dictionary CSV listing the folders to process')
+    parser.add_argument('--folders', default=None, help='Comma-separated folder names (default: all folders in the CSV)')
+    parser.add_argument('--verify', action='store_true', help='Re-hash videos whose size and mtime are unchanged')
+    args = parser.parse_args()
+
+    names = args.folders.split(',') if args.folders else csv_folders(args.csv)
+    folders = {name: resolve_folder(args.videos, name) for name in names}
+    missing = [name.strip() for name, folder in folders.items() if folder is None]
+    if missing:
+        print(f"Not found under {args.videos}, skipped: {', '.join(missing)}")
+    jobs = find_videos(args.videos, [folder for folder in folders.values() if folder is not None])
+
+    outputs = {}
+    for video, output in jobs:
+        if output in outputs:
+            print(f"Skipping {video}: same output {output} as {outputs[output]}", file=sys.stderr)
+        else:
+            outputs[output] = video
+    jobs = [(video, output) for output, video in outputs.items()]
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest = load_manifest(args.out)
+    pending, skipped = [], 0
+    for video, output in jobs:
+        entry = manifest.get(video)
+        stat = os.stat(os.path.join(args.videos, video))
+        up_to_date = (
+            entry is not None and entry['output'] == output
+            and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+            and os.path.exists(os.path.join(args.out, output))
+        )
+        if up_to_date and not args.verify:
+            skipped += 1
+        else:
+            pending.append((video, output, entry['sha256'] if entry is not None else None))
+    print(f"{len(jobs)} videos: {skipped} already in the manifest, {len(pending)} to check or process")
+    if not pending:
+        return
+
+    # One process per core; keep each worker's NumPy/BLAS and MediaPipe single-threaded
+    for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(var, '1')
+
+    started = time.perf_counter()
+    processed = unchanged = failed = frames = 0
+    # spawn: MediaPipe is not fork-safe
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker) as pool, \
+            open(os.path.join(args.out, MANIFEST), 'a') as journal:
+        futures = [pool.submit(process_video, args.videos, args.out, video, output, sha256)
+                   for video, output, sha256 in pending]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            if 'error' in result:
+                failed += 1
+                print(f"[{i}/{len(pending)}] {result['video']}: {result['error']}", file=sys.stderr)
+                continue
+            if result.pop('unchanged', False):
+                unchanged += 1
+            else:
+                processed += 1
+                frames += result['frames']
+                print(f"[{i}/{len(pending)}] {result['video']}: {result['frames']} frames ({result['seconds']:.1f}s)")
+            manifest[result['video']] = result
+            journal.write(json.dumps(result) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+    compact_manifest(args.out, manifest)
+
+    minutes = (time.perf_counter() - started) / 60
+    per_minute = processed / minutes if minutes else 0.0
+    print(f"Done: {processed} extracted, {unchanged} unchanged, {failed} failed in {minutes * 60:.1f}s")
+    print(f"Throughput: {per_minute:.1f} videos/min total, {per_minute / args.workers:.1f} videos/min per core "
+          f"({frames / (minutes * 60) if minutes else 0.0:.0f} frames/s) with {args.workers} workers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Accuracy/latency report for the float32, float16 and int8 weight variants.
+
+Compares the Keras float32 model with each weights variant on a sample of
+ISL_Keypoints, for two engines:
+
+    numpy    the variant is widened to float32 at load, so only the file size differs
+    tflite   TensorFlow Lite build of the variant (see ml_service/tflite_model.py);
+             int8 runs dynamic-range int8 kernels, so its latency is the quantized one
+
+Reported: accuracy, agreement with the float32 predictions, max probability
+difference, file size, in-memory weights size and latency at batch sizes 1
+and 32. The variant files are written to --out (a new temporary directory by
+default), never over the served model files.
+
+Note: model.py trains on every sample, so the evaluation samples were seen in
+training; the table compares the variants with each other, not how well the
+model generalizes.
+
+Usage (from ml_service):
+    python evaluate_variants.py [--fraction 0.2] [--seed 0] [--max-samples 2000] [--out DIR]
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+from tensorflow.keras.models import load_model
+
+from model import KeypointsSequence, keypoints_base
+from ml_service.numpy_model import LSTMNetwork, NumpyModel, VARIANTS, extract_weights, quantize_weights, save_weights
+from ml_service.tflite_model import TFLiteModel, save_tflite
+
+MODEL_PATH = 'isl_sign_language_model.h5'
+LABEL_MAP_PATH = 'isl_label_map.pkl'
+
+
+def load_sample(seq, fraction, seed, max_samples):
+    """Deterministically pick a random subset and load it padded/truncated like KeypointsSequence."""
+    order = np.random.default_rng(seed).permutation(len(seq.samples))
+    picked = order[:max(1, int(len(order) * fraction))][:max_samples]
+    X, y = [], []
+    for i in picked:
+        arr = np.load(seq.samples[i])
+        if arr.shape[0] < seq.max_seq_len:
+            arr = np.pad(arr, ((0, seq.max_seq_len - arr.shape[0]), (0, 0)), mode='constant')
+        else:
+            arr = arr[:seq.max_seq_len]
+        X.append(arr.astype(np.float32))
+        y.append(seq.labels[i])
+    return np.array(X), np.array(y)
+
+
+def loaded_weights_bytes(model):
+    """Bytes of weight arrays the engine holds in memory after loading."""
+    if isinstance(model, NumpyModel):
+        net = model.network
+        arrays = [net.kernel, net.recurrent_kernel, net.bias] + [a for kernel, bias, _ in net.dense for a in (kernel, bias)]
+        return sum(a.nbytes for a in arrays)
+    if isinstance(model, TFLiteModel):
+        # Constant tensors keep their shape when the batch size changes; float16 weights count twice,
+        # once as stored and once as the float32 copy they are dequantized into
+        shapes = []
+        for batch_size in (1, 3):
+            model.predict_on_batch(np.zeros((batch_size, model.seq_len, model.feature_dim), dtype=np.float32))
+            shapes.append({d['index']: (tuple(d['shape']), d['dtype']) for d in model.interpreter.get_tensor_details()})
+        return sum(int(np.prod(shape)) * np.dtype(dtype).itemsize
+                   for index, (shape, dtype) in shapes[0].items() if shapes[1][index] == (shape, dtype))
+    return sum(w.numpy().nbytes for w in model.weights)
+
+
+def time_per_batch(predict, X, batch_size, repeats=20):
+    batch = X[:batch_size]
+    if len(batch) < batch_size:
+        batch = np.resize(batch, (batch_size,) + X.shape[1:])
+    predict(batch)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict(batch)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=keypoints_base)
+    parser.add_argument('--fraction', type=float, default=0.2, help='Fraction of the samples to evaluate on')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-samples', type=int, default=2000)
+    parser.add_argument('--out', default=None, help='Directory for the variant files (default: a new temporary directory)')
+    args = parser.parse_args()
+
+    model = load_model(MODEL_PATH)
+    with open(LABEL_MAP_PATH, 'rb') as f:
+        label_map = pickle.load(f)
+
+    seq = KeypointsSequence(args.data, max_seq_len=model.input_shape[1])
+    if seq.label_map != label_map:
+        print("Warning: dataset labels differ from isl_label_map.pkl; accuracy will be meaningless.")
+    X, y = load_sample(seq, args.fraction, args.seed, args.max_samples)
+    print(f"\nEvaluation samples: {len(X)} of {len(seq.samples)} (seen in training, see the note in --help)")
+    out_dir = args.out or tempfile.mkdtemp(prefix='isl_variants_')
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"Variant files: {out_dir}")
+
+    reference = model.predict(X, verbose=0)
+    engines = [('keras float32', lambda b: model.predict_on_batch(b), MODEL_PATH, model)]
+    weights = extract_weights(model)
+    for variant in VARIANTS:
+        path = os.path.join(out_dir, f'isl_sign_language_model_{variant}.npz')
+        save_weights(path, quantize_weights(weights, variant))
+        numpy_model = NumpyModel.load(path)
+        engines.append((f'numpy {variant}', numpy_model.predict_on_batch, path, numpy_model))
+    for variant in VARIANTS:
+        path = os.path.join(out_dir, f'isl_sign_language_model_{variant}.tflite')
+        save_tflite(path, weights, variant, model.input_shape[1])
+        tflite_model = TFLiteModel.load(path)
+        engines.append((f'tflite {variant}', tflite_model.predict_on_batch, path, tflite_model))
+
+    print(f"\n{'engine':<16}{'accuracy':>10}{'agree':>9}{'max |dp|':>11}{'file KB':>10}{'mem KB':>9}{'b=1 ms':>9}{'b=32 ms':>9}")
+    for name, predict, path, loaded in engines:
+        probs = np.concatenate([predict(X[i:i + 256]) for i in range(0, len(X), 256)])
+        accuracy = np.mean(np.argmax(probs, axis=1) == y) * 100
+        agree = np.mean(np.argmax(probs, axis=1) == np.argmax(reference, axis=1)) * 100
+        max_diff = np.max(np.abs(probs - reference))
+        size_kb = os.path.getsize(path) / 1024
+        print(f"{name:<16}{accuracy:>9.2f}%{agree:>8.2f}%{max_diff:>11.2e}{size_kb:>10.1f}{loaded_weights_bytes(loaded) / 1024:>9.1f}"
+              f"{time_per_batch(predict, X, 1):>9.3f}{time_per_batch(predict, X, 32):>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
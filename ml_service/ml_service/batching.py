@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import Histogram
+
+
+# Process-wide, so they are also served on /metrics and keep counting across model swaps
+BATCH_SIZE = Histogram("ml_batch_size", "Sequences per micro-batch forward pass.", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+QUEUE_WAIT = Histogram("ml_batch_queue_wait_seconds", "Time a sequence waits in the micro-batcher queue.",
+                       buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25))
+
+
+class MicroBatcher:
+    """
+    Merge concurrent single-sequence predictions into batched forward passes.
+
+    Requests are queued by `submit`; a background thread takes the first
+    waiting request, keeps collecting until `max_batch_size` requests are
+    queued or `max_wait_ms` has elapsed, runs `predict_fn` once on the stacked
+    batch and resolves each request's future with its own output row.
+
+    Sequences submitted while the batcher is not running (before `start` or
+    after `stop`) get a future that has already failed, and requests still
+    queued when the worker exits are failed instead of left waiting.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._stopping.set()  # until start()
+        # Orders submit() against stop(): anything queued before the flag is set is drained by the worker
+        self._submit_lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        with self._submit_lock:
+            self._stopping.set()
+        self._queue.put(None)  # wake the worker
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, sequence):
+        """Queue one (SEQ_LEN, features) sequence; returns a Future of its output row."""
+        future = Future()
+        with self._submit_lock:
+            if self._stopping.is_set():
+                future.set_exception(RuntimeError("Batcher is not running"))
+            else:
+                self._queue.put((sequence, future, time.perf_counter()))
+        return future
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self.queue_depth(),
+            "batch_size": BATCH_SIZE.snapshot(),
+            "queue_wait_seconds": QUEUE_WAIT.snapshot(),
+        }
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        try:
+            while not self._stopping.is_set():
+                batch = self._collect()
+                if not batch:
+                    continue
+                dispatched = time.perf_counter()
+                for _, _, enqueued in batch:
+                    QUEUE_WAIT.observe(dispatched - enqueued)
+                BATCH_SIZE.observe(len(batch))
+                try:
+                    outputs = self.predict_fn(np.stack([seq for seq, _, _ in batch]))
+                except Exception as e:
+                    for _, future, _ in batch:
+                        future.set_exception(e)
+                    continue
+                for row, (_, future, _) in zip(outputs, batch):
+                    future.set_result(row)
+        finally:
+            # However the worker exits, refuse new work and fail anything still queued so callers don't hang
+            with self._submit_lock:
+                self._stopping.set()
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[1].set_exception(RuntimeError("Batcher stopped"))
@@ -0,0 +1,82 @@
+"""
+Check incremental sliding-window inference against model.predict on the full
+window, then compare per-frame latency. tests/test_incremental.py asserts the
+same equivalence on a small random network.
+
+Usage (from ml_service/ml_service):
+    python bench_incremental.py [--frames 300] [--model ../isl_sign_language_model.h5]
+"""
+import argparse
+import time
+
+import numpy as np
+from tensorflow.keras.models import load_model
+
+from numpy_model import IncrementalLSTMSession, LSTMNetwork, extract_weights
+
+SEQ_LEN = 20
+
+
+def make_stream(frames, feature_dim, seed=0):
+    rng = np.random.default_rng(seed)
+    stream = rng.random((frames, feature_dim), dtype=np.float32)
+    # Blank out some frames and some face/hand blocks so masking is exercised
+    stream[rng.random(frames) < 0.1] = 0.0
+    stream[rng.random(frames) < 0.3, 132:1536] = 0.0
+    return stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="../isl_sign_language_model.h5")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    network = LSTMNetwork(extract_weights(model))
+    stream = make_stream(args.frames, network.feature_dim)
+
+    # Equivalence: every full window against model.predict
+    session = IncrementalLSTMSession(network, SEQ_LEN)
+    incremental = []
+    for frame in stream:
+        out = session.push(frame)
+        if out is not None:
+            incremental.append(out)
+    incremental = np.array(incremental)
+    windows = np.lib.stride_tricks.sliding_window_view(stream, (SEQ_LEN, network.feature_dim))[:, 0]
+    reference = model.predict(windows, verbose=0)
+    max_diff = float(np.max(np.abs(incremental - reference)))
+    same_argmax = float(np.mean(np.argmax(incremental, axis=1) == np.argmax(reference, axis=1)))
+    print(f"Windows compared: {len(reference)}")
+    print(f"Max abs difference: {max_diff:.2e} (tolerance {args.tolerance:.0e})")
+    print(f"Argmax agreement: {same_argmax * 100:.2f}%")
+    if max_diff > args.tolerance:
+        raise SystemExit("FAILED: incremental output differs from model.predict")
+
+    # Latency per new frame
+    session = IncrementalLSTMSession(network, SEQ_LEN)
+    start = time.perf_counter()
+    for frame in stream:
+        session.push(frame)
+    incremental_ms = (time.perf_counter() - start) * 1000 / len(stream)
+
+    start = time.perf_counter()
+    for window in windows:
+        model.predict(window[None], verbose=0)
+    predict_ms = (time.perf_counter() - start) * 1000 / len(windows)
+
+    start = time.perf_counter()
+    for window in windows:
+        model.predict_on_batch(window[None])
+    on_batch_ms = (time.perf_counter() - start) * 1000 / len(windows)
+
+    print(f"\nPer-frame latency over {len(stream)} frames:")
+    print(f"  model.predict (full window):          {predict_ms:8.3f} ms")
+    print(f"  model.predict_on_batch (full window): {on_batch_ms:8.3f} ms")
+    print(f"  incremental (one step per frame):     {incremental_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare the per-frame cost of keypoints.extract_keypoints with the
+list-comprehension extraction it replaced (also per feature layout).
+tests/test_keypoints.py asserts that both give exactly the same values.
+
+Landmark lists are built as NormalizedLandmarkList protobuf messages: with
+mediapipe's own landmark_pb2 when it is installed, otherwise with a message
+class of the same schema, so attribute access costs the same as on real
+MediaPipe results.
+
+Usage (from ml_service/ml_service):
+    python bench_keypoints.py [--frames 300]
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from keypoints import FEATURE_DIM, LAYOUTS, extract_keypoints, extract_keypoints_batch, layout_dim
+
+
+def landmark_list_class():
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        return landmark_pb2.NormalizedLandmarkList
+    except ImportError:
+        pass
+    from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+    proto = descriptor_pb2.FileDescriptorProto(name="bench_landmark.proto", package="bench", syntax="proto2")
+    landmark = proto.message_type.add(name="NormalizedLandmark")
+    for number, name in enumerate(["x", "y", "z", "visibility", "presence"], 1):
+        landmark.field.add(name=name, number=number, type=descriptor_pb2.FieldDescriptorProto.TYPE_FLOAT,
+                           label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+    landmark_list = proto.message_type.add(name="NormalizedLandmarkList")
+    landmark_list.field.add(name="landmark", number=1, type=descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE,
+                            type_name=".bench.NormalizedLandmark", label=descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED)
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(proto)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName("bench.NormalizedLandmarkList"))
+
+
+def legacy_extract_keypoints(results):
+    """extract_keypoints as it was in ml_service/main.py."""
+    pose = np.zeros(33 * 4)
+    if results.pose_landmarks and len(results.pose_landmarks.landmark) > 0:
+        pose = np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in results.pose_landmarks.landmark]).flatten()
+    face = np.zeros(468 * 3)
+    if results.face_landmarks and len(results.face_landmarks.landmark) > 0:
+        face = np.array([[lm.x, lm.y, lm.z] for lm in results.face_landmarks.landmark]).flatten()
+    lh = np.zeros(21 * 3)
+    if results.left_hand_landmarks and len(results.left_hand_landmarks.landmark) > 0:
+        lh = np.array([[lm.x, lm.y, lm.z] for lm in results.left_hand_landmarks.landmark]).flatten()
+    rh = np.zeros(21 * 3)
+    if results.right_hand_landmarks and len(results.right_hand_landmarks.landmark) > 0:
+        rh = np.array([[lm.x, lm.y, lm.z] for lm in results.right_hand_landmarks.landmark]).flatten()
+    return np.concatenate([pose, face, lh, rh])
+
+
+def make_list(cls, rng, count, fields):
+    landmarks = cls()
+    values = rng.uniform(-0.5, 1.5, (count, len(fields))).astype(np.float32)
+    values[rng.random((count, len(fields))) < 0.05] = 0.0  # explicitly set zeros
+    for row in values:
+        lm = landmarks.landmark.add()
+        for name, value in zip(fields, row):
+            setattr(lm, name, float(value))
+    return landmarks
+
+
+def make_results(cls, rng, hands=True, face=True, pose_fields=("x", "y", "z", "visibility", "presence")):
+    return SimpleNamespace(
+        pose_landmarks=make_list(cls, rng, 33, pose_fields),
+        face_landmarks=make_list(cls, rng, 468, ("x", "y", "z")) if face else None,
+        left_hand_landmarks=make_list(cls, rng, 21, ("x", "y", "z")) if hands else None,
+        right_hand_landmarks=make_list(cls, rng, 21, ("x", "y", "z")) if hands and rng.random() < 0.7 else None,
+    )
+
+
+def time_per_frame(fn, frames):
+    start = time.perf_counter()
+    for results in frames:
+        fn(results)
+    return (time.perf_counter() - start) * 1e6 / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cls = landmark_list_class()
+    rng = np.random.default_rng(args.seed)
+    print(f"Landmark lists: {cls.DESCRIPTOR.full_name} ({'mediapipe' if cls.DESCRIPTOR.full_name.startswith('mediapipe') else 'same-schema stand-in'})")
+    frames = [make_results(cls, rng) for _ in range(args.frames)]
+    out = np.empty(FEATURE_DIM, dtype=np.float32)
+    legacy_us = time_per_frame(legacy_extract_keypoints, frames)
+    new_us = time_per_frame(lambda r: extract_keypoints(r, out), frames)
+    start = time.perf_counter()
+    extract_keypoints_batch(frames)
+    batch_us = (time.perf_counter() - start) * 1e6 / len(frames)
+    print(f"\nPer frame (all parts): legacy {legacy_us:.1f} us, extract_keypoints {new_us:.1f} us "
+          f"({legacy_us / new_us:.1f}x), extract_keypoints_batch {batch_us:.1f} us")
+    for layout in LAYOUTS:
+        out = np.empty(layout_dim(layout), dtype=np.float32)
+        layout_us = time_per_frame(lambda r: extract_keypoints(r, out, layout), frames)
+        print(f"  layout {layout:<16} {layout_dim(layout):>5} values  {layout_us:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
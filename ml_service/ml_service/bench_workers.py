@@ -0,0 +1,134 @@
+"""
+Compare per-worker memory of multi-process ml_service deployments (Linux only).
+
+Modes:
+    uvicorn-keras   uvicorn --workers N, every worker loads the .h5 with TensorFlow (current setup)
+    uvicorn-numpy   uvicorn --workers N, every worker loads its own copy of the .npz weights
+    prefork-mmap    serve.py --workers N, weights loaded once and memory-mapped read-only
+
+For each mode the benchmark starts the server, sends a few /predict requests so
+every worker has touched the weights, then reports RSS and PSS (proportional set
+size: shared pages are split between the processes mapping them) per worker.
+
+Usage (from ml_service/ml_service):
+    python bench_workers.py [--workers 4] [--modes uvicorn-keras,prefork-mmap]
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+SEQ_LEN = 20
+FEATURE_DIM = 1662
+
+MODES = {
+    "uvicorn-keras": ({"ML_ENGINE": "keras"}, ["-m", "uvicorn", "main:app", "--workers", "{workers}", "--port", "{port}"]),
+    "uvicorn-numpy": ({"ML_ENGINE": "numpy"}, ["-m", "uvicorn", "main:app", "--workers", "{workers}", "--port", "{port}"]),
+    "prefork-mmap": ({"ML_ENGINE": "mmap"}, ["serve.py", "--workers", "{workers}", "--port", "{port}", "--log-level", "warning"]),
+}
+
+
+def read_kb(path, field):
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def child_pids(parent):
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent and b"resource_tracker" not in cmdline:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def wait_healthy(port, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as r:
+                if r.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.25)
+    return False
+
+
+def send_predictions(port, count):
+    body = json.dumps({"keypoints": np.random.rand(SEQ_LEN, FEATURE_DIM).tolist()}).encode()
+    for _ in range(count):
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/predict", data=body, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=60) as r:
+            r.read()
+
+
+def run_mode(name, workers, port, startup_timeout):
+    env_overrides, argv = MODES[name]
+    argv = [a.format(workers=workers, port=port) for a in argv]
+    env = dict(os.environ, **env_overrides)
+    proc = subprocess.Popen([sys.executable] + argv, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_healthy(port, startup_timeout):
+            print(f"{name}: server did not become healthy within {startup_timeout}s")
+            return None
+        send_predictions(port, workers * 10)
+        time.sleep(0.5)
+        rows = []
+        for pid in child_pids(proc.pid):
+            rows.append((pid, read_kb(f"/proc/{pid}/status", "VmRSS"), read_kb(f"/proc/{pid}/smaps_rollup", "Pss")))
+        parent = (proc.pid, read_kb(f"/proc/{proc.pid}/status", "VmRSS"), read_kb(f"/proc/{proc.pid}/smaps_rollup", "Pss"))
+        return parent, rows
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    for name in args.modes.split(","):
+        result = run_mode(name, args.workers, args.port, args.startup_timeout)
+        if result is None:
+            continue
+        parent, rows = result
+        print(f"\n=== {name} ({args.workers} workers) ===")
+        print(f"  supervisor pid {parent[0]:>7}: RSS {parent[1] / 1024:8.1f} MB  PSS {parent[2] / 1024:8.1f} MB")
+        for pid, rss, pss in rows:
+            print(f"  worker     pid {pid:>7}: RSS {rss / 1024:8.1f} MB  PSS {pss / 1024:8.1f} MB")
+        if rows:
+            total_pss = (parent[2] + sum(r[2] for r in rows)) / 1024
+            print(f"  mean worker RSS {np.mean([r[1] for r in rows]) / 1024:.1f} MB, total PSS {total_pss:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
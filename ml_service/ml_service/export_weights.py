@@ -0,0 +1,69 @@
+"""
+Export the trained Keras model to a compact .npz for the NumPy inference engine
+(ML_ENGINE=numpy), and check that both engines agree.
+
+Usage (from ml_service/ml_service):
+    python export_weights.py [--model ../isl_sign_language_model.h5] [--out ../isl_sign_language_model.npz]
+                             [--mmap-dir ../isl_sign_language_model_weights] [--variants float16,int8]
+                             [--tflite float32,float16,int8]
+
+--mmap-dir additionally writes the memory-mappable weights directory used by ML_ENGINE=mmap.
+--variants additionally writes quantized copies next to --out, e.g. isl_sign_language_model_int8.npz,
+selectable in the service with ML_MODEL_VARIANT.
+--tflite additionally writes TensorFlow Lite builds next to --out, e.g. isl_sign_language_model_int8.tflite,
+served with ML_ENGINE=tflite and ML_MODEL_VARIANT (see tflite_model.py).
+"""
+import argparse
+import os
+
+import numpy as np
+from tensorflow.keras.models import load_model
+
+from numpy_model import LSTMNetwork, NumpyModel, extract_weights, quantize_weights, save_weights, save_weights_dir
+from tflite_model import TFLiteModel, save_tflite
+
+SEQ_LEN = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="../isl_sign_language_model.h5")
+    parser.add_argument("--out", default="../isl_sign_language_model.npz")
+    parser.add_argument("--mmap-dir", default=None)
+    parser.add_argument("--variants", default="", help="Comma-separated quantized variants: float16, int8")
+    parser.add_argument("--tflite", default="", help="Comma-separated TensorFlow Lite variants: float32, float16, int8")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    weights = extract_weights(model)
+    save_weights(args.out, weights)
+    print(f"Saved weights to {args.out} ({os.path.getsize(args.out) / 1024:.1f} KB)")
+    if args.mmap_dir:
+        save_weights_dir(args.mmap_dir, weights)
+        print(f"Saved memory-mappable weights to {args.mmap_dir}/")
+
+    # Sanity check: both engines should give the same probabilities
+    numpy_model = NumpyModel.load(args.out)
+    x = np.random.default_rng(0).random((8, SEQ_LEN, numpy_model.network.feature_dim), dtype=np.float32)
+    x[0] = 0.0  # fully masked sequence
+    x[1, SEQ_LEN // 2:] = 0.0  # trailing padding
+    reference = model.predict(x, verbose=0)
+    max_diff = float(np.max(np.abs(numpy_model.predict(x) - reference)))
+    print(f"Max abs difference vs Keras: {max_diff:.2e}")
+
+    stem, ext = os.path.splitext(args.out)
+    for variant in filter(None, args.variants.split(",")):
+        quantized = quantize_weights(weights, variant)
+        path = f"{stem}_{variant}{ext}"
+        save_weights(path, quantized)
+        max_diff = float(np.max(np.abs(NumpyModel(LSTMNetwork(quantized)).predict(x) - reference)))
+        print(f"Saved {variant} weights to {path} ({os.path.getsize(path) / 1024:.1f} KB), max abs difference vs Keras: {max_diff:.2e}")
+    for variant in filter(None, args.tflite.split(",")):
+        path = f"{stem}_{variant}.tflite"
+        save_tflite(path, weights, variant, SEQ_LEN)
+        max_diff = float(np.max(np.abs(TFLiteModel.load(path).predict(x) - reference)))
+        print(f"Saved {variant} TensorFlow Lite model to {path} ({os.path.getsize(path) / 1024:.1f} KB), max abs difference vs Keras: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Gesture state machine shared by the desktop live translator (ml_service/main.py)
+and the streaming WebSocket endpoint of the FastAPI service.
+
+A session moves neutral -> detecting once the signer has left the neutral pose
+for GESTURE_THRESHOLD frames, back to neutral after NEUTRAL_THRESHOLD neutral
+frames, and to predicted once the smoothed prediction buffer agrees on a
+gesture. A predicted gesture is held for RESET_DELAY frames.
+"""
+from collections import deque
+
+import numpy as np
+
+NEUTRAL_THRESHOLD = 8  # Frames to confirm neutral position
+GESTURE_THRESHOLD = 5  # Frames to confirm gesture is being performed
+RESET_DELAY = 30  # Frames to wait before resetting to neutral
+PREDICTION_BUFFER_SIZE = 5  # Store last 5 predictions for smoothing
+CONFIDENCE_THRESHOLD = 0.3  # Lowered to catch more correct predictions
+PREDICTION_STABILITY_THRESHOLD = 3  # How many consistent predictions needed
+
+POSE_LANDMARKS = 33
+POSE_VALUES = 4  # x, y, z, visibility
+
+
+def get_most_common_prediction(prediction_buffer, stability_threshold=PREDICTION_STABILITY_THRESHOLD):
+    """Get the most common prediction from the buffer for stability"""
+    if len(prediction_buffer) < stability_threshold:
+        return None, 0
+
+    # Count occurrences of each prediction
+    pred_counts = {}
+    for pred in prediction_buffer:
+        pred_counts[pred] = pred_counts.get(pred, 0) + 1
+
+    # Find the most common prediction
+    most_common = max(pred_counts.items(), key=lambda x: x[1])
+
+    # Only return if it appears at least stability_threshold times
+    if most_common[1] >= stability_threshold:
+        return most_common[0], most_common[1] / len(prediction_buffer)
+
+    return None, 0
+
+
+def detect_neutral_keypoints(frame):
+    """
+    Detect the neutral/standing straight position from one keypoint frame.
+
+    Same rules as detect_neutral_position in ml_service/main.py, applied to the
+    pose block (first 33 * 4 values) of a 1662-value keypoint vector.
+    """
+    pose = np.asarray(frame[:POSE_LANDMARKS * POSE_VALUES]).reshape(POSE_LANDMARKS, POSE_VALUES)
+    if not np.any(pose):
+        return False  # No pose detected
+
+    x, y = pose[:, 0], pose[:, 1]
+    # Wrists (15, 16) below shoulders (11, 12): hands down
+    hands_down = y[15] > y[11] and y[16] > y[12]
+    # Arms close to the body
+    arms_not_extended = not (abs(x[15] - x[11]) > 0.15 or abs(x[16] - x[12]) > 0.15)
+    # Ears (3, 4) at similar height: head level
+    head_level = abs(y[3] - y[4]) < 0.05
+    return bool(hands_down and arms_not_extended and head_level)
+
+
+class GestureStateMachine:
+    """Per-signer gesture state plus the smoothing buffer of recent predictions."""
+
+    def __init__(self, neutral_threshold=NEUTRAL_THRESHOLD, gesture_threshold=GESTURE_THRESHOLD,
+                 reset_delay=RESET_DELAY, confidence_threshold=CONFIDENCE_THRESHOLD,
+                 stability_threshold=PREDICTION_STABILITY_THRESHOLD, buffer_size=PREDICTION_BUFFER_SIZE):
+        self.neutral_threshold = neutral_threshold
+        self.gesture_threshold = gesture_threshold
+        self.reset_delay = reset_delay
+        self.confidence_threshold = confidence_threshold
+        self.stability_threshold = stability_threshold
+        self.prediction_buffer = deque(maxlen=buffer_size)
+        self.state = "neutral"  # "neutral", "detecting", "predicted"
+        self.neutral_frames = 0
+        self.gesture_frames = 0
+        self.reset_timer = 0
+        self.last_gesture_prediction = None
+
+    def update(self, is_neutral):
+        """
+        Advance the frame counters and state transitions for one frame.
+
+        Returns "detecting", "neutral" or "reset" when a transition happened, else None.
+        """
+        if is_neutral:
+            self.neutral_frames += 1
+            self.gesture_frames = 0
+        else:
+            self.gesture_frames += 1
+            self.neutral_frames = 0
+
+        if self.state == "neutral" and self.gesture_frames >= self.gesture_threshold:
+            self.state = "detecting"
+            self.prediction_buffer.clear()  # Clear old predictions
+            return "detecting"
+        elif self.state == "detecting" and self.neutral_frames >= self.neutral_threshold:
+            self.state = "neutral"
+            return "neutral"
+        elif self.state == "predicted":
+            self.reset_timer += 1
+            if self.reset_timer >= self.reset_delay:
+                self.state = "neutral"
+                self.reset_timer = 0
+                self.last_gesture_prediction = None
+                return "reset"
+        return None
+
+    def observe_prediction(self, prediction, num_actions):
+        """
+        Record one model output (class probabilities) made while detecting.
+
+        Returns a dict with the raw `pred_idx`/`confidence`, the smoothed
+        `stable_pred_idx`/`stability`, whether the prediction was `accepted`
+        (confident and stable) and whether it produced a `new_gesture`, in which
+        case the machine has moved to the "predicted" state.
+        """
+        prediction = np.asarray(prediction).reshape(-1)
+        pred_idx = int(np.argmax(prediction))
+        confidence = float(np.max(prediction))
+
+        # Add current prediction to buffer
+        self.prediction_buffer.append(pred_idx)
+
+        # Get stable prediction from buffer
+        stable_pred_idx, stability = get_most_common_prediction(self.prediction_buffer, self.stability_threshold)
+
+        accepted = confidence > self.confidence_threshold and stable_pred_idx is not None
+        new_gesture = False
+        # Only predict once per gesture
+        if accepted and stable_pred_idx < num_actions and self.last_gesture_prediction != stable_pred_idx:
+            self.last_gesture_prediction = stable_pred_idx
+            self.state = "predicted"
+            self.reset_timer = 0
+            new_gesture = True
+
+        return {
+            "pred_idx": pred_idx,
+            "confidence": confidence,
+            "stable_pred_idx": stable_pred_idx,
+            "stability": stability,
+            "accepted": accepted,
+            "new_gesture": new_gesture,
+        }
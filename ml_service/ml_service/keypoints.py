@@ -0,0 +1,228 @@
+"""
+Keypoint extraction from MediaPipe Holistic results, shared by the desktop app,
+data collection and offline video processing.
+
+Frame layout (FEATURE_DIM float32 values; missing parts are zeros):
+
+    pose        33 x (x, y, z, visibility)    [0, 132)
+    face       468 x (x, y, z)                [132, 1536)
+    left hand   21 x (x, y, z)                [1536, 1599)
+    right hand  21 x (x, y, z)                [1599, 1662)
+
+Models can be trained on a subset of these values (a feature layout, see
+LAYOUTS): e.g. "pose_hands" keeps pose and both hands, 258 values per frame.
+The layout a model was trained with is saved next to it (save_layout), and
+extract_keypoints(results, layout=...) then writes only that subset; it skips
+reading the face mesh entirely when the layout has no face landmarks.
+
+Landmark lists are protobuf messages, and reading 543 landmarks attribute by
+attribute from Python dominates the cost of a frame. Instead each list is
+serialized with one C++ call: MediaPipe sets the same fields on every landmark,
+so the wire records have a fixed stride and are read as a NumPy structured
+array. Lists whose records do not share one layout (or objects that are not
+protobuf messages) fall back to attribute access. Both paths produce the same
+float32 values as the list-comprehension code they replace.
+"""
+from itertools import chain
+from operator import attrgetter
+
+import json
+import os
+
+import numpy as np
+
+XYZ = ("x", "y", "z")
+XYZV = ("x", "y", "z", "visibility")
+
+# (results attribute, offset, landmarks, fields)
+PARTS = (
+    ("pose_landmarks", 0, 33, XYZV),
+    ("face_landmarks", 132, 468, XYZ),
+    ("left_hand_landmarks", 1536, 21, XYZ),
+    ("right_hand_landmarks", 1599, 21, XYZ),
+)
+FEATURE_DIM = 1662
+
+# Face Mesh landmarks kept by the "pose_hands_face" layout: outer lips, eyebrows, nose tip
+FACE_SUBSET = (
+    61, 185, 40, 39, 37, 0, 267, 269, 270, 409, 291, 375, 321, 405, 314, 17, 84, 181, 91, 146,
+    70, 63, 105, 66, 107, 336, 296, 334, 293, 300,
+    1,
+)
+
+# Feature layouts: (results attribute, landmark indices or None for all) per part, in frame order.
+# Pose, when included, comes first (neutral-pose detection reads the first 33 x 4 values) and the
+# hands always come last (the prediction cache checks the last 126 values for hands).
+LAYOUTS = {
+    "full": (("pose_landmarks", None), ("face_landmarks", None),
+             ("left_hand_landmarks", None), ("right_hand_landmarks", None)),
+    "pose_hands_face": (("pose_landmarks", None), ("face_landmarks", FACE_SUBSET),
+                        ("left_hand_landmarks", None), ("right_hand_landmarks", None)),
+    "pose_hands": (("pose_landmarks", None), ("left_hand_landmarks", None), ("right_hand_landmarks", None)),
+    "hands": (("left_hand_landmarks", None), ("right_hand_landmarks", None)),
+}
+HANDS_DIM = 2 * 21 * 3
+LAYOUT_FILE = "isl_feature_layout.json"  # written next to the model by model.py
+
+# NormalizedLandmark field numbers (mediapipe/framework/formats/landmark.proto)
+FIELD_NAMES = {1: "x", 2: "y", 3: "z", 4: "visibility", 5: "presence"}
+LANDMARK_TAG = 0x0A  # field 1 of NormalizedLandmarkList, length-delimited
+FIXED32 = 5
+
+_layouts = {}  # (record length, field tags) -> (structured dtype, mask of non-float bytes)
+
+
+def _layout(data):
+    """Structured dtype for the first wire record in `data`, or None if it is not a plain float record."""
+    if len(data) < 2 or data[0] != LANDMARK_TAG or data[1] >= 0x80 or data[1] % 5:
+        return None
+    length = data[1]
+    tags = bytes(data[2:2 + length:5])
+    key = (length, tags)
+    layout = _layouts.get(key)
+    if layout is None:
+        names = []
+        for tag in tags:
+            if tag & 7 != FIXED32 or (tag >> 3) not in FIELD_NAMES:
+                return None
+            names.append(FIELD_NAMES[tag >> 3])
+        if len(set(names)) != len(names):
+            return None
+        fields = [("tag", "u1"), ("len", "u1")]
+        for i, name in enumerate(names):
+            fields += [(f"tag{i}", "u1"), (name, "<f4")]
+        dtype = np.dtype(fields)
+        mask = np.ones(dtype.itemsize, dtype=bool)
+        for name in names:
+            offset = dtype.fields[name][1]
+            mask[offset:offset + 4] = False
+        layout = _layouts[key] = (dtype, mask)
+    return layout
+
+
+def fill_landmarks(landmark_list, count, fields, out):
+    """
+    Write `count` landmarks x `fields` into the flat float32 view `out`.
+    Returns False (leaving `out` untouched) if the list does not hold `count` landmarks.
+    """
+    serialize = getattr(landmark_list, "SerializeToString", None)
+    if serialize is not None:
+        data = serialize()
+        layout = _layout(data)
+        if layout is not None and len(data) == count * layout[0].itemsize:
+            dtype, mask = layout
+            records = np.frombuffer(data, dtype=dtype)
+            raw = np.frombuffer(data, dtype=np.uint8).reshape(count, dtype.itemsize)
+            if (raw[:, mask] == raw[0, mask]).all():
+                columns = out.reshape(count, len(fields))
+                for i, name in enumerate(fields):
+                    if name in dtype.names:
+                        columns[:, i] = records[name]
+                    else:
+                        columns[:, i] = 0.0  # unset optional field reads as 0.0
+                return True
+    landmarks = landmark_list.landmark
+    if len(landmarks) != count:
+        return False
+    out[:] = np.fromiter(chain.from_iterable(map(attrgetter(*fields), landmarks)), dtype=np.float32, count=count * len(fields))
+    return True
+
+
+_layout_parts = {}  # layout name -> ([(attr, count, fields, position, size, landmarks)], dim)
+
+
+def layout_parts(layout):
+    """Where each part of `layout` goes in its frame vector, and the vector's length."""
+    if layout not in _layout_parts:
+        part_info = {attr: (count, fields) for attr, _, count, fields in PARTS}
+        parts, position = [], 0
+        for attr, landmarks in LAYOUTS[layout]:
+            count, fields = part_info[attr]
+            size = (count if landmarks is None else len(landmarks)) * len(fields)
+            parts.append((attr, count, fields, position, size, landmarks))
+            position += size
+        _layout_parts[layout] = (parts, position)
+    return _layout_parts[layout]
+
+
+def layout_dim(layout):
+    return layout_parts(layout)[1]
+
+
+def layout_columns(layout):
+    """Indices of the layout's values in the full FEATURE_DIM frame vector (frame[..., columns] converts a frame)."""
+    offsets = {attr: offset for attr, offset, _, _ in PARTS}
+    columns = []
+    for attr, count, fields, _, _, landmarks in layout_parts(layout)[0]:
+        rows = np.arange(count) if landmarks is None else np.asarray(landmarks)
+        columns.append((offsets[attr] + rows[:, np.newaxis] * len(fields) + np.arange(len(fields))).ravel())
+    return np.concatenate(columns)
+
+
+def save_layout(path, layout):
+    with open(path, "w") as f:
+        json.dump({"layout": layout, "feature_dim": layout_dim(layout), "columns": layout_columns(layout).tolist()}, f)
+
+
+def load_layout(path):
+    """(layout name, columns) saved with a model; models without a layout file use the full frame."""
+    if not os.path.exists(path):
+        return "full", layout_columns("full")
+    with open(path) as f:
+        saved = json.load(f)
+    return saved["layout"], np.asarray(saved["columns"], dtype=np.intp)
+
+
+def extract_keypoints(results, out=None, layout="full"):
+    """
+    Fill `out` (a float32 buffer of layout_dim(layout) values, allocated if None)
+    with the keypoints of one frame. The default layout is the full FEATURE_DIM vector.
+    """
+    parts, dim = layout_parts(layout)
+    if out is None:
+        out = np.empty(dim, dtype=np.float32)
+    for attr, count, fields, position, size, landmarks in parts:
+        block = out[position:position + size]
+        target = block if landmarks is None else np.empty(count * len(fields), dtype=np.float32)
+        landmark_list = getattr(results, attr, None)
+        if landmark_list is None or not fill_landmarks(landmark_list, count, fields, target):
+            block[:] = 0.0
+        elif landmarks is not None:
+            block[:] = target.reshape(count, len(fields))[list(landmarks)].ravel()
+    return out
+
+
+def extract_keypoints_batch(results_seq, out=None):
+    """Keypoints of many frames (e.g. a whole video) as a (frames, FEATURE_DIM) float32 array."""
+    results_seq = list(results_seq)
+    if out is None:
+        out = np.empty((len(results_seq), FEATURE_DIM), dtype=np.float32)
+    for row, results in zip(out, results_seq):
+        extract_keypoints(results, row)
+    return out
+
+
+def video_keypoints(path, holistic, layout="full"):
+    """
+    Keypoints of every frame of a video file as a (frames, layout_dim(layout))
+    float32 array, and the video's frame rate. `holistic` is a MediaPipe Holistic instance.
+    """
+    import cv2
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    keypoints = np.empty((max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 1), layout_dim(layout)), dtype=np.float32)
+    frames = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frames == len(keypoints):  # the container's frame count was too low
+                keypoints = np.concatenate([keypoints, np.empty_like(keypoints)])
+            extract_keypoints(holistic.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)), keypoints[frames], layout)
+            frames += 1
+    finally:
+        cap.release()
+    return keypoints[:frames], fps
@@ -0,0 +1,117 @@
+"""
+Binary keypoint payload format (`application/x-isl-keypoints`).
+
+Layout: a 16-byte little-endian header followed by the row-major matrix.
+
+    magic       4s   b"ISLK"
+    version     B    1
+    dtype       B    1 = float32, 2 = float16
+    compression B    0 = none, 1 = gzip, 2 = zstd
+    reserved    B
+    rows        I    number of frames (e.g. SEQ_LEN)
+    cols        I    features per frame (e.g. 1662)
+
+Uncompressed float32 payloads are decoded with `np.frombuffer` without
+copying; float16 payloads are widened to float32 once.
+"""
+import gzip
+import struct
+import zlib
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip and raw payloads always work
+    zstandard = None
+
+KEYPOINTS_CONTENT_TYPE = "application/x-isl-keypoints"
+
+# Raised by gzip/zlib/zstd on corrupt streams; decode_keypoints turns them into ValueError
+DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+MAGIC = b"ISLK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxII")
+
+# Header shapes above these are rejected before anything is allocated or decompressed, so a
+# forged header cannot turn the output cap below into "unlimited" (0) or an overflowing size
+MAX_ROWS = 256  # frames per payload; a /predict window is SEQ_LEN (20)
+MAX_COLS = 1662  # full-frame FEATURE_DIM; feature layouts are narrower
+
+DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f2")}
+DTYPE_CODES = {"float32": 1, "float16": 2}
+COMPRESSION_CODES = {None: 0, "gzip": 1, "zstd": 2}
+
+
+def encode_keypoints(keypoints, dtype="float32", compression=None):
+    """Encode a 2-D keypoint matrix into the binary payload format."""
+    arr = np.asarray(keypoints)
+    if arr.ndim != 2:
+        raise ValueError("Keypoints must be a 2-D (frames, features) matrix")
+    if not (0 < arr.shape[0] <= MAX_ROWS and 0 < arr.shape[1] <= MAX_COLS):
+        raise ValueError(f"Keypoints shape {arr.shape} is outside ({MAX_ROWS}, {MAX_COLS})")
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    if compression not in COMPRESSION_CODES:
+        raise ValueError(f"Unsupported compression: {compression}")
+    dtype_code = DTYPE_CODES[dtype]
+    data = np.ascontiguousarray(arr, dtype=DTYPES[dtype_code]).tobytes()
+    if compression == "gzip":
+        data = gzip.compress(data, compresslevel=1)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        data = zstandard.ZstdCompressor().compress(data)
+    header = HEADER.pack(MAGIC, VERSION, dtype_code, COMPRESSION_CODES[compression], arr.shape[0], arr.shape[1])
+    return header + data
+
+
+def _gunzip(data, size):
+    """Decompress a gzip stream, producing at most `size` bytes (guards against gzip bombs)."""
+    decompressor = zlib.decompressobj(wbits=31)
+    out = decompressor.decompress(data, size)
+    if not decompressor.eof:
+        # Output stopped at `size`: the rest of the stream may only hold the gzip trailer
+        if decompressor.decompress(decompressor.unconsumed_tail, 1):
+            raise ValueError(f"Decompressed payload is larger than {size} bytes")
+        if not decompressor.eof:
+            raise ValueError("Truncated gzip payload")
+    if decompressor.unused_data:
+        raise ValueError("Trailing data after gzip payload")
+    return out
+
+
+def decode_keypoints(body):
+    """Decode a binary payload into a float32 (rows, cols) array. Raises ValueError on malformed input."""
+    if len(body) < HEADER.size:
+        raise ValueError("Payload shorter than header")
+    magic, version, dtype_code, compression, rows, cols = HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError("Bad payload magic")
+    if version != VERSION:
+        raise ValueError(f"Unsupported payload version: {version}")
+    if dtype_code not in DTYPES:
+        raise ValueError(f"Unsupported payload dtype code: {dtype_code}")
+    if not (0 < rows <= MAX_ROWS and 0 < cols <= MAX_COLS):
+        raise ValueError(f"Unsupported payload shape ({rows}, {cols}); at most ({MAX_ROWS}, {MAX_COLS})")
+    dtype = DTYPES[dtype_code]
+    size = rows * cols * dtype.itemsize
+    data = memoryview(body)[HEADER.size:]
+    try:
+        if compression == 1:
+            data = _gunzip(data, size)
+        elif compression == 2:
+            if zstandard is None:
+                raise ValueError("zstd payloads require the 'zstandard' package")
+            data = zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+        elif compression != 0:
+            raise ValueError(f"Unsupported payload compression code: {compression}")
+    except DECOMPRESSION_ERRORS as e:
+        raise ValueError(f"Corrupt compressed payload: {e}") from e
+    if len(data) != size:
+        raise ValueError(f"Payload size does not match header shape ({rows}, {cols})")
+    arr = np.frombuffer(data, dtype=dtype).reshape(rows, cols)
+    if dtype != np.float32:
+        arr = arr.astype(np.float32)
+    return arr
@@ -1,61 +1,473 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
 import numpy as np
+import hmac
+import json
+import logging
 import pickle
-from tensorflow.keras.models import load_model
 import os
+import sys
+import threading
+import time
+
+# Sibling modules are imported by name; make that work for both `uvicorn main:app`
+# (from ml_service/ml_service) and `uvicorn ml_service.main:app` (from ml_service)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batching import MicroBatcher
+from keypoints import FEATURE_DIM as FRAME_DIM, LAYOUT_FILE, load_layout
+from keypoints_codec import KEYPOINTS_CONTENT_TYPE, MAGIC, decode_keypoints
+from service_logging import Sampler, setup_logging
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Counter, Gauge, Histogram, MetricsMiddleware, render as render_metrics
+from model_registry import ModelManager, current_version, list_versions, set_current, verify as verify_version
+from streaming import StreamSession
+from numpy_model import VARIANTS, LSTMNetwork, NumpyModel, extract_weights
+from prediction_cache import PredictionCache
 
 app = FastAPI(title="ISL Gesture ML Service", version="1.0")
 
+# Prometheus metrics served on /metrics (per-thread aggregation, see metrics.py)
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by method, route and status.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by method and route.", ("method", "route"))
+MODEL_FORWARD = Histogram("ml_model_forward_seconds", "Model forward pass time (single window or micro-batch).", ("path",))
+PAYLOAD_DECODE = Histogram("ml_payload_decode_seconds", "Keypoint payload decode time.", ("endpoint", "format"))
+LOW_VARIANCE = Counter("ml_low_variance_inputs_total", "Inputs with keypoint std below 0.01 (random or static data).", ("endpoint",))
+LOG_DROPPED = Counter("ml_log_records_dropped_total", "Log records dropped because the log queue was full.")
+app.add_middleware(MetricsMiddleware, requests=HTTP_REQUESTS, latency=HTTP_LATENCY)
+
+# Structured logging (service_logging.py): records are written by a background thread, never on the request path.
+# Per-request records are sampled: the prediction (INFO) and input stats (DEBUG) of 1 in ML_LOG_SAMPLE_EVERY calls.
+LOG_LEVEL = os.environ.get("ML_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.environ.get("ML_LOG_FORMAT", "json")  # "json" or "text"
+LOG_QUEUE_SIZE = int(os.environ.get("ML_LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_EVERY = int(os.environ.get("ML_LOG_SAMPLE_EVERY", "100"))  # 0 = no per-request records
+LOW_VARIANCE_STD = 0.01
+logger = setup_logging("ml_service", level=LOG_LEVEL, fmt=LOG_FORMAT, queue_size=LOG_QUEUE_SIZE, on_drop=LOG_DROPPED.inc)
+sample_request = Sampler(LOG_SAMPLE_EVERY)
+
 MODEL_PATH = "../isl_sign_language_model.h5"
+WEIGHTS_PATH = "../isl_sign_language_model.npz"  # written by export_weights.py
+WEIGHTS_DIR = "../isl_sign_language_model_weights"  # export_weights.py --mmap-dir
 LABEL_MAP_PATH = "../isl_label_map.pkl"
+FEATURE_LAYOUT_PATH = f"../{LAYOUT_FILE}"  # written by model.py; absent for full-frame models
 SEQ_LEN = 20  # Should match model input
+POSE_DIM = 33 * 4  # pose block at the start of a frame, read by neutral-pose detection
+
+# Inference engine: "keras" (TensorFlow), "numpy" (exported weights, no TensorFlow import),
+# "mmap" (NumPy engine over read-only memory-mapped weights shared by all worker processes)
+# or "tflite" (TensorFlow Lite builds from export_weights.py --tflite, see tflite_model.py)
+ENGINE = os.environ.get("ML_ENGINE", "keras")
+# Weights variant: "float32", "float16" or "int8". With the numpy engine the variants only shrink the
+# weights file (export_weights.py --variants; widened to float32 at load, see numpy_model.py); with the
+# tflite engine int8 runs int8 kernels (export_weights.py --tflite).
+MODEL_VARIANT = os.environ.get("ML_MODEL_VARIANT", "float32")
+if MODEL_VARIANT not in VARIANTS:
+    raise ValueError(f"Unknown ML_MODEL_VARIANT {MODEL_VARIANT!r}; expected one of {', '.join(VARIANTS)}")
+if MODEL_VARIANT != "float32" and ENGINE not in ("numpy", "tflite"):
+    raise ValueError(f"ML_MODEL_VARIANT={MODEL_VARIANT} needs ML_ENGINE=numpy or tflite; the {ENGINE} engine only serves float32 weights")
+
+# Dynamic micro-batching of concurrent /predict calls (off by default)
+BATCHING_ENABLED = os.environ.get("ML_BATCHING", "0") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("ML_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("ML_BATCH_MAX_WAIT_MS", "5"))
+# Seconds a /predict call waits for its batched result before answering 503
+BATCH_TIMEOUT_S = float(os.environ.get("ML_BATCH_TIMEOUT_S", "30"))
+
+# Streaming endpoint: run a prediction every N pushed frames
+STREAM_PREDICT_EVERY = int(os.environ.get("ML_STREAM_PREDICT_EVERY", "1"))
+# Streaming endpoint: advance a stateful LSTM one step per frame instead of re-running the window
+STREAM_INCREMENTAL = os.environ.get("ML_STREAM_INCREMENTAL", "0") == "1"
+
+# Response cache for repeated windows (ML_CACHE_SIZE=0 keeps only the all-zero window short-circuit)
+CACHE_ENABLED = os.environ.get("ML_CACHE", "1") == "1"
+CACHE_SIZE = int(os.environ.get("ML_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.environ.get("ML_CACHE_TTL", "300"))  # seconds
+CACHE_QUANTUM = float(os.environ.get("ML_CACHE_QUANTUM", "1e-4"))  # keypoints are rounded to this step for the key
+CACHE_SKIP_NO_HANDS = os.environ.get("ML_CACHE_SKIP_NO_HANDS", "0") == "1"  # approximate: no hands -> idle output
+
+# Warm-up before /ready reports ready: one synthetic forward pass per batch size (first calls pay graph tracing).
+# Default: 1, plus the powers of two up to ML_BATCH_MAX_SIZE when batching is on.
+WARMUP_ENABLED = os.environ.get("ML_WARMUP", "1") == "1"
+if os.environ.get("ML_WARMUP_BATCH_SIZES"):
+    WARMUP_BATCH_SIZES = sorted({int(size) for size in os.environ["ML_WARMUP_BATCH_SIZES"].split(",")})
+elif BATCHING_ENABLED:
+    WARMUP_BATCH_SIZES = sorted({2 ** i for i in range(BATCH_MAX_SIZE.bit_length())} | {BATCH_MAX_SIZE})
+else:
+    WARMUP_BATCH_SIZES = [1]
+
+# Model registry (see model_registry.py). Unset: serve the fixed paths above as version "local".
+MODEL_REGISTRY = os.environ.get("ML_MODEL_REGISTRY", "")
+MODEL_VERSION = os.environ.get("ML_MODEL_VERSION", "")  # pin a version instead of following the registry's CURRENT
+MODEL_WATCH_INTERVAL = float(os.environ.get("ML_MODEL_WATCH_INTERVAL", "0"))  # seconds between CURRENT checks; 0 = off
+ADMIN_TOKEN = os.environ.get("ML_ADMIN_TOKEN", "")  # X-Admin-Token for /admin/*; unset disables those endpoints
+LOCAL_VERSION = "local"
+
+def model_paths(version):
+    """Model, weights, label map and feature layout paths of a version."""
+    if version == LOCAL_VERSION:
+        return {"model": MODEL_PATH, "weights": WEIGHTS_PATH, "weights_dir": WEIGHTS_DIR,
+                "label_map": LABEL_MAP_PATH, "layout": FEATURE_LAYOUT_PATH}
+    if version is None:
+        raise ValueError(f"No CURRENT version in model registry {MODEL_REGISTRY}")
+    version_dir = os.path.join(MODEL_REGISTRY, version)
+    return {"model": os.path.join(version_dir, "model.h5"), "weights": os.path.join(version_dir, "model.npz"),
+            "weights_dir": os.path.join(version_dir, "weights"), "label_map": os.path.join(version_dir, "label_map.pkl"),
+            "layout": os.path.join(version_dir, LAYOUT_FILE)}
+
+class ModelBundle:
+    """
+    Everything that belongs to one model version: the model, label map and
+    feature layout plus the batcher, prediction cache and streaming network
+    built on it. Requests hold on to one bundle from start to finish, so a
+    version swap never mixes the old model with the new label map.
+    Clients may send full FRAME_DIM frames (sliced to the layout here) or
+    frames already in the model's layout (feature_dim values).
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.ready = False  # set by warm_up
+        self.warmup = None
+        paths = model_paths(version)
+        if version != LOCAL_VERSION:
+            verify_version(os.path.join(MODEL_REGISTRY, version))
+        self.layout, self.columns = load_layout(paths["layout"])
+        if ENGINE == "numpy":
+            if MODEL_VARIANT == "float32":
+                self.model = NumpyModel.load(paths["weights"])
+            else:
+                self.model = NumpyModel.load(paths["weights"].replace(".npz", f"_{MODEL_VARIANT}.npz"))
+        elif ENGINE == "mmap":
+            self.model = NumpyModel.load_mmap(paths["weights_dir"])
+        elif ENGINE == "tflite":
+            from tflite_model import TFLiteModel
+            self.model = TFLiteModel.load(paths["weights"].replace(".npz", f"_{MODEL_VARIANT}.tflite"))
+        else:
+            from tensorflow.keras.models import load_model
+            self.model = load_model(paths["model"])
+        if isinstance(self.model, NumpyModel):
+            model_dim = self.model.network.feature_dim
+        elif ENGINE == "tflite":
+            model_dim = self.model.feature_dim
+        else:
+            model_dim = self.model.input_shape[-1]
+        if model_dim != len(self.columns):
+            raise ValueError(f"Model expects {model_dim} values per frame, feature layout '{self.layout}' has {len(self.columns)}")
+        with open(paths["label_map"], "rb") as f:
+            label_map = pickle.load(f)
+        self.actions = np.array([label for label, idx in sorted(label_map.items(), key=lambda x: x[1])])
+        self.feature_dim = len(self.columns)  # Keypoint values per frame in the model's layout
+        self.has_pose = np.array_equal(self.columns[:POSE_DIM], np.arange(POSE_DIM))
+
+        self.stream_network = None
+        if STREAM_INCREMENTAL:
+            if isinstance(self.model, NumpyModel):
+                self.stream_network = self.model.network
+            elif ENGINE == "tflite":
+                self.stream_network = NumpyModel.load(paths["weights"]).network
+            else:
+                self.stream_network = LSTMNetwork(extract_weights(self.model))
+        self.batcher = None
+        if BATCHING_ENABLED:
+            self.batcher = MicroBatcher(self.forward_batch, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+        self.prediction_cache = None
+        if CACHE_ENABLED:
+            self.prediction_cache = PredictionCache(
+                self.predict_window, capacity=CACHE_SIZE, ttl=CACHE_TTL, quantum=CACHE_QUANTUM,
+                skip_no_hands=CACHE_SKIP_NO_HANDS
+            )
+
+    def start(self):
+        if self.batcher is not None:
+            self.batcher.start()
+
+    def close(self):
+        """Called once the bundle has been swapped out and its last request has finished."""
+        if self.batcher is not None:
+            self.batcher.stop()
+
+    def predict_window(self, keypoints_seq):
+        """Run the model on one (SEQ_LEN, feature_dim) sequence and return its class probabilities."""
+        if self.batcher is not None:
+            return self.batcher.submit(keypoints_seq).result(timeout=BATCH_TIMEOUT_S)
+        with MODEL_FORWARD.time("single"):
+            return self.model.predict(np.expand_dims(keypoints_seq, axis=0), verbose=0)[0]
+
+    def forward_batch(self, batch):
+        """The batcher's forward pass over a stacked batch of sequences."""
+        with MODEL_FORWARD.time("batch"):
+            return self.model.predict_on_batch(batch)
+
+    def run_model(self, keypoints_seq):
+        """Class probabilities for one sequence, served from the prediction cache when enabled."""
+        if self.prediction_cache is not None:
+            return self.prediction_cache.predict(keypoints_seq)
+        return self.predict_window(keypoints_seq)
 
-# Load model and label map at startup
-try:
-    model = load_model(MODEL_PATH)
-    with open(LABEL_MAP_PATH, "rb") as f:
-        label_map = pickle.load(f)
-    actions = np.array([label for label, idx in sorted(label_map.items(), key=lambda x: x[1])])
-except Exception as e:
-    print(f"Error loading model or label map: {e}")
-    model = None
-    actions = np.array([])
+    def to_layout(self, frames):
+        """Frames of FRAME_DIM values sliced to the model's feature layout (frames already in it pass through)."""
+        if frames.shape[-1] == self.feature_dim:
+            return frames
+        return np.take(frames, self.columns, axis=-1)
 
-class KeypointsRequest(BaseModel):
-    keypoints: list  # List of SEQ_LEN arrays, each array is 1662 floats
+    def warm_up(self):
+        """
+        Run synthetic batches of every WARMUP_BATCH_SIZES size through the model the way requests will
+        (predict for single windows, predict_on_batch behind the batcher) so that TensorFlow traces its
+        graphs now, and fill the cache's all-zero window output. Logs and keeps the timings in ms.
+        """
+        started = time.perf_counter()
+        timings = {}
+        if WARMUP_ENABLED:
+            rng = np.random.default_rng(0)
+            for size in WARMUP_BATCH_SIZES:
+                batch = rng.random((size, SEQ_LEN, self.feature_dim), dtype=np.float32)
+                runs = []
+                for _ in range(2):  # first call traces, second shows the steady-state cost
+                    t0 = time.perf_counter()
+                    if self.batcher is not None:
+                        self.model.predict_on_batch(batch)
+                    else:
+                        self.model.predict(batch, verbose=0)
+                    runs.append(round((time.perf_counter() - t0) * 1000, 2))
+                timings[size] = {"first_ms": runs[0], "steady_ms": runs[1]}
+        self.run_model(np.zeros((SEQ_LEN, self.feature_dim), dtype=np.float32))
+        self.warmup = {"batch_sizes": timings, "total_ms": round((time.perf_counter() - started) * 1000, 2)}
+        self.ready = True
+        logger.info("warm-up done", extra={"fields": dict(self.warmup, model_version=self.version)})
+
+# Load the model version at startup; /admin/reload or the registry watcher swap in later ones
+models = ModelManager(ModelBundle, warmup_fn=ModelBundle.warm_up)
+models.load_initial((MODEL_VERSION or current_version(MODEL_REGISTRY)) if MODEL_REGISTRY else LOCAL_VERSION)
+
+async def read_keypoints(request: Request) -> np.ndarray:
+    """
+    Decode the /predict body into a float32 keypoint matrix.
+
+    Accepts the binary `application/x-isl-keypoints` payload (see keypoints_codec)
+    or, as a fallback, JSON of the form {"keypoints": [[...1662 floats], ...]}.
+    Frames may also hold only the values of the model's feature layout.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(KEYPOINTS_CONTENT_TYPE):
+        try:
+            with PAYLOAD_DECODE.time("/predict", "binary"):
+                return decode_keypoints(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        with PAYLOAD_DECODE.time("/predict", "json"):
+            return np.asarray(json.loads(body)["keypoints"], dtype=np.float32)
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid keypoints payload: {e}")
+
+def decode_stream_message(message, bundle):
+    """Decode one WebSocket message into a (frames, FRAME_DIM or bundle.feature_dim) float32 array."""
+    if message.get("bytes") is not None:
+        data = message["bytes"]
+        if data[:len(MAGIC)] == MAGIC:
+            with PAYLOAD_DECODE.time("/ws/predict", "binary"):
+                frames = decode_keypoints(data)
+        else:
+            frames = np.frombuffer(data, dtype="<f4")
+    else:
+        with PAYLOAD_DECODE.time("/ws/predict", "json"):
+            frames = np.asarray(json.loads(message["text"])["keypoints"], dtype=np.float32)
+    if frames.ndim == 1:
+        frames = frames.reshape(-1, FRAME_DIM if frames.size % FRAME_DIM == 0 else bundle.feature_dim)
+    if frames.shape[-1] not in (FRAME_DIM, bundle.feature_dim):
+        raise ValueError(f"Frames must have {FRAME_DIM} or {bundle.feature_dim} values")
+    if frames.shape[-1] != FRAME_DIM and not bundle.has_pose:
+        raise ValueError(f"Feature layout '{bundle.layout}' has no pose; stream full {FRAME_DIM}-value frames")
+    return frames
+
+def require_admin(x_admin_token: str = Header(default="")):
+    if not ADMIN_TOKEN or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin endpoints need ML_ADMIN_TOKEN and a matching X-Admin-Token header.")
+
+@app.on_event("startup")
+def start_model():
+    # Threads are started here rather than at import: serve.py forks workers after importing this module
+    if models.current is not None:
+        models.current.start()
+        # Warm up off the event loop so the server can answer /health (and /ready with 503) meanwhile
+        threading.Thread(target=models.current.warm_up, name="model-warmup", daemon=True).start()
+    if MODEL_REGISTRY:
+        models.watch(MODEL_REGISTRY, MODEL_WATCH_INTERVAL, pinned=MODEL_VERSION or None)
+
+@app.on_event("shutdown")
+def stop_model():
+    if models.current is not None:
+        models.current.close()
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+def batch_queue_depth():
+    bundle = models.current
+    return bundle.batcher.queue_depth() if bundle is not None and bundle.batcher is not None else None
+
+Gauge("ml_batch_queue_depth", "Sequences waiting for the micro-batcher.", batch_queue_depth)
+
+@app.get("/metrics")
+def metrics():
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/ready")
+def ready(response: Response):
+    """Readiness for traffic: 200 once the served model version is loaded and warmed up, 503 before."""
+    bundle = models.current
+    if bundle is None or not bundle.ready:
+        response.status_code = 503
+        return {"status": "loading" if bundle is not None else "no model", "model_version": bundle and bundle.version}
+    return {"status": "ready", "model_version": bundle.version, "warmup": bundle.warmup}
+
+@app.get("/stats")
+def stats():
+    with models.use() as bundle:
+        if bundle is None:
+            return {"batching": None, "cache": None, "feature_layout": None, "model": models.status()}
+        return {
+            "batching": bundle.batcher.stats() if bundle.batcher is not None else None,
+            "cache": bundle.prediction_cache.stats() if bundle.prediction_cache is not None else None,
+            "feature_layout": {"layout": bundle.layout, "feature_dim": bundle.feature_dim, "frame_dim": FRAME_DIM},
+            "model": models.status(),
+        }
+
+@app.get("/admin/model", dependencies=[Depends(require_admin)])
+def admin_model():
+    status = models.status()
+    if MODEL_REGISTRY:
+        status.update(registry=MODEL_REGISTRY, registry_current=current_version(MODEL_REGISTRY),
+                      versions=list_versions(MODEL_REGISTRY))
+    return status
+
+@app.post("/admin/reload", status_code=202, dependencies=[Depends(require_admin)])
+def admin_reload(version: Optional[str] = None):
+    """
+    Load a model version in the background, warm it up and swap it in. With a
+    registry, `version` (default: the registry's CURRENT) is made CURRENT once
+    it has been swapped in, so that other workers watching the registry follow;
+    without one, the fixed model paths are re-read.
+    """
+    if MODEL_REGISTRY:
+        version = version or current_version(MODEL_REGISTRY)
+        if version is None or version not in list_versions(MODEL_REGISTRY):
+            raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+        if MODEL_VERSION and version != MODEL_VERSION:
+            raise HTTPException(status_code=409, detail=f"Version is pinned to {MODEL_VERSION} by ML_MODEL_VERSION")
+    elif version not in (None, LOCAL_VERSION):
+        raise HTTPException(status_code=404, detail="No model registry configured (ML_MODEL_REGISTRY)")
+    else:
+        version = LOCAL_VERSION
+    on_swap = (lambda loaded: set_current(MODEL_REGISTRY, loaded)) if MODEL_REGISTRY and not MODEL_VERSION else None
+    if not models.reload(version, on_swap=on_swap):
+        raise HTTPException(status_code=409, detail=f"Already loading version {models.reloading}")
+    return {"reloading": version, "current": models.current.version if models.current is not None else None}
+
 @app.post("/predict")
-def predict_gesture(data: KeypointsRequest):
-    # Log received keypoints for debugging
-    keypoints_seq = np.array(data.keypoints)
-    print(f"Received keypoints shape: {keypoints_seq.shape}")
-    if keypoints_seq.shape[0] > 0:
-        print(f"First row sample: {keypoints_seq[0][:10]}")
-    print(f"Keypoints stats: min={np.min(keypoints_seq):.4f}, max={np.max(keypoints_seq):.4f}, mean={np.mean(keypoints_seq):.4f}, std={np.std(keypoints_seq):.4f}")
-    if np.std(keypoints_seq) < 0.01:
-        print("[Warning] Keypoints have very low variance. Are you sending random or static data?")
-    if model is None or len(actions) == 0:
+def predict_gesture(keypoints_seq: np.ndarray = Depends(read_keypoints)):
+    with models.use() as bundle:
+        return predict_with(bundle, keypoints_seq)
+
+def predict_with(bundle, keypoints_seq):
+    if bundle is None or len(bundle.actions) == 0:
         raise HTTPException(status_code=500, detail="Model or label map not loaded.")
-    if keypoints_seq.shape != (SEQ_LEN, 1662):
-        raise HTTPException(status_code=400, detail=f"Input shape must be ({SEQ_LEN}, 1662)")
-    input_data = np.expand_dims(keypoints_seq, axis=0).astype(np.float32)
-    prediction = model.predict(input_data, verbose=0)
+    actions = bundle.actions
+    if keypoints_seq.ndim != 2 or keypoints_seq.shape[0] != SEQ_LEN or keypoints_seq.shape[1] not in (FRAME_DIM, bundle.feature_dim):
+        shapes = " or ".join(f"({SEQ_LEN}, {dim})" for dim in dict.fromkeys((FRAME_DIM, bundle.feature_dim)))
+        raise HTTPException(status_code=400, detail=f"Input shape must be {shapes}")
+    std = float(keypoints_seq.std())
+    if std < LOW_VARIANCE_STD:
+        LOW_VARIANCE.inc("/predict")  # random or static data from the client
+    try:
+        prediction = bundle.run_model(bundle.to_layout(keypoints_seq))
+    except FutureTimeoutError:
+        raise HTTPException(status_code=503, detail=f"No batched prediction within {BATCH_TIMEOUT_S:g}s")
     pred_idx = int(np.argmax(prediction))
     confidence = float(np.max(prediction))
     gesture = actions[pred_idx] if pred_idx < len(actions) else "Unknown"
-    print(f"Predicted gesture: {gesture}, confidence: {confidence:.4f}")
+    if logger.isEnabledFor(logging.INFO) and sample_request():
+        fields = {"gesture": str(gesture), "confidence": round(confidence, 4), "pred_idx": pred_idx,
+                  "model_version": bundle.version, "shape": list(keypoints_seq.shape), "std": round(std, 4)}
+        if logger.isEnabledFor(logging.DEBUG):
+            fields.update(min=round(float(keypoints_seq.min()), 4), max=round(float(keypoints_seq.max()), 4),
+                          mean=round(float(keypoints_seq.mean()), 4), first_row=keypoints_seq[0][:10].round(4).tolist())
+        logger.info("prediction", extra={"fields": fields})
     return {
         "gesture": gesture,
         "confidence": confidence,
         "pred_idx": pred_idx,
-        "actions": actions.tolist()
+        "actions": actions.tolist(),
+        "model_version": bundle.version,
     }
 
+@app.websocket("/ws/predict")
+async def stream_predict(websocket: WebSocket):
+    """
+    Streaming prediction: the client pushes frames (one or more per message) and
+    the server keeps the SEQ_LEN sliding window, advances the gesture state
+    machine and sends a message whenever the state changes or a prediction runs.
+
+    Messages are either binary (raw little-endian float32 frames, or an
+    application/x-isl-keypoints payload) or JSON text {"keypoints": [...]}.
+    A connection stays on the model version it started with: its bundle is held
+    for the whole connection (see stream_with), so after a swap the old model
+    stays in memory until the last connection opened on it closes.
+    """
+    await websocket.accept()
+    with models.use() as bundle:
+        if bundle is None or len(bundle.actions) == 0:
+            await websocket.close(code=1011, reason="Model or label map not loaded.")
+            return
+        await stream_with(websocket, bundle)
+
+async def stream_with(websocket, bundle):
+    """
+    Serve one WebSocket connection on `bundle`. The bundle is pinned for the
+    whole connection rather than re-acquired per window: the session's window,
+    gesture state and incremental LSTM states all belong to that model version.
+    """
+    actions = bundle.actions
+    session = StreamSession(SEQ_LEN, bundle.feature_dim, predict_every=STREAM_PREDICT_EVERY, network=bundle.stream_network,
+                            columns=bundle.columns if bundle.feature_dim != FRAME_DIM else None)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                frames = decode_stream_message(message, bundle)
+            except (ValueError, KeyError, TypeError) as e:
+                await websocket.send_json({"error": f"Invalid frame payload: {e}"})
+                continue
+            for frame in frames:
+                transition, prediction_due = session.push(frame)
+                result = None
+                if prediction_due:
+                    if session.incremental is not None:
+                        prediction = session.incremental_output
+                    else:
+                        prediction = await run_in_threadpool(bundle.run_model, session.sequence())
+                    result = session.gesture.observe_prediction(prediction, len(actions))
+                if transition is None and result is None:
+                    continue
+                update = {"frame": session.frames, "state": session.gesture.state, "transition": transition}
+                if result is not None:
+                    stable_pred_idx = result["stable_pred_idx"]
+                    update.update(result)
+                    update["gesture"] = (
+                        str(actions[stable_pred_idx])
+                        if result["accepted"] and stable_pred_idx < len(actions) else None
+                    )
+                await websocket.send_json(update)
+    except WebSocketDisconnect:
+        pass
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False)
@@ -0,0 +1,236 @@
+"""
+Prometheus text-format metrics with per-thread aggregation.
+
+Every thread updates its own shard (a dict of plain lists), so counting a
+request or observing a latency takes no lock and never contends with other
+threads. A scrape sums the shards of all threads; shards of threads that have
+exited are folded into one retired shard so that counters stay monotonic.
+Under the GIL a scrape may see a histogram's sum one observation ahead of its
+buckets, which Prometheus tolerates. backend_service/mlapi/metrics.py mirrors
+these primitives; keep the two in sync.
+
+    REQUESTS = Counter("http_requests_total", "HTTP requests", ("route", "status"))
+    REQUESTS.inc("/predict", "200")
+    with LATENCY.time("/predict"):
+        ...
+    text = render()
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond NumPy forward passes up to slow proxied requests
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics = []
+_local = threading.local()
+_shards = []  # (thread, shard) for every thread that recorded something
+_retired = {}
+_lock = threading.Lock()  # only taken when a thread records its first value and on scrape
+# New shards between prunes of exited threads, so that _shards stays bounded when nobody scrapes
+# (thread-per-request servers start a new thread, and so a new shard, for every request)
+PRUNE_EVERY = 64
+
+
+
+def _shard():
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = {}
+        with _lock:
+            _shards.append((threading.current_thread(), shard))
+            if len(_shards) % PRUNE_EVERY == 0:
+                _prune()
+    return shard
+
+
+
+def _prune():
+    """Fold the shards of exited threads into the retired shard; the caller holds _lock."""
+    alive = []
+    for thread, shard in _shards:
+        if thread.is_alive():
+            alive.append((thread, shard))
+        else:
+            _merge(_retired, shard)  # the thread is gone, so nothing writes to its shard any more
+    _shards[:] = alive
+
+
+def _merge(into, shard):
+    for key, cell in shard.copy().items():  # dict.copy is atomic under the GIL
+        total = into.get(key)
+        if total is None:
+            into[key] = list(cell)
+        else:
+            for i, value in enumerate(cell):
+                total[i] += value
+
+
+def _collect():
+    """Sum of all shards, {(metric name, label values): cell}."""
+    with _lock:
+        _prune()
+        totals = {key: list(cell) for key, cell in _retired.items()}
+        for _, shard in _shards:
+            _merge(totals, shard)
+    return totals
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        _metrics.append(self)
+
+    def inc(self, *labels, amount=1):
+        shard = _shard()
+        key = (self.name, labels)
+        cell = shard.get(key)
+        if cell is None:
+            shard[key] = [amount]
+        else:
+            cell[0] += amount
+
+    def _render(self, totals):
+        yield f"# TYPE {self.name} counter"
+        for (name, labels), cell in totals:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(cell[0])}"
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        _metrics.append(self)
+
+    def observe(self, value, *labels):
+        shard = _shard()
+        key = (self.name, labels)
+        cell = shard.get(key)
+        if cell is None:
+            cell = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]  # bucket counts, +Inf count, sum
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def snapshot(self, *labels):
+        """Current cumulative buckets, count and sum of one label set (for JSON endpoints like /stats)."""
+        cell = _collect().get((self.name, labels)) or [0] * (len(self.buckets) + 1) + [0.0]
+        cumulative, running = {}, 0
+        for upper, count in zip(self.buckets + ("+Inf",), cell[:-1]):
+            running += count
+            cumulative[str(upper)] = running
+        return {"buckets": cumulative, "count": running, "sum": cell[-1]}
+
+    def _render(self, totals):
+        yield f"# TYPE {self.name} histogram"
+        for (name, labels), cell in totals:
+            running = 0
+            for upper, count in zip(self.buckets + ("+Inf",), cell[:-1]):
+                running += count
+                le = upper if upper == "+Inf" else _number(upper)
+                yield f"{self.name}_bucket{_labels(self.labelnames + ('le',), labels + (le,))} {running}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(cell[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {running}"
+
+
+class Gauge:
+    """Value read at scrape time: `fn()` returns a number, or {label values: number}, or None to skip."""
+
+    def __init__(self, name, help, fn, labelnames=()):
+        self.name, self.help, self.fn, self.labelnames = name, help, fn, tuple(labelnames)
+        _metrics.append(self)
+
+    def _render(self, totals):
+        try:
+            value = self.fn()
+        except Exception:
+            value = None
+        if value is None:
+            return
+        yield f"# TYPE {self.name} gauge"
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, v in values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def process_rss_bytes():
+    """Resident set size of this process (Linux /proc), or None elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+Gauge("process_resident_memory_bytes", "Resident memory size in bytes.", process_rss_bytes)
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format."""
+    totals = _collect()
+    by_metric = {}
+    for key, cell in totals.items():
+        by_metric.setdefault(key[0], []).append((key, cell))
+    lines = []
+    for metric in _metrics:
+        rendered = list(metric._render(sorted(by_metric.get(metric.name, []), key=lambda item: item[0][1])))
+        if rendered:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.extend(rendered)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests and timing them per route template
+    (e.g. /predict, never the raw path, to keep label cardinality bounded).
+    """
+
+    def __init__(self, app, requests, latency):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.latency.observe(time.perf_counter() - started, scope["method"], route)
+            self.requests.inc(scope["method"], route, str(status[0]))
@@ -0,0 +1,327 @@
+"""
+Local model registry and hot model swapping for ml_service.
+
+Registry layout (one directory per published version):
+
+    <registry>/
+        CURRENT                      name of the active version
+        <version>/
+            manifest.json            {"version", "created", "files": {relative path: sha256}}
+            model.h5                 Keras model (ML_ENGINE=keras)
+            model.npz                NumPy weights (ML_ENGINE=numpy), plus model_float16.npz / model_int8.npz
+            model_<variant>.tflite   TensorFlow Lite builds (ML_ENGINE=tflite), variant float32 / float16 / int8
+            weights/                 memory-mappable weights (ML_ENGINE=mmap)
+            label_map.pkl
+            isl_feature_layout.json  feature layout (absent for full-frame models)
+
+A version only needs the files for the engines it is served with. Versions
+are written to a temporary directory and renamed into place, and CURRENT is
+replaced atomically, so readers never see a half-published version.
+
+`ModelManager` holds the bundle (model, label map, layout, cache, ...) that
+requests use. A new version is loaded and warmed up on a background thread,
+then swapped in with a single reference assignment: requests that started on
+the previous bundle keep it until they finish, and it is closed when the last
+of them releases it.
+
+Usage (from ml_service/ml_service):
+    python model_registry.py publish ../model_registry v2 --from .. [--activate]
+    python model_registry.py activate ../model_registry v2
+    python model_registry.py list ../model_registry
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from keypoints import LAYOUT_FILE
+
+logger = logging.getLogger("ml_service.model_registry")
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+# Registry file name -> file name written by model.py / export_weights.py in the training directory
+TRAINING_OUTPUTS = {
+    "model.h5": "isl_sign_language_model.h5",
+    "model.npz": "isl_sign_language_model.npz",
+    "model_float16.npz": "isl_sign_language_model_float16.npz",
+    "model_int8.npz": "isl_sign_language_model_int8.npz",
+    "model_float32.tflite": "isl_sign_language_model_float32.tflite",
+    "model_float16.tflite": "isl_sign_language_model_float16.tflite",
+    "model_int8.tflite": "isl_sign_language_model_int8.tflite",
+    "weights": "isl_sign_language_model_weights",
+    "label_map.pkl": "isl_label_map.pkl",
+    LAYOUT_FILE: LAYOUT_FILE,
+}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _checksums(version_dir):
+    sums = {}
+    for root, _, files in os.walk(version_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, version_dir)
+            if rel != MANIFEST_FILE:
+                sums[rel.replace(os.sep, "/")] = file_sha256(path)
+    return sums
+
+
+def publish(registry, version, files, activate=False):
+    """
+    Copy `files` ({registry name: source path}, e.g. {"model.npz": ".../isl_sign_language_model.npz"})
+    into a new version directory with a checksum manifest. Returns the version directory.
+    """
+    if not version or version.startswith(".") or os.sep in version or version == CURRENT_FILE:
+        raise ValueError(f"Invalid version name: {version!r}")
+    if "label_map.pkl" not in files:
+        raise ValueError("A version needs label_map.pkl")
+    target = os.path.join(registry, version)
+    if os.path.exists(target):
+        raise ValueError(f"Version {version} already exists in {registry}")
+    tmp = os.path.join(registry, f".tmp-{version}-{os.getpid()}")
+    os.makedirs(tmp)
+    try:
+        for name, source in files.items():
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(tmp, name))
+            else:
+                shutil.copy2(source, os.path.join(tmp, name))
+        manifest = {"version": version, "created": time.time(), "files": _checksums(tmp)}
+        with open(os.path.join(tmp, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    if activate:
+        set_current(registry, version)
+    return target
+
+
+def verify(version_dir):
+    """Check every file against the manifest; returns the manifest or raises ValueError."""
+    with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    actual = _checksums(version_dir)
+    for name, expected in manifest["files"].items():
+        if actual.get(name) != expected:
+            raise ValueError(f"Checksum mismatch for {name} in {version_dir}")
+    return manifest
+
+
+def list_versions(registry):
+    return sorted(
+        name for name in os.listdir(registry)
+        if not name.startswith(".") and os.path.exists(os.path.join(registry, name, MANIFEST_FILE))
+    )
+
+
+def current_version(registry):
+    try:
+        with open(os.path.join(registry, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current(registry, version):
+    if not os.path.exists(os.path.join(registry, version, MANIFEST_FILE)):
+        raise ValueError(f"Unknown version {version} in {registry}")
+    tmp = os.path.join(registry, f".{CURRENT_FILE}.tmp-{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp, os.path.join(registry, CURRENT_FILE))
+
+
+class ModelManager:
+    """
+    Active model bundle with background reload and reference-counted retirement.
+
+    `load_fn(version)` builds a bundle (any object with `version`, `start()`
+    and `close()`); `warmup_fn(bundle)` runs before it is swapped in. Use
+    `with manager.use() as bundle:` for the whole duration of a request.
+    """
+
+    def __init__(self, load_fn, warmup_fn=None):
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+        self.current = None
+        self.loaded_at = None
+        self.previous_version = None
+        self.reloading = None  # version being loaded
+        self.last_error = None
+        self.swaps = 0
+        self._refs = {}  # id(bundle) -> [bundle, in-flight requests, retired]
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def load_initial(self, version):
+        """Load the first bundle synchronously (at import time, before any worker fork)."""
+        try:
+            self._install(self.load_fn(version))
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.error("model load failed", extra={"fields": {"version": version, "error": self.last_error}})
+
+    @contextmanager
+    def use(self):
+        with self._lock:
+            bundle = self.current
+            if bundle is not None:
+                self._refs[id(bundle)][1] += 1
+        try:
+            yield bundle
+        finally:
+            if bundle is not None:
+                self._release(bundle)
+
+    def reload(self, version, on_swap=None):
+        """
+        Start loading `version` in the background; returns False if a reload is
+        already running. `on_swap(version)` runs once it has been swapped in.
+        """
+        with self._lock:
+            if self.reloading is not None:
+                return False
+            self.reloading = version
+        threading.Thread(target=self._reload, args=(version, on_swap), name="model-reload", daemon=True).start()
+        return True
+
+    def watch(self, registry, interval, pinned=None):
+        """Poll the registry's CURRENT file every `interval` seconds and reload when it changes."""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def run():
+            failed = None
+            while True:
+                time.sleep(interval)
+                version = pinned or current_version(registry)
+                if version is None or version == failed or self.reloading is not None:
+                    continue
+                if self.current is not None and version == self.current.version:
+                    continue
+                self.reload(version)
+                while self.reloading is not None:
+                    time.sleep(0.1)
+                failed = version if self.last_error is not None else None
+
+        self._watcher = threading.Thread(target=run, name="model-watch", daemon=True)
+        self._watcher.start()
+
+    def status(self):
+        with self._lock:
+            in_flight = {entry[0].version: entry[1] for entry in self._refs.values()}
+        return {
+            "version": self.current.version if self.current is not None else None,
+            "loaded_at": self.loaded_at,
+            "previous_version": self.previous_version,
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+            "swaps": self.swaps,
+            "in_flight": in_flight,
+        }
+
+    def _reload(self, version, on_swap):
+        bundle = None
+        try:
+            started = time.perf_counter()
+            bundle = self.load_fn(version)
+            bundle.start()
+            if self.warmup_fn is not None:
+                self.warmup_fn(bundle)
+            self._install(bundle)
+            self.last_error = None
+            if on_swap is not None:
+                on_swap(version)
+            logger.info("model swapped in", extra={"fields": {"version": version, "load_s": round(time.perf_counter() - started, 3)}})
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.error("model reload failed", extra={"fields": {
+                "version": version, "serving": self.current and self.current.version, "error": self.last_error}})
+            if bundle is not None:
+                bundle.close()
+        finally:
+            self.reloading = None
+
+    def _install(self, bundle):
+        with self._lock:
+            old = self.current
+            self._refs[id(bundle)] = [bundle, 0, False]
+            self.current = bundle
+            self.loaded_at = time.time()
+            if old is not None:
+                self.previous_version = old.version
+                self.swaps += 1
+                self._refs[id(old)][2] = True
+        if old is not None:
+            self._maybe_close(old)
+
+    def _release(self, bundle):
+        with self._lock:
+            self._refs[id(bundle)][1] -= 1
+        self._maybe_close(bundle)
+
+    def _maybe_close(self, bundle):
+        with self._lock:
+            entry = self._refs.get(id(bundle))
+            if entry is None or not entry[2] or entry[1] > 0:
+                return
+            del self._refs[id(bundle)]
+        bundle.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish_cmd = commands.add_parser("publish", help="Publish the model files of a training directory as a new version")
+    publish_cmd.add_argument("registry")
+    publish_cmd.add_argument("version")
+    publish_cmd.add_argument("--from", dest="source", default="..", help="Directory with model.py's outputs")
+    publish_cmd.add_argument("--activate", action="store_true", help="Make it the CURRENT version")
+    activate_cmd = commands.add_parser("activate", help="Point CURRENT at a published version")
+    activate_cmd.add_argument("registry")
+    activate_cmd.add_argument("version")
+    list_cmd = commands.add_parser("list", help="List versions and verify their checksums")
+    list_cmd.add_argument("registry")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        os.makedirs(args.registry, exist_ok=True)
+        files = {
+            name: os.path.join(args.source, source) for name, source in TRAINING_OUTPUTS.items()
+            if os.path.exists(os.path.join(args.source, source))
+        }
+        target = publish(args.registry, args.version, files, activate=args.activate)
+        print(f"Published {args.version} to {target}: {', '.join(sorted(files))}"
+              f"{' (active)' if args.activate else ''}")
+    elif args.command == "activate":
+        set_current(args.registry, args.version)
+        print(f"CURRENT -> {args.version}")
+    else:
+        active = current_version(args.registry)
+        for version in list_versions(args.registry):
+            try:
+                verify(os.path.join(args.registry, version))
+                state = "ok"
+            except (ValueError, OSError) as e:
+                state = f"BROKEN: {e}"
+            print(f"{'*' if version == active else ' '} {version}  {state}")
+
+
+if __name__ == "__main__":
+    main()
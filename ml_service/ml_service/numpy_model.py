@@ -0,0 +1,299 @@
+"""
+NumPy implementation of the gesture network (Masking -> LSTM -> Dense... ),
+used as a TensorFlow-free inference engine and for incremental per-frame
+inference on sliding windows.
+
+Weights are kept in a flat dict of arrays (see `extract_weights`), which is
+also the layout of the exported `.npz` file and of the memory-mapped weights
+directory, one `<key>.npy` per array (see export_weights.py):
+
+    mask_value                      scalar
+    lstm_kernel                     (features, 4 * units), gate order i, f, c, o
+    lstm_recurrent_kernel           (units, 4 * units)
+    lstm_bias                       (4 * units,)
+    lstm_activation                 e.g. "tanh"
+    lstm_recurrent_activation       e.g. "sigmoid"
+    dense_<k>_kernel / _bias / _activation   for each Dense layer in order
+
+Quantized variants (see `quantize_weights`) store the kernels as float16, or
+as int8 with a per-output-column float32 `<kernel>_scale`; they are widened
+back to float32 when the network is built, so they shrink the weights file but
+not the memory or compute of inference (tflite_model.py builds variants that
+compute in int8).
+"""
+import os
+
+import numpy as np
+
+
+def _sigmoid(x):
+    # tanh form avoids overflow warnings from exp(-x) for large |x|
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "tanh": np.tanh,
+    "relu": _relu,
+    "softmax": _softmax,
+    "linear": _linear,
+}
+
+
+def _activation_name(fn):
+    name = getattr(fn, "__name__", str(fn))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return name
+
+
+def extract_weights(model):
+    """Pull the weights of a trained Keras Masking/LSTM/Dense model into a dict of arrays."""
+    weights = {"mask_value": np.array(0.0, dtype=np.float32)}
+    dense_count = 0
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        if kind == "Masking":
+            weights["mask_value"] = np.array(layer.mask_value, dtype=np.float32)
+        elif kind == "LSTM":
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            weights["lstm_kernel"] = kernel.astype(np.float32)
+            weights["lstm_recurrent_kernel"] = recurrent_kernel.astype(np.float32)
+            weights["lstm_bias"] = bias.astype(np.float32)
+            weights["lstm_activation"] = np.array(_activation_name(layer.activation))
+            weights["lstm_recurrent_activation"] = np.array(_activation_name(layer.recurrent_activation))
+        elif kind == "Dense":
+            kernel, bias = layer.get_weights()
+            weights[f"dense_{dense_count}_kernel"] = kernel.astype(np.float32)
+            weights[f"dense_{dense_count}_bias"] = bias.astype(np.float32)
+            weights[f"dense_{dense_count}_activation"] = np.array(_activation_name(layer.activation))
+            dense_count += 1
+        elif kind not in ("InputLayer", "Dropout"):
+            raise ValueError(f"Unsupported layer for NumPy inference: {kind}")
+    if "lstm_kernel" not in weights:
+        raise ValueError("Model has no LSTM layer")
+    return weights
+
+
+VARIANTS = ("float32", "float16", "int8")
+
+
+def quantize_weights(weights, variant):
+    """
+    Return a copy of `weights` with the kernels stored as `variant`.
+
+    float16 halves the size of every kernel and bias. int8 is dynamic-range
+    quantization: each kernel column gets a symmetric scale max(|w|) / 127 and
+    the weights are rounded to int8; biases stay float32.
+    """
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown weights variant: {variant}")
+    out = dict(weights)
+    out["variant"] = np.array(variant)
+    if variant == "float32":
+        return out
+    for key, value in weights.items():
+        if value.dtype != np.float32 or value.ndim == 0:
+            continue
+        if variant == "float16":
+            out[key] = value.astype(np.float16)
+        elif key.endswith("_kernel"):
+            scale = np.max(np.abs(value), axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            out[key] = np.clip(np.round(value / scale), -127, 127).astype(np.int8)
+            out[f"{key}_scale"] = scale.astype(np.float32)
+    return out
+
+
+def _float32(weights, key):
+    value = weights[key]
+    if f"{key}_scale" in weights:
+        return value.astype(np.float32) * weights[f"{key}_scale"]
+    # No copy for float32 arrays, so memory-mapped weights stay mapped
+    return np.asarray(value, dtype=np.float32)
+
+
+def save_weights(path, weights):
+    np.savez(path, **weights)
+
+
+def load_weights(path):
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def save_weights_dir(path, weights):
+    """Write one .npy per array so the weights can be memory-mapped (see load_weights_mmap)."""
+    os.makedirs(path, exist_ok=True)
+    for key, value in weights.items():
+        np.save(os.path.join(path, f"{key}.npy"), value)
+
+
+def load_weights_mmap(path):
+    """
+    Memory-map a weights directory read-only.
+
+    The arrays are backed by the page cache instead of private process memory,
+    so every worker process mapping the same files shares one physical copy.
+    """
+    weights = {}
+    for name in os.listdir(path):
+        if name.endswith(".npy"):
+            weights[name[:-4]] = np.load(os.path.join(path, name), mmap_mode="r")
+    return weights
+
+
+class LSTMNetwork:
+    """Stateless building blocks over one set of extracted weights."""
+
+    def __init__(self, weights):
+        self.mask_value = float(weights["mask_value"])
+        self.variant = str(weights.get("variant", "float32"))
+        self.kernel = _float32(weights, "lstm_kernel")
+        self.recurrent_kernel = _float32(weights, "lstm_recurrent_kernel")
+        self.bias = _float32(weights, "lstm_bias")
+        self.units = self.recurrent_kernel.shape[0]
+        self.feature_dim = self.kernel.shape[0]
+        self.activation = ACTIVATIONS[str(weights["lstm_activation"])]
+        self.recurrent_activation = ACTIVATIONS[str(weights["lstm_recurrent_activation"])]
+        self.dense = []
+        k = 0
+        while f"dense_{k}_kernel" in weights:
+            self.dense.append((
+                _float32(weights, f"dense_{k}_kernel"),
+                _float32(weights, f"dense_{k}_bias"),
+                ACTIVATIONS[str(weights[f"dense_{k}_activation"])],
+            ))
+            k += 1
+
+    def input_projection(self, x):
+        """x @ kernel + bias for one or more frames; the expensive part of each step."""
+        return x @ self.kernel + self.bias
+
+    def mask(self, x):
+        """True where a frame is not masked (Keras Masking: any feature != mask_value)."""
+        return np.any(x != self.mask_value, axis=-1)
+
+    def step(self, z, h, c):
+        """Advance states (h, c) by one timestep given the projected input z."""
+        gates = z + h @ self.recurrent_kernel
+        u = self.units
+        i = self.recurrent_activation(gates[..., :u])
+        f = self.recurrent_activation(gates[..., u:2 * u])
+        g = self.activation(gates[..., 2 * u:3 * u])
+        o = self.recurrent_activation(gates[..., 3 * u:])
+        c = f * c + i * g
+        h = o * self.activation(c)
+        return h, c
+
+    def head(self, h):
+        """Dense layers on top of the final LSTM output."""
+        out = h
+        for kernel, bias, activation in self.dense:
+            out = activation(out @ kernel + bias)
+        return out
+
+
+class NumpyModel:
+    """
+    Drop-in replacement for the Keras model at inference time.
+
+    `predict` / `predict_on_batch` take a (batch, timesteps, features) array and
+    return class probabilities. The input projection for all timesteps is one
+    matmul; masked timesteps (all features == mask_value) carry the previous
+    state forward, as Keras masking does.
+    """
+
+    def __init__(self, network):
+        self.network = network
+
+    @classmethod
+    def load(cls, path):
+        return cls(LSTMNetwork(load_weights(path)))
+
+    @classmethod
+    def load_mmap(cls, path):
+        return cls(LSTMNetwork(load_weights_mmap(path)))
+
+    def predict_on_batch(self, x):
+        net = self.network
+        x = np.asarray(x, dtype=np.float32)
+        batch, timesteps, features = x.shape
+        z = net.input_projection(x.reshape(-1, features)).reshape(batch, timesteps, -1)
+        mask = net.mask(x)
+        h = np.zeros((batch, net.units), dtype=np.float32)
+        c = np.zeros((batch, net.units), dtype=np.float32)
+        for t in range(timesteps):
+            h_next, c_next = net.step(z[:, t], h, c)
+            if mask[:, t].all():
+                h, c = h_next, c_next
+            else:
+                keep = mask[:, t, np.newaxis]
+                h = np.where(keep, h_next, h)
+                c = np.where(keep, c_next, c)
+        return net.head(h)
+
+    def predict(self, x, verbose=0):
+        return self.predict_on_batch(x)
+
+
+class IncrementalLSTMSession:
+    """
+    Per-session incremental inference over a sliding window of `seq_len` frames.
+
+    Running the full window for each new frame repeats seq_len input
+    projections per frame. Instead, the session keeps seq_len staggered LSTM
+    states, one anchored at each of the last seq_len frames. Every pushed
+    frame is projected once and advances all states in a single batched
+    recurrent matmul; the state anchored seq_len - 1 frames ago then covers
+    exactly the current window, so its output equals the windowed model's
+    (each state restarts from zero at its anchor frame, i.e. it is re-anchored
+    every seq_len frames).
+    """
+
+    def __init__(self, network, seq_len):
+        self.network = network
+        self.seq_len = seq_len
+        self.h = np.zeros((seq_len, network.units), dtype=np.float32)
+        self.c = np.zeros((seq_len, network.units), dtype=np.float32)
+        self.frames = 0
+
+    def push(self, frame):
+        """Add one frame; returns the class probabilities for the current window once it is full, else None."""
+        frame = np.asarray(frame, dtype=np.float32)
+        anchor = self.frames % self.seq_len
+        # The state in this slot finished its window on the previous frame; restart it here
+        self.h[anchor] = 0.0
+        self.c[anchor] = 0.0
+        if self.network.mask(frame):
+            z = self.network.input_projection(frame)
+            self.h, self.c = self.network.step(z, self.h, self.c)
+        # Masked frames leave every state unchanged, as in Keras
+        self.frames += 1
+        if self.frames < self.seq_len:
+            return None
+        # The oldest state was anchored at frame (frames - seq_len)
+        return self.network.head(self.h[self.frames % self.seq_len])
+
+    def reset(self):
+        self.h[:] = 0.0
+        self.c[:] = 0.0
+        self.frames = 0
@@ -0,0 +1,144 @@
+"""
+Packed keypoints dataset: the whole ISL_Keypoints tree as one memory-mapped array.
+
+Reading thousands of small .npy files every epoch makes training I/O bound.
+`pack_dataset` concatenates every sample's frames into a single file and
+writes an index next to it:
+
+    frames.npy    (total frames, features) float32 or float16, all samples back to back
+    offsets.npy   (samples,) int64, first row of each sample in frames.npy
+    lengths.npy   (samples,) int32, frames per sample
+    labels.npy    (samples,) int32, class index of each sample
+    meta.json     label map, feature dim, dtype and the source path of each sample
+
+Samples and labels are numbered exactly as KeypointsSequence numbers them
+(alphabetical gesture names). `PackedDataset` memory-maps the files
+read-only: a sample is a slice of frames.npy (no copy), and a batch is
+gathered into one padded float32 array straight from the page cache.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+
+FILES = ("frames.npy", "offsets.npy", "lengths.npy", "labels.npy", "meta.json")
+
+
+def scan_tree(keypoints_base):
+    """[(sample path, gesture)] of an ISL_Keypoints tree (<folder>/<gesture>/*.npy), in directory order."""
+    pairs = []
+    for folder in sorted(os.listdir(keypoints_base)):
+        folder_path = os.path.join(keypoints_base, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for gesture in sorted(os.listdir(folder_path)):
+            gesture_path = os.path.join(folder_path, gesture)
+            if os.path.isdir(gesture_path):
+                pairs.extend((os.path.join(gesture_path, f), gesture)
+                             for f in sorted(os.listdir(gesture_path)) if f.endswith(".npy"))
+    return pairs
+
+
+def pack_dataset(keypoints_base, out_dir, dtype="float32"):
+    """
+    Pack an ISL_Keypoints tree into `out_dir`. The pack is written to a
+    temporary directory and moved into place at the end, so an interrupted
+    run leaves any previous pack untouched. Returns the meta dict.
+    """
+    pairs = scan_tree(keypoints_base)
+    if not pairs:
+        raise ValueError(f"No samples found under {keypoints_base}")
+    label_map = {label: idx for idx, label in enumerate(sorted({gesture for _, gesture in pairs}))}
+
+    # Read shapes from the .npy headers first so frames.npy can be allocated once
+    shapes = [np.load(path, mmap_mode="r").shape for path, _ in pairs]
+    feature_dims = {shape[1] for shape in shapes}
+    if len(feature_dims) != 1:
+        raise ValueError(f"Samples have different feature dimensions: {sorted(feature_dims)}")
+    lengths = np.array([shape[0] for shape in shapes], dtype=np.int32)
+    offsets = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+
+    tmp_dir = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    frames = np.lib.format.open_memmap(os.path.join(tmp_dir, "frames.npy"), mode="w+", dtype=dtype,
+                                       shape=(int(lengths.sum()), feature_dims.pop()))
+    for (path, _), offset, length in zip(pairs, offsets, lengths):
+        frames[offset:offset + length] = np.load(path)
+    frames.flush()
+    feature_dim = frames.shape[1]
+    del frames
+
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp_dir, "lengths.npy"), lengths)
+    np.save(os.path.join(tmp_dir, "labels.npy"), np.array([label_map[g] for _, g in pairs], dtype=np.int32))
+    meta = {
+        "source": os.path.abspath(keypoints_base),
+        "dtype": np.dtype(dtype).name,
+        "feature_dim": feature_dim,
+        "label_map": label_map,
+        "samples": [os.path.relpath(path, keypoints_base) for path, _ in pairs],
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return meta
+
+
+def stale_reason(path, keypoints_base):
+    """
+    Why the pack at `path` no longer matches the ISL_Keypoints tree it was
+    packed from, or None if it still does: samples were added, removed or
+    renamed, or sample files were modified after the pack was written.
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        packed = json.load(f)["samples"]
+    samples = [os.path.relpath(sample, keypoints_base) for sample, _ in scan_tree(keypoints_base)]
+    if samples != packed:
+        added, removed = len(set(samples) - set(packed)), len(set(packed) - set(samples))
+        return f"{added} samples added and {removed} removed in {keypoints_base} since it was packed"
+    packed_at = os.path.getmtime(os.path.join(path, "frames.npy"))
+    modified = sum(os.path.getmtime(os.path.join(keypoints_base, sample)) > packed_at for sample in samples)
+    if modified:
+        return f"{modified} samples in {keypoints_base} modified since it was packed"
+    return None
+
+
+class PackedDataset:
+    """Read-only view of a packed dataset directory."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.frames = np.load(os.path.join(path, "frames.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.lengths = np.load(os.path.join(path, "lengths.npy"))
+        self.labels = np.load(os.path.join(path, "labels.npy"))
+        self.label_map = self.meta["label_map"]
+        self.feature_dim = self.meta["feature_dim"]
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def sample(self, i):
+        """Frames of sample `i` as a read-only view of the memory map."""
+        offset = self.offsets[i]
+        return self.frames[offset:offset + self.lengths[i]]
+
+    def gather(self, indices, seq_len, columns=None):
+        """
+        (len(indices), seq_len, features) float32 batch, zero-padded or truncated
+        like KeypointsSequence, keeping only `columns` of each frame if given.
+        """
+        X = np.empty((len(indices), seq_len, self.feature_dim if columns is None else len(columns)), dtype=np.float32)
+        for row, i in zip(X, indices):
+            offset, length = self.offsets[i], min(self.lengths[i], seq_len)
+            frames = self.frames[offset:offset + length]
+            row[:length] = frames if columns is None else frames[:, columns]
+            row[length:] = 0.0
+        return X, self.labels[indices]
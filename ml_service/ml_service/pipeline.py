@@ -0,0 +1,179 @@
+"""
+Threaded frame pipeline for the desktop live translator (ml_service/main.py).
+
+A source function (camera read) and a chain of stage functions each run on
+their own thread, connected by bounded queues, so the frame rate is bounded by
+the slowest stage instead of the sum of all stages. The caller consumes the
+last stage's output on its own thread (OpenCV windows must be driven from the
+main thread).
+
+Queues in front of stages that only need the newest frame (`drop_stale=True`)
+discard the oldest item when full, so a slow stage skips frames instead of
+lagging behind the camera. Other queues block, so every item reaches the stage
+in order: the gesture state machine counts frames and must see each frame that
+had its landmarks extracted.
+"""
+import queue
+import threading
+import time
+from collections import deque
+
+
+class StageStats:
+    """Rolling throughput (items/s) and processing latency over the last `window` items."""
+
+    def __init__(self, window=60):
+        self._finished = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, started, finished):
+        with self._lock:
+            self._finished.append(finished)
+            self._latencies.append(finished - started)
+
+    def fps(self):
+        with self._lock:
+            if len(self._finished) < 2:
+                return 0.0
+            span = self._finished[-1] - self._finished[0]
+            return (len(self._finished) - 1) / span if span > 0 else 0.0
+
+    def latency_ms(self):
+        with self._lock:
+            if not self._latencies:
+                return 0.0
+            return 1000.0 * sum(self._latencies) / len(self._latencies)
+
+
+class LatestQueue:
+    """Bounded queue whose put() drops the oldest item instead of blocking when full."""
+
+    def __init__(self, maxsize=1):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item, stop_event=None):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+
+class BlockingQueue:
+    """Bounded queue whose put() waits for space (giving up when the pipeline stops)."""
+
+    def __init__(self, maxsize=4):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item, stop_event=None):
+        while stop_event is None or not stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+
+class FramePipeline:
+    """
+    Runs `source()` and `stages` [(name, fn, drop_stale), ...] on worker threads.
+
+    `source()` returns the next item (a dict) or None to skip; each stage
+    function takes the previous stage's item and returns the next one (or None
+    to drop it). Items get a "captured_at" timestamp so end-to-end latency can
+    be measured where they are consumed. Call get() from the consuming thread.
+    """
+
+    def __init__(self, source, stages, source_name="capture", output_drop_stale=True, maxsize=2):
+        self.source = source
+        self.source_name = source_name
+        self.stages = stages
+        self.stats = {source_name: StageStats()}
+        self.stats.update({name: StageStats() for name, _, _ in stages})
+        self.queues = [LatestQueue(1) if drop_stale else BlockingQueue(maxsize) for _, _, drop_stale in stages]
+        self.output = LatestQueue(1) if output_drop_stale else BlockingQueue(maxsize)
+        self.errors = []
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._run_source, name=self.source_name, daemon=True)]
+        for i, (name, fn, _) in enumerate(self.stages):
+            outbox = self.queues[i + 1] if i + 1 < len(self.stages) else self.output
+            self._threads.append(
+                threading.Thread(target=self._run_stage, args=(name, fn, self.queues[i], outbox), name=name, daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    def get(self, timeout=0.1):
+        """Next output item, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return self.output.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def dropped(self):
+        return {name: q.dropped for (name, _, _), q in zip(self.stages, self.queues)}
+
+    def _run_source(self):
+        stats = self.stats[self.source_name]
+        inbox = self.queues[0] if self.stages else self.output
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                item = self.source()
+            except Exception as e:
+                self._fail(self.source_name, e)
+                return
+            if item is None:
+                continue
+            finished = time.perf_counter()
+            stats.record(started, finished)
+            item["captured_at"] = finished
+            inbox.put(item, self._stop)
+
+    def _run_stage(self, name, fn, inbox, outbox):
+        stats = self.stats[name]
+        while not self._stop.is_set():
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            started = time.perf_counter()
+            try:
+                result = fn(item)
+            except Exception as e:
+                self._fail(name, e)
+                return
+            stats.record(started, time.perf_counter())
+            if result is not None:
+                outbox.put(result, self._stop)
+
+    def _fail(self, name, error):
+        print(f"[Pipeline] Stage '{name}' failed: {error}")
+        self.errors.append((name, error))
+        self._stop.set()
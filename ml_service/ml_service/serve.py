@@ -0,0 +1,96 @@
+"""
+Pre-fork supervisor for running several ml_service workers on one port.
+
+The supervisor imports the service once (loading the model weights and the
+label map), binds the listening socket, and only then forks the workers, so
+every worker starts with the already-loaded state instead of loading its own
+copy. Use it with ML_ENGINE=mmap (the default here): the weights are then
+read-only file-backed pages shared by all workers. The keras engine is not
+fork-safe once TensorFlow has started its thread pools.
+
+Dead workers are restarted; SIGINT/SIGTERM stop all workers.
+
+With a model registry (ML_MODEL_REGISTRY), set ML_MODEL_WATCH_INTERVAL so
+that every worker follows the registry's CURRENT version: /admin/reload only
+reaches the worker that received it, which then updates CURRENT for the rest.
+Versions loaded after the fork are private to each worker.
+
+Usage (from ml_service/ml_service):
+    python serve.py --workers 4 [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import os
+import signal
+import socket
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ML_ENGINE", "mmap")
+    if os.environ["ML_ENGINE"] in ("keras", "tflite"):
+        print(f"[Warning] The {os.environ['ML_ENGINE']} engine is not fork-safe; prefer ML_ENGINE=mmap or numpy with serve.py")
+
+    # Load model and label map once, before forking
+    import main as service
+    if service.models.current is None:
+        raise SystemExit("Model or label map failed to load; not starting workers.")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            config = uvicorn.Config(service.app, log_level=args.log_level)
+            uvicorn.Server(config).run(sockets=[sock])
+            os._exit(0)
+        workers.add(pid)
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    for _ in range(args.workers):
+        spawn()
+    print(f"Supervisor {os.getpid()} serving on {args.host}:{args.port} with {args.workers} workers ({os.environ['ML_ENGINE']} engine)")
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}; restarting")
+            spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Structured, non-blocking logging for the ML service.
+
+Records go through a QueueHandler into a bounded queue and are written to
+stderr by a QueueListener thread, so a request never waits on log I/O; when
+the queue is full the record is dropped and `on_drop` is called (main.py
+counts drops in /metrics). Records carry their structured data in
+`extra={"fields": {...}}` and are written as one JSON object per line
+(or `key=value` text):
+
+    logger.info("prediction", extra={"fields": {"gesture": "Hello", "confidence": 0.97}})
+    {"ts": 1718000000.123, "level": "INFO", "logger": "ml_service", "msg": "prediction", "gesture": "Hello", ...}
+
+`Sampler` picks 1 in N calls for per-request records.
+"""
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name,
+                 "msg": record.getMessage()}
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"{self.formatTime(record)} {record.levelname} {record.name}: {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler over a bounded queue that drops records instead of blocking.
+    The listener thread is started lazily in each process, so it also runs in
+    workers forked after setup (threads do not survive fork).
+    """
+
+    def __init__(self, handler, maxsize=10000, on_drop=None):
+        super().__init__(queue.Queue(maxsize))
+        self.handler = handler
+        self.on_drop = on_drop
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.on_drop is not None:
+                self.on_drop()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._listener = logging.handlers.QueueListener(self.queue, self.handler)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """Write out queued records and stop the listener thread."""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+
+def setup_logging(name="ml_service", level="INFO", fmt="json", queue_size=10000, on_drop=None):
+    """Configure logger `name` (and its children) once; returns the logger."""
+    logger = logging.getLogger(name)
+    if any(isinstance(h, NonBlockingQueueHandler) for h in logger.handlers):
+        return logger
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    handler = NonBlockingQueueHandler(stream, maxsize=queue_size, on_drop=on_drop)
+    logger.addHandler(handler)
+    logger.setLevel(level.upper())
+    logger.propagate = False
+    atexit.register(handler.stop)
+    return logger
+
+
+class Sampler:
+    """Callable that is True for 1 in `every` calls (never if `every` <= 0)."""
+
+    def __init__(self, every):
+        self.every = every
+        self._count = itertools.count()  # next() on itertools.count is atomic under the GIL
+
+    def __call__(self):
+        return self.every > 0 and next(self._count) % self.every == 0
@@ -0,0 +1,56 @@
+import numpy as np
+
+from gesture_state import GestureStateMachine, detect_neutral_keypoints
+from numpy_model import IncrementalLSTMSession
+
+
+class StreamSession:
+    """
+    Server-side sliding window for one streaming client.
+
+    Frames are written into a fixed (seq_len, feature_dim) ring buffer, so each
+    pushed frame costs one row copy instead of resending the whole window. The
+    gesture state machine is advanced on every frame; a prediction is due every
+    `predict_every` frames once the window is full and a gesture is being detected.
+
+    When an `LSTMNetwork` is given, every frame is also fed to an incremental
+    LSTM session and `incremental_output` holds the current window's
+    probabilities, so due predictions need no full-window forward pass.
+
+    With `columns` (a feature layout, see keypoints.layout_columns), full
+    frames are sliced to the model's layout before they enter the window;
+    frames already in the layout are stored as they are.
+    """
+
+    def __init__(self, seq_len, feature_dim, predict_every=1, network=None, columns=None):
+        self.seq_len = seq_len
+        self.feature_dim = feature_dim
+        self.columns = columns
+        self.predict_every = max(1, predict_every)
+        self.window = np.zeros((seq_len, feature_dim), dtype=np.float32)
+        self.frames = 0
+        self.gesture = GestureStateMachine()
+        self.incremental = IncrementalLSTMSession(network, seq_len) if network is not None else None
+        self.incremental_output = None
+
+    def push(self, frame):
+        """Add one frame; returns (transition, prediction_due)."""
+        features = frame[self.columns] if self.columns is not None and len(frame) != self.feature_dim else frame
+        self.window[self.frames % self.seq_len] = features
+        self.frames += 1
+        if self.incremental is not None:
+            self.incremental_output = self.incremental.push(features)
+        transition = self.gesture.update(detect_neutral_keypoints(frame))
+        prediction_due = (
+            self.frames >= self.seq_len
+            and self.gesture.state == "detecting"
+            and self.frames % self.predict_every == 0
+        )
+        return transition, prediction_due
+
+    def sequence(self):
+        """The current window in chronological order (oldest frame first)."""
+        start = self.frames % self.seq_len
+        if start == 0:
+            return self.window.copy()
+        return np.concatenate((self.window[start:], self.window[:start]))
@@ -0,0 +1,136 @@
+"""
+TensorFlow Lite build of the gesture network (ML_ENGINE=tflite), the engine
+whose weights variants actually run in reduced precision.
+
+`build_tflite` traces the network from a weights dict (see numpy_model) as a
+graph with constant weights and the timesteps unrolled, so the converter
+needs neither resource variables nor a while loop, and converts it as:
+
+    float32   plain float32 model
+    float16   float16 weights, dequantized to float32 once when the model is loaded
+    int8      dynamic-range quantization: int8 weights with float scales; the
+              matmuls quantize their inputs on the fly and run int8 kernels
+
+Only the int8 variant changes the arithmetic (and the latency); float16 halves
+the file and keeps float32 compute. `evaluate_variants.py` reports both.
+"""
+import threading
+
+import numpy as np
+
+# Same variant names as numpy_model.VARIANTS; kept standalone so the training scripts can import
+# this module as ml_service.tflite_model
+VARIANTS = ("float32", "float16", "int8")
+
+
+def _tf_activations(tf):
+    return {
+        "sigmoid": tf.sigmoid,
+        "hard_sigmoid": lambda x: tf.clip_by_value(0.2 * x + 0.5, 0.0, 1.0),
+        "tanh": tf.tanh,
+        "relu": tf.nn.relu,
+        "softmax": tf.nn.softmax,
+        "linear": tf.identity,
+    }
+
+
+def build_tflite(weights, variant, seq_len):
+    """Convert float32 `weights` (as from extract_weights) into a .tflite flatbuffer of the given variant."""
+    import tensorflow as tf
+
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown weights variant: {variant}")
+    activations = _tf_activations(tf)
+    mask_value = float(weights["mask_value"])
+    kernel = np.asarray(weights["lstm_kernel"], dtype=np.float32)
+    recurrent_kernel = np.asarray(weights["lstm_recurrent_kernel"], dtype=np.float32)
+    bias = np.asarray(weights["lstm_bias"], dtype=np.float32)
+    activation = activations[str(weights["lstm_activation"])]
+    recurrent_activation = activations[str(weights["lstm_recurrent_activation"])]
+    dense = []
+    k = 0
+    while f"dense_{k}_kernel" in weights:
+        dense.append((
+            np.asarray(weights[f"dense_{k}_kernel"], dtype=np.float32),
+            np.asarray(weights[f"dense_{k}_bias"], dtype=np.float32),
+            activations[str(weights[f"dense_{k}_activation"])],
+        ))
+        k += 1
+    features, units = kernel.shape[0], recurrent_kernel.shape[0]
+
+    @tf.function(input_signature=[tf.TensorSpec((None, seq_len, features), tf.float32)])
+    def forward(x):
+        # Same computation as NumpyModel.predict_on_batch: one input projection, then the recurrence
+        z = tf.reshape(tf.matmul(tf.reshape(x, (-1, features)), kernel) + bias, (-1, seq_len, 4 * units))
+        mask = tf.reduce_any(tf.not_equal(x, mask_value), axis=-1)
+        h = tf.zeros_like(z[:, 0, :units])
+        c = h
+        for t in range(seq_len):
+            i, f, g, o = tf.split(z[:, t] + tf.matmul(h, recurrent_kernel), 4, axis=-1)
+            c_next = recurrent_activation(f) * c + recurrent_activation(i) * activation(g)
+            h_next = recurrent_activation(o) * activation(c_next)
+            keep = mask[:, t:t + 1]
+            h = tf.where(keep, h_next, h)
+            c = tf.where(keep, c_next, c)
+        out = h
+        for dense_kernel, dense_bias, dense_activation in dense:
+            out = dense_activation(tf.matmul(out, dense_kernel) + dense_bias)
+        return out
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([forward.get_concrete_function()], forward)
+    if variant != "float32":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    return converter.convert()
+
+
+def save_tflite(path, weights, variant, seq_len):
+    with open(path, "wb") as f:
+        f.write(build_tflite(weights, variant, seq_len))
+
+
+def _interpreter_class():
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """
+    Runs a .tflite build of the network with the same predict / predict_on_batch
+    interface as NumpyModel. The interpreter is not thread-safe, so calls are
+    serialized; the input is resized only when the batch size changes.
+    """
+
+    def __init__(self, model_content, num_threads=None):
+        self.model_content = model_content
+        self.interpreter = _interpreter_class()(model_content=model_content, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.seq_len, self.feature_dim = (int(n) for n in self._input["shape"][1:])
+        self._batch_size = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, num_threads=None):
+        with open(path, "rb") as f:
+            return cls(f.read(), num_threads=num_threads)
+
+    def predict_on_batch(self, x):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        with self._lock:
+            if x.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input["index"], x.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = x.shape[0]
+            self.interpreter.set_tensor(self._input["index"], x)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output["index"]).copy()
+
+    def predict(self, x, verbose=0):
+        return self.predict_on_batch(x)
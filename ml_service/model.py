@@ -1,15 +1,22 @@
+import argparse
 import os
 import numpy as np
+import tensorflow as tf
 from tensorflow.keras.utils import Sequence
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Masking
 from tensorflow.keras.callbacks import EarlyStopping
 import pickle
 from collections import Counter
+from ml_service.numpy_model import extract_weights, quantize_weights, save_weights
+from ml_service.packed_dataset import PackedDataset, stale_reason
+from ml_service.tflite_model import VARIANTS, save_tflite
+from ml_service.keypoints import LAYOUT_FILE, LAYOUTS, layout_columns, save_layout
 
 class KeypointsSequence(Sequence):
-    def __init__(self, keypoints_base, batch_size=8, max_seq_len=None):
+    def __init__(self, keypoints_base, batch_size=8, max_seq_len=None, columns=None):
         self.samples = []
+        self.columns = columns  # feature layout columns (keypoints.layout_columns); None keeps every value
         self.labels = []
         self.label_map = {}
         self.batch_size = batch_size
@@ -46,14 +53,17 @@ class KeypointsSequence(Sequence):
         # Shuffling
         combined = list(zip(self.samples, self.labels))
         np.random.shuffle(combined)
-        self.samples, self.labels = zip(*combined)
+        self.samples, self.labels = zip(*combined) if combined else ((), ())
 
-        # max sequence length and feature dimension
+        # max sequence length and feature dimension (0 for an empty tree; main() reports it)
         if max_seq_len is None:
-            self.max_seq_len = max(np.load(f).shape[0] for f in self.samples[:100])  # check first 100 for speed
+            self.max_seq_len = max((np.load(f).shape[0] for f in self.samples[:100]), default=0)  # check first 100 for speed
         else:
             self.max_seq_len = max_seq_len
-        self.feature_dim = np.load(self.samples[0]).shape[1]
+        if columns is not None:
+            self.feature_dim = len(columns)
+        else:
+            self.feature_dim = np.load(self.samples[0]).shape[1] if self.samples else 0
 
     def __len__(self):
         return int(np.ceil(len(self.samples) / self.batch_size))
@@ -64,6 +74,8 @@ class KeypointsSequence(Sequence):
         X = []
         for file in batch_samples:
             arr = np.load(file)
+            if self.columns is not None:
+                arr = arr[:, self.columns]
             # Pad or truncate to max_seq_len
             if arr.shape[0] < self.max_seq_len:
                 pad_width = ((0, self.max_seq_len - arr.shape[0]), (0, 0))
@@ -75,37 +87,184 @@ class KeypointsSequence(Sequence):
         y = np.array(batch_labels)
         return X, y
 
+    def load_sample(self, i):
+        arr = np.load(self.samples[i])
+        return arr if self.columns is None else arr[:, self.columns]
+
+
+class PackedKeypointsSequence(Sequence):
+    """
+    KeypointsSequence over a packed dataset (see pack_dataset.py): batches are
+    gathered from one memory-mapped array instead of one np.load per sample.
+    """
+    def __init__(self, packed_path, batch_size=8, max_seq_len=None, columns=None):
+        self.data = PackedDataset(packed_path)
+        self.batch_size = batch_size
+        self.columns = columns
+        self.label_map = self.data.label_map
+        self.feature_dim = self.data.feature_dim if columns is None else len(columns)
+        # Shuffle once, like KeypointsSequence
+        self.order = np.random.permutation(len(self.data))
+        self.samples = [self.data.meta['samples'][i] for i in self.order]
+        self.labels = tuple(int(label) for label in self.data.labels[self.order])
+        # The index has every length, so no need to sample the first 100
+        self.max_seq_len = int(self.data.lengths.max()) if max_seq_len is None else max_seq_len
+
+    def __len__(self):
+        return int(np.ceil(len(self.order) / self.batch_size))
+
+    def __getitem__(self, idx):
+        return self.data.gather(self.order[idx * self.batch_size:(idx + 1) * self.batch_size], self.max_seq_len,
+                                self.columns)
+
+    def load_sample(self, i):
+        arr = np.asarray(self.data.sample(self.order[i]))
+        return arr if self.columns is None else arr[:, self.columns]
+
+
+def npy_layout(path):
+    """(dtype, shape, data offset) from a .npy header, or None if TensorFlow can't decode the file directly."""
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        else:
+            return None
+        if fortran_order or len(shape) != 2 or dtype.hasobject or dtype.byteorder == '>':
+            return None
+        return dtype, shape, f.tell()
+
+
+def make_tf_dataset(samples, labels, max_seq_len, batch_size=8, cache='memory', shuffle_buffer=1024, seed=0,
+                    columns=None):
+    """
+    tf.data pipeline over .npy sample files: parallel reads, selection of the
+    feature layout `columns`, padding/truncation to max_seq_len, optional
+    cache, per-epoch shuffling and prefetch.
+
+    Files that share one little-endian dtype are decoded by TensorFlow ops
+    (read_file + decode_raw) in parallel outside the GIL; otherwise each file
+    goes through np.load. `cache` is 'memory', a file path prefix for an
+    on-disk cache, or None. Shuffling happens after the cache and reshuffles
+    every epoch; the sequence of epoch orders depends only on `seed`.
+    """
+    samples, labels = zip(*sorted(zip(samples, labels)))  # independent of the caller's order
+    layouts = [npy_layout(path) for path in samples]
+    graph_decode = None not in layouts and len({layout[0] for layout in layouts}) == 1
+    feature_dim = layouts[0][1][1] if layouts[0] is not None else np.load(samples[0], mmap_mode='r').shape[1]
+
+    if graph_decode:
+        dtype = tf.as_dtype(layouts[0][0])
+        offsets = [layout[2] for layout in layouts]
+
+        def load(path, offset, label):
+            raw = tf.io.read_file(path)
+            body = tf.strings.substr(raw, offset, tf.strings.length(raw) - offset)
+            return tf.cast(tf.reshape(tf.io.decode_raw(body, dtype), [-1, feature_dim]), tf.float32), label
+
+        ds = tf.data.Dataset.from_tensor_slices((list(samples), offsets, list(labels)))
+    else:
+        def load(path, label):
+            arr = tf.numpy_function(lambda p: np.load(p.decode()).astype(np.float32), [path], tf.float32)
+            return tf.reshape(arr, [-1, feature_dim]), label
+
+        ds = tf.data.Dataset.from_tensor_slices((list(samples), list(labels)))
+
+    def pad(x, label):
+        x = x[:max_seq_len]
+        if columns is not None:
+            x = tf.gather(x, columns, axis=1)
+        x = tf.pad(x, [[0, max_seq_len - tf.shape(x)[0]], [0, 0]])
+        return tf.ensure_shape(x, [max_seq_len, feature_dim if columns is None else len(columns)]), label
+
+    ds = ds.map(load, num_parallel_calls=tf.data.AUTOTUNE).map(pad, num_parallel_calls=tf.data.AUTOTUNE)
+    if cache == 'memory':
+        ds = ds.cache()
+    elif cache:
+        ds = ds.cache(cache)
+    if shuffle_buffer:
+        ds = ds.shuffle(min(shuffle_buffer, len(samples)), seed=seed, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def build_model(input_shape, num_classes):
+    model = Sequential([
+        Masking(mask_value=0., input_shape=input_shape),
+        LSTM(64, return_sequences=False),
+        Dense(32, activation='relu'),
+        Dense(num_classes, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
 
 keypoints_base = 'ISL_Keypoints'
+packed_base = 'ISL_Keypoints_packed'  # used instead of keypoints_base when present (python pack_dataset.py)
 
 
 # MODEL TRAINING
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Train the ISL gesture model.")
+    parser.add_argument('--input', choices=['auto', 'sequence', 'packed', 'tfdata'], default='auto',
+                        help='auto: packed if ISL_Keypoints_packed exists and matches --data, else sequence (the per-file generator)')
+    parser.add_argument('--data', default=keypoints_base)
+    parser.add_argument('--packed', default=packed_base)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--cache', default='memory', help="tfdata: 'memory', 'none' or an on-disk cache file prefix")
+    parser.add_argument('--shuffle-buffer', type=int, default=1024, help='tfdata: shuffle buffer size (samples)')
+    parser.add_argument('--seed', type=int, default=0, help='tfdata: shuffle seed')
+    parser.add_argument('--layout', choices=list(LAYOUTS), default='full',
+                        help='Feature layout to train on, e.g. pose_hands (258 values per frame instead of 1662)')
+    args = parser.parse_args()
+    columns = None if args.layout == 'full' else layout_columns(args.layout)
+    input_mode = args.input
+    stale = None
+    if input_mode in ('auto', 'packed') and os.path.exists(args.packed) and os.path.exists(args.data):
+        stale = stale_reason(args.packed, args.data)
+    if input_mode == 'auto':
+        input_mode = 'packed' if os.path.exists(args.packed) and stale is None else 'sequence'
+        if stale:
+            print(f"Warning: ignoring {args.packed}: {stale}. Re-run pack_dataset.py to train from the pack.")
+    elif input_mode == 'packed' and stale:
+        print(f"Warning: {args.packed} is out of date: {stale}. Re-run pack_dataset.py.")
+
     print("Starting Sign Language Model Training...")
-    print(f"Dataset path: {keypoints_base}")
+    print(f"Dataset path: {args.packed if input_mode == 'packed' else args.data} (input: {input_mode})")
     
     # Check if dataset exists
-    if not os.path.exists(keypoints_base):
-        print(f"Error: Dataset not found at {keypoints_base}")
+    if not os.path.exists(args.packed if input_mode == 'packed' else args.data):
+        print(f"Error: Dataset not found at {args.packed if input_mode == 'packed' else args.data}")
         print("Please check the keypoints_base path")
         return
     
-    batch_size = 8
+    batch_size = args.batch_size
     
     # Create generator
     print("\nLoading dataset...")
-    train_gen = KeypointsSequence(keypoints_base, batch_size=batch_size)
-    
+    if input_mode == 'packed':
+        train_gen = PackedKeypointsSequence(args.packed, batch_size=batch_size, columns=columns)
+    else:
+        train_gen = KeypointsSequence(args.data, batch_size=batch_size, columns=columns)
     if len(train_gen.samples) == 0:
         print("No samples found! Please check your dataset structure.")
         return
+
+    train_data = train_gen
+    if input_mode == 'tfdata':
+        tf.random.set_seed(args.seed)
+        train_data = make_tf_dataset(train_gen.samples, train_gen.labels, train_gen.max_seq_len, batch_size,
+                                     cache=None if args.cache == 'none' else args.cache,
+                                     shuffle_buffer=args.shuffle_buffer, seed=args.seed, columns=columns)
     
     print(f"\nDataset loaded successfully!")
     print(f"Total samples: {len(train_gen.samples)}")
     print(f"Number of classes: {len(train_gen.label_map)}")
-    print(f"Feature dimension: {train_gen.feature_dim}")
+    print(f"Feature dimension: {train_gen.feature_dim} (layout: {args.layout})")
     print(f"Max sequence length: {train_gen.max_seq_len}")
     
     # Model
@@ -116,14 +275,7 @@ def main():
     print(f"Input shape: {input_shape}")
     print(f"Number of classes: {num_classes}")
     
-    model = Sequential([
-        Masking(mask_value=0., input_shape=input_shape),
-        LSTM(64, return_sequences=False),
-        Dense(32, activation='relu'),
-        Dense(num_classes, activation='softmax')
-    ])
-    
-    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    model = build_model(input_shape, num_classes)
     
     # Print model summary
     model.summary()
@@ -131,20 +283,30 @@ def main():
     # Training
     print(f"\nStarting training...")
     es = EarlyStopping(monitor='loss', patience=5, restore_best_weights=True)
-    history = model.fit(train_gen, epochs=100, callbacks=[es])
+    history = model.fit(train_data, epochs=args.epochs, callbacks=[es])
     
     # Evaluate and print accuracy in percentage
     print(f"\nEvaluating model...")
-    loss, acc = model.evaluate(train_gen)
+    loss, acc = model.evaluate(train_data)
     print(f"Final Accuracy: {acc*100:.2f}%")
     
     # Save model and label map
     model.save('isl_sign_language_model.h5')
+    weights = extract_weights(model)
+    save_weights('isl_sign_language_model.npz', weights)
+    for variant in ('float16', 'int8'):
+        save_weights(f'isl_sign_language_model_{variant}.npz', quantize_weights(weights, variant))
+    for variant in VARIANTS:
+        save_tflite(f'isl_sign_language_model_{variant}.tflite', weights, variant, train_gen.max_seq_len)
     with open('isl_label_map.pkl', 'wb') as f:
         pickle.dump(train_gen.label_map, f)
+    save_layout(LAYOUT_FILE, args.layout)
     
     print(f"\nModel saved as: isl_sign_language_model.h5")
+    print(f"NumPy weights saved as: isl_sign_language_model.npz (+ _float16, _int8 variants)")
+    print(f"TensorFlow Lite models saved as: isl_sign_language_model_{{float32,float16,int8}}.tflite")
     print(f"Label map saved as: isl_label_map.pkl")
+    print(f"Feature layout saved as: {LAYOUT_FILE}")
     
     # Print data summary for debugging
     print(f"\nFinal Summary:")
@@ -160,7 +322,7 @@ def main():
     if len(train_gen.label_map) > 10:
         print(f"  ... and {len(train_gen.label_map) - 10} more")
     
-    arr = np.load(train_gen.samples[0])
+    arr = train_gen.load_sample(0)
     print(f"\nSample data shape: {arr.shape}")
     print(f"Sample data type: {arr.dtype}")
 
@@ -1,6 +1,7 @@
 import mediapipe as mp
 import cv2
 import numpy as np
+from ml_service.keypoints import XYZ, fill_landmarks
 
 def draw_landmarks(image, results):
     """
@@ -51,7 +52,8 @@ def keypoint_extraction(results):
     Returns:
         keypoints (numpy.ndarray): The extracted keypoints.
     """
-    lh = np.array([[res.x, res.y, res.z] for res in results.left_hand_landmarks.landmark]).flatten() if results.left_hand_landmarks else np.zeros(63)
-    rh = np.array([[res.x, res.y, res.z] for res in results.right_hand_landmarks.landmark]).flatten() if results.right_hand_landmarks else np.zeros(63)
-    keypoints = np.concatenate([lh, rh])
+    keypoints = np.zeros(126, dtype=np.float32)
+    for block, hand in zip((keypoints[:63], keypoints[63:]), (results.left_hand_landmarks, results.right_hand_landmarks)):
+        if hand:
+            fill_landmarks(hand, 21, XYZ, block)
     return keypoints
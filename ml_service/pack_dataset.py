@@ -0,0 +1,34 @@
+"""
+Pack the ISL_Keypoints tree into one memory-mapped dataset (see
+ml_service/packed_dataset.py). model.py trains from the pack when it exists
+and matches the tree; re-run this after the tree changes (e.g. after
+build_dataset.py), or model.py falls back to the per-file loader.
+
+Usage (from ml_service):
+    python pack_dataset.py [--data ISL_Keypoints] [--out ISL_Keypoints_packed] [--dtype float16]
+"""
+import argparse
+import os
+import time
+
+from model import keypoints_base, packed_base
+from ml_service.packed_dataset import pack_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=keypoints_base)
+    parser.add_argument('--out', default=packed_base)
+    parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32',
+                        help='float16 halves the file; values are widened back to float32 per batch')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    meta = pack_dataset(args.data, args.out, args.dtype)
+    size = os.path.getsize(os.path.join(args.out, 'frames.npy'))
+    print(f"Packed {len(meta['samples'])} samples ({len(meta['label_map'])} classes) from {args.data} "
+          f"into {args.out}: {size / 2**20:.1f} MB {meta['dtype']} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+Headless batch scoring of recorded videos.
+
+Every video in a directory is processed by a pool of worker processes, each
+with its own MediaPipe Holistic instance and model copy: frames -> keypoints
+(ml_service.keypoints) -> sliding SEQ_LEN-frame windows -> batched predictions.
+Each video becomes a gesture timeline: one prediction per window plus segments
+of consecutive windows that agree on a gesture with enough confidence.
+
+Output by extension:
+    .jsonl    one JSON object per video, appended as each video finishes, so an
+              interrupted run can continue with --resume
+    .parquet  one row per window (needs pandas with pyarrow or fastparquet)
+
+Usage (from ml_service):
+    python predict_videos.py videos/ --output timelines.jsonl [--workers 8] [--stride 5]
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ml_service.keypoints import LAYOUT_FILE, load_layout, video_keypoints
+from ml_service.numpy_model import NumpyModel
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+WEIGHTS_PATH = 'isl_sign_language_model.npz'
+MODEL_PATH = 'isl_sign_language_model.h5'
+LABEL_MAP_PATH = 'isl_label_map.pkl'
+
+# Per-process state, created once by init_worker
+_holistic = None
+_model = None
+_actions = None
+_layout = "full"
+
+
+def init_worker(engine, model_path, label_map_path, layout_path):
+    global _holistic, _model, _actions, _layout
+    import mediapipe as mp
+    _holistic = mp.solutions.holistic.Holistic(
+        static_image_mode=False,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+    if engine == 'keras':
+        from tensorflow.keras.models import load_model
+        _model = load_model(model_path)
+    else:
+        _model = NumpyModel.load(model_path)
+    with open(label_map_path, 'rb') as f:
+        label_map = pickle.load(f)
+    _actions = [label for label, idx in sorted(label_map.items(), key=lambda x: x[1])]
+    _layout = load_layout(layout_path)[0]
+
+
+def window_predictions(model, keypoints, seq_len, stride, batch_size):
+    """
+    Class probabilities for the windows ending at frames seq_len-1, seq_len-1+stride, ...
+    Videos shorter than one window are zero-padded at the end, like the training samples.
+    Returns (window end frames, probabilities).
+    """
+    if len(keypoints) == 0:
+        raise ValueError("No frames to predict on")
+    if len(keypoints) < seq_len:
+        padded = np.zeros((seq_len, keypoints.shape[1]), dtype=np.float32)
+        padded[:len(keypoints)] = keypoints
+        return np.array([max(len(keypoints) - 1, 0)]), np.asarray(model.predict_on_batch(padded[np.newaxis]))
+    # (windows, features, seq_len) view without copying; batches are made contiguous on demand
+    windows = np.lib.stride_tricks.sliding_window_view(keypoints, seq_len, axis=0)[::stride]
+    ends = np.arange(len(windows)) * stride + seq_len - 1
+    probabilities = []
+    for start in range(0, len(windows), batch_size):
+        batch = np.ascontiguousarray(windows[start:start + batch_size].transpose(0, 2, 1))
+        probabilities.append(np.asarray(model.predict_on_batch(batch)))
+    return ends, np.concatenate(probabilities)
+
+
+def gesture_segments(ends, pred_idx, confidence, actions, fps, min_confidence, min_windows):
+    """Merge runs of consecutive windows with the same confident prediction into timeline segments."""
+    segments = []
+    run_start = None
+    for i in range(len(ends) + 1):
+        continues = (
+            i < len(ends) and confidence[i] >= min_confidence
+            and run_start is not None and pred_idx[i] == pred_idx[run_start]
+        )
+        if continues:
+            continue
+        if run_start is not None and i - run_start >= min_windows:
+            idx = int(pred_idx[run_start])
+            segments.append({
+                'gesture': actions[idx] if idx < len(actions) else 'Unknown',
+                'pred_idx': idx,
+                'start_frame': int(ends[run_start]),
+                'end_frame': int(ends[i - 1]),
+                'start_s': round(float(ends[run_start]) / fps, 3),
+                'end_s': round(float(ends[i - 1]) / fps, 3),
+                'mean_confidence': float(np.mean(confidence[run_start:i])),
+            })
+        run_start = i if i < len(ends) and confidence[i] >= min_confidence else None
+    return segments
+
+
+def process_video(path, seq_len, stride, batch_size, min_confidence, min_windows):
+    started = time.perf_counter()
+    try:
+        keypoints, fps = video_keypoints(path, _holistic, _layout)
+        if len(keypoints) == 0:
+            # Nothing to score: an all-zero window would still yield a (meaningless) prediction
+            return {'video': path, 'frames': 0, 'error': 'No frames decoded (empty or unreadable video)'}
+        extracted = time.perf_counter()
+        ends, probabilities = window_predictions(_model, keypoints, seq_len, stride, batch_size)
+        pred_idx = np.argmax(probabilities, axis=1)
+        confidence = np.max(probabilities, axis=1)
+        windows = [
+            {
+                'end_frame': int(end),
+                'time_s': round(float(end) / fps, 3),
+                'pred_idx': int(idx),
+                'gesture': _actions[idx] if idx < len(_actions) else 'Unknown',
+                'confidence': float(conf),
+            }
+            for end, idx, conf in zip(ends, pred_idx, confidence)
+        ]
+        return {
+            'video': path,
+            'frames': len(keypoints),
+            'fps': fps,
+            'windows': windows,
+            'segments': gesture_segments(ends, pred_idx, confidence, _actions, fps, min_confidence, min_windows),
+            'extract_s': round(extracted - started, 3),
+            'predict_s': round(time.perf_counter() - extracted, 3),
+            'error': None,
+        }
+    except Exception as e:
+        return {'video': path, 'error': f"{type(e).__name__}: {e}"}
+
+
+def find_videos(directory, recursive):
+    videos = []
+    for root, dirs, files in os.walk(directory):
+        videos.extend(os.path.join(root, f) for f in files if f.lower().endswith(VIDEO_EXTENSIONS))
+        if not recursive:
+            break
+    return sorted(videos)
+
+
+def done_videos(output_path):
+    """Videos already written to a JSONL output without error (for --resume)."""
+    done = set()
+    if os.path.exists(output_path):
+        with open(output_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if record.get('error') is None:
+                    done.add(record['video'])
+    return done
+
+
+def write_parquet(output_path, records):
+    import pandas as pd
+    rows = [
+        dict(video=r['video'], fps=r['fps'], **w)
+        for r in records if r['error'] is None
+        for w in r['windows']
+    ]
+    pd.DataFrame(rows).to_parquet(output_path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('videos', help='Directory of video files')
+    parser.add_argument('--output', default='timelines.jsonl', help='.jsonl or .parquet')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--engine', choices=['numpy', 'keras'], default='numpy',
+                        help='numpy (exported .npz weights, no TensorFlow per worker) or keras (.h5)')
+    parser.add_argument('--model', default=None, help=f'Weights path (default {WEIGHTS_PATH} / {MODEL_PATH})')
+    parser.add_argument('--label-map', default=LABEL_MAP_PATH)
+    parser.add_argument('--layout-file', default=LAYOUT_FILE, help='Feature layout saved with the model by model.py')
+    parser.add_argument('--seq-len', type=int, default=20)
+    parser.add_argument('--stride', type=int, default=1, help='Frames between consecutive windows')
+    parser.add_argument('--batch-size', type=int, default=64, help='Windows per forward pass')
+    parser.add_argument('--min-confidence', type=float, default=0.3, help='Minimum confidence for timeline segments')
+    parser.add_argument('--min-windows', type=int, default=3, help='Minimum consecutive windows per segment')
+    parser.add_argument('--recursive', action='store_true')
+    parser.add_argument('--resume', action='store_true', help='Skip videos already in the JSONL output')
+    args = parser.parse_args()
+
+    model_path = args.model or (MODEL_PATH if args.engine == 'keras' else WEIGHTS_PATH)
+    parquet = args.output.endswith('.parquet')
+    videos = find_videos(args.videos, args.recursive)
+    if args.resume and not parquet:
+        done = done_videos(args.output)
+        videos = [v for v in videos if v not in done]
+        print(f"Resuming: {len(done)} videos already scored")
+    if not videos:
+        print("No videos to process.")
+        return
+
+    # One process per core; keep each worker's NumPy/BLAS and TensorFlow single-threaded
+    for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'TF_NUM_INTEROP_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ.setdefault(var, '1')
+
+    print(f"Scoring {len(videos)} videos with {args.workers} workers ({args.engine} engine)")
+    started = time.perf_counter()
+    records, failed = [], 0
+    # spawn: MediaPipe and TensorFlow are not fork-safe
+    import multiprocessing
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker, initargs=(args.engine, model_path, args.label_map, args.layout_file)) as pool, \
+            open(os.devnull if parquet else args.output, 'a') as out:
+        futures = [
+            pool.submit(process_video, v, args.seq_len, args.stride, args.batch_size, args.min_confidence, args.min_windows)
+            for v in videos
+        ]
+        for i, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            if record['error'] is not None:
+                failed += 1
+                print(f"[{i}/{len(videos)}] {record['video']}: {record['error']}", file=sys.stderr)
+            else:
+                print(f"[{i}/{len(videos)}] {record['video']}: {record['frames']} frames, "
+                      f"{len(record['segments'])} segments ({record['extract_s'] + record['predict_s']:.1f}s)")
+            if parquet:
+                records.append(record)
+            else:
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+    if parquet:
+        write_parquet(args.output, records)
+    elapsed = time.perf_counter() - started
+    print(f"Done: {len(videos) - failed} scored, {failed} failed in {elapsed:.1f}s -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
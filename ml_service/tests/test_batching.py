@@ -0,0 +1,66 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from batching import BATCH_SIZE, QUEUE_WAIT, MicroBatcher
+from metrics import render
+
+
+def test_batcher_results_and_metrics():
+    before = BATCH_SIZE.snapshot()["count"], QUEUE_WAIT.snapshot()["count"]
+    batcher = MicroBatcher(lambda batch: batch.sum(axis=(1, 2)), max_batch_size=4, max_wait_ms=20)
+    batcher.start()
+    try:
+        futures = [batcher.submit(np.full((2, 3), i, dtype=np.float32)) for i in range(6)]
+        assert [f.result(timeout=5) for f in futures] == [6.0 * i for i in range(6)]
+    finally:
+        batcher.stop()
+
+    batches = BATCH_SIZE.snapshot()
+    assert batches["sum"] >= 6 and batches["count"] > before[0]
+    assert QUEUE_WAIT.snapshot()["count"] == before[1] + 6
+    text = render()
+    assert "ml_batch_size_count" in text
+    assert "ml_batch_queue_wait_seconds_bucket" in text
+
+
+def test_stopped_batcher_fails_queued_and_late_requests():
+    release = threading.Event()
+
+    def predict(batch):
+        release.wait(5)
+        return batch.sum(axis=(1, 2))
+
+    batcher = MicroBatcher(predict, max_batch_size=1, max_wait_ms=0)
+    assert isinstance(batcher.submit(np.zeros((2, 3))).exception(timeout=0), RuntimeError)  # not started
+    batcher.start()
+    running = batcher.submit(np.ones((2, 3), dtype=np.float32))
+    while batcher.queue_depth():  # wait for the worker to pick it up
+        time.sleep(0.001)
+    queued = batcher.submit(np.ones((2, 3), dtype=np.float32))
+    stopper = threading.Thread(target=batcher.stop)
+    stopper.start()
+    while not batcher._stopping.is_set():
+        time.sleep(0.001)
+    release.set()
+    stopper.join(5)
+    assert running.result(timeout=5) == 6.0
+    with pytest.raises(RuntimeError, match="stopped"):
+        queued.result(timeout=5)
+    with pytest.raises(RuntimeError, match="not running"):
+        batcher.submit(np.zeros((2, 3))).result(timeout=5)
+
+
+def test_unstackable_batch_fails_its_requests_and_keeps_serving():
+    batcher = MicroBatcher(lambda batch: batch.sum(axis=(1, 2)), max_batch_size=2, max_wait_ms=50)
+    batcher.start()
+    try:
+        mismatched = [batcher.submit(np.zeros((2, 3))), batcher.submit(np.zeros((4, 3)))]
+        for future in mismatched:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+        assert batcher.submit(np.ones((2, 3))).result(timeout=5) == 6.0
+    finally:
+        batcher.stop()
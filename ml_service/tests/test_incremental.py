@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from numpy_model import IncrementalLSTMSession, LSTMNetwork, NumpyModel, extract_weights
+
+SEQ_LEN = 20
+FEATURES = 48
+UNITS = 16
+CLASSES = 5
+TOLERANCE = 1e-4  # bench_incremental.py measures ~4.5e-8 against Keras on the trained model
+
+
+def make_stream(frames, seed=0):
+    rng = np.random.default_rng(seed)
+    stream = rng.random((frames, FEATURES), dtype=np.float32)
+    # Blank out whole frames (masked) and feature blocks so masking is exercised
+    stream[rng.random(frames) < 0.1] = 0.0
+    stream[rng.random(frames) < 0.3, 8:40] = 0.0
+    return stream
+
+
+def random_weights(seed=0):
+    rng = np.random.default_rng(seed)
+    uniform = lambda *shape: rng.uniform(-0.5, 0.5, shape).astype(np.float32)
+    return {
+        "mask_value": np.array(0.0, dtype=np.float32),
+        "lstm_kernel": uniform(FEATURES, 4 * UNITS),
+        "lstm_recurrent_kernel": uniform(UNITS, 4 * UNITS),
+        "lstm_bias": uniform(4 * UNITS),
+        "lstm_activation": np.array("tanh"),
+        "lstm_recurrent_activation": np.array("sigmoid"),
+        "dense_0_kernel": uniform(UNITS, CLASSES),
+        "dense_0_bias": uniform(CLASSES),
+        "dense_0_activation": np.array("softmax"),
+    }
+
+
+def incremental_outputs(network, stream):
+    session = IncrementalLSTMSession(network, SEQ_LEN)
+    outputs = [session.push(frame) for frame in stream]
+    assert all(out is None for out in outputs[:SEQ_LEN - 1])
+    return np.array(outputs[SEQ_LEN - 1:])
+
+
+def full_windows(stream):
+    return np.lib.stride_tricks.sliding_window_view(stream, (SEQ_LEN, FEATURES))[:, 0]
+
+
+def test_incremental_matches_full_window_numpy_model():
+    network = LSTMNetwork(random_weights())
+    stream = make_stream(120)
+    reference = NumpyModel(network).predict(full_windows(stream))
+    incremental = incremental_outputs(network, stream)
+    assert incremental.shape == reference.shape
+    assert np.max(np.abs(incremental - reference)) <= TOLERANCE
+
+
+def test_incremental_matches_keras_predict():
+    tf = pytest.importorskip("tensorflow")
+    model = tf.keras.Sequential([
+        tf.keras.Input((SEQ_LEN, FEATURES)),
+        tf.keras.layers.Masking(mask_value=0.0),
+        tf.keras.layers.LSTM(UNITS),
+        tf.keras.layers.Dense(CLASSES, activation="softmax"),
+    ])
+    stream = make_stream(80, seed=1)
+    reference = model.predict(full_windows(stream), verbose=0)
+    incremental = incremental_outputs(LSTMNetwork(extract_weights(model)), stream)
+    assert np.max(np.abs(incremental - reference)) <= TOLERANCE
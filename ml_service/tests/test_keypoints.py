@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("google.protobuf")
+
+from bench_keypoints import landmark_list_class, legacy_extract_keypoints, make_results
+from keypoints import LAYOUTS, extract_keypoints, extract_keypoints_batch, layout_columns
+
+
+def scenarios():
+    cls = landmark_list_class()
+    rng = np.random.default_rng(0)
+    # Mixed record layouts and non-protobuf objects take the attribute-access path
+    mixed = make_results(cls, rng)
+    mixed.face_landmarks.landmark[5].ClearField("z")
+    plain = make_results(cls, rng)
+    plain.face_landmarks = SimpleNamespace(
+        landmark=[SimpleNamespace(x=lm.x, y=lm.y, z=lm.z) for lm in plain.face_landmarks.landmark]
+    )
+    return {
+        "all parts": [make_results(cls, rng) for _ in range(20)],
+        "no hands": [make_results(cls, rng, hands=False) for _ in range(20)],
+        "no face": [make_results(cls, rng, face=False) for _ in range(5)],
+        "pose without visibility": [make_results(cls, rng, pose_fields=("x", "y", "z")) for _ in range(5)],
+        "fallback paths": [mixed, plain],
+    }
+
+
+@pytest.mark.parametrize("name,frames", list(scenarios().items()))
+def test_fast_path_matches_legacy_extraction_exactly(name, frames):
+    expected = np.stack([legacy_extract_keypoints(r) for r in frames]).astype(np.float32)
+    np.testing.assert_array_equal(np.stack([extract_keypoints(r) for r in frames]), expected)
+    np.testing.assert_array_equal(extract_keypoints_batch(frames), expected)
+    for layout in LAYOUTS:
+        sliced = np.stack([extract_keypoints(r, layout=layout) for r in frames])
+        np.testing.assert_array_equal(sliced, expected[:, layout_columns(layout)], err_msg=f"layout {layout}")
@@ -0,0 +1,78 @@
+import gzip
+import os
+
+import numpy as np
+import pytest
+
+from keypoints_codec import HEADER, KEYPOINTS_CONTENT_TYPE, MAGIC, VERSION, decode_keypoints, encode_keypoints
+
+
+def gzip_payload(data, rows, cols):
+    return HEADER.pack(MAGIC, VERSION, 1, 1, rows, cols) + data
+
+
+def test_gzip_round_trip():
+    keypoints = np.random.default_rng(0).random((20, 1662)).astype(np.float32)
+    np.testing.assert_array_equal(decode_keypoints(encode_keypoints(keypoints, compression="gzip")), keypoints)
+
+
+@pytest.mark.parametrize("data", [
+    b"not gzip at all",
+    gzip.compress(np.zeros(20 * 1662, np.float32).tobytes())[:100],  # truncated stream
+    gzip.compress(np.zeros(20 * 1662, np.float32).tobytes()) + b"junk",
+])
+def test_malformed_gzip_raises_value_error(data):
+    with pytest.raises(ValueError):
+        decode_keypoints(gzip_payload(data, 20, 1662))
+
+
+def test_oversized_gzip_is_rejected_without_inflating_it():
+    bomb = gzip.compress(bytes(200 * 1024 * 1024))  # 200 MB of zeros in ~200 KB
+    with pytest.raises(ValueError, match="larger than"):
+        decode_keypoints(gzip_payload(bomb, 20, 1662))
+
+
+@pytest.mark.parametrize("rows,cols", [(0, 1662), (20, 0), (2**32 - 1, 2**32 - 1), (257, 1662), (20, 1663)])
+def test_forged_header_shape_is_rejected_before_decompressing(rows, cols):
+    # rows=0 used to give max_length=0 ("unlimited") and inflate the whole bomb;
+    # a huge shape used to overflow max_length with OverflowError
+    bomb = gzip.compress(bytes(50 * 1024 * 1024))
+    with pytest.raises(ValueError, match="Unsupported payload shape"):
+        decode_keypoints(gzip_payload(bomb, rows, cols))
+
+
+def test_encode_rejects_shapes_the_decoder_would_refuse():
+    with pytest.raises(ValueError):
+        encode_keypoints(np.zeros((0, 1662), np.float32))
+
+
+@pytest.fixture(scope="module")
+def client():
+    os.environ.setdefault("ML_ENGINE", "numpy")
+    from fastapi.testclient import TestClient
+    # main loads ../isl_sign_language_model.npz relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml_service"))
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("data,rows", [
+    (b"not gzip at all", 20),
+    (gzip.compress(bytes(10 * 1024 * 1024)), 20),
+    (gzip.compress(bytes(10 * 1024 * 1024)), 0),
+    (b"", 2**32 - 1),
+])
+def test_predict_rejects_bad_gzip_with_400(client, data, rows):
+    response = client.post("/predict", content=gzip_payload(data, rows, 1662), headers={"content-type": KEYPOINTS_CONTENT_TYPE})
+    assert response.status_code == 400
+
+
+def test_stream_reports_bad_gzip(client):
+    with client.websocket_connect("/ws/predict") as ws:
+        ws.send_bytes(gzip_payload(b"not gzip at all", 1, 1662))
+        message = ws.receive_json()
+    assert "Invalid frame payload" in message["error"]
@@ -0,0 +1,16 @@
+import threading
+
+import metrics
+from metrics import Counter
+
+THREAD_REQUESTS = Counter("test_thread_requests_total", "Requests counted from short-lived threads.")
+
+
+def test_shards_of_exited_threads_are_pruned_without_a_scrape():
+    for _ in range(5 * metrics.PRUNE_EVERY):
+        thread = threading.Thread(target=THREAD_REQUESTS.inc)
+        thread.start()
+        thread.join()
+    # One new shard per thread; exited ones are folded in as new shards arrive, not only on scrape
+    assert len(metrics._shards) <= metrics.PRUNE_EVERY
+    assert metrics._collect()[(THREAD_REQUESTS.name, ())] == [5 * metrics.PRUNE_EVERY]
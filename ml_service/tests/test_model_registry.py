@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from model_registry import ModelManager, publish, verify
+
+
+class FakeBundle:
+    def __init__(self, version):
+        self.version = version
+        self.started = False
+        self.closed = False
+
+    def start(self):
+        self.started = True
+
+    def close(self):
+        self.closed = True
+
+
+def wait_for_reload(manager, timeout=5):
+    deadline = time.monotonic() + timeout
+    while manager.reloading is not None:
+        assert time.monotonic() < deadline, "reload did not finish"
+        time.sleep(0.01)
+
+
+def test_swap_closes_old_bundle_after_in_flight_request():
+    manager = ModelManager(FakeBundle)
+    manager.load_initial("v1")
+    with manager.use() as old:
+        assert manager.reload("v2")
+        wait_for_reload(manager)
+        assert manager.current.version == "v2" and manager.current.started
+        assert not old.closed  # still in use by this request
+        with manager.use() as new:
+            assert new is manager.current
+    assert old.closed
+    assert not manager.current.closed
+    assert manager.status()["previous_version"] == "v1"
+
+
+def test_failed_reload_keeps_serving_old_version():
+    loaded = []
+
+    def load(version):
+        loaded.append(FakeBundle(version))
+        return loaded[-1]
+
+    def warm_up(bundle):
+        if bundle.version == "broken":
+            raise RuntimeError("warm-up failed")
+
+    manager = ModelManager(load, warmup_fn=warm_up)
+    manager.load_initial("v1")
+    assert manager.reload("broken")
+    wait_for_reload(manager)
+    assert manager.current.version == "v1" and not manager.current.closed
+    assert "warm-up failed" in manager.status()["last_error"]
+    assert loaded[-1].closed  # the half-loaded bundle is released
+    with manager.use() as bundle:
+        assert bundle.version == "v1"
+
+
+@pytest.fixture
+def training_files(tmp_path):
+    label_map = tmp_path / "isl_label_map.pkl"
+    label_map.write_bytes(b"labels")
+    weights = tmp_path / "isl_sign_language_model.npz"
+    weights.write_bytes(b"weights")
+    return {"label_map.pkl": str(label_map), "model.npz": str(weights)}
+
+
+def test_verify_rejects_tampered_file(tmp_path, training_files):
+    version_dir = publish(str(tmp_path / "registry"), "v1", training_files)
+    assert set(verify(version_dir)["files"]) == {"label_map.pkl", "model.npz"}
+    with open(f"{version_dir}/model.npz", "ab") as f:
+        f.write(b"tampered")
+    with pytest.raises(ValueError, match="Checksum mismatch for model.npz"):
+        verify(version_dir)
+
+
+def test_publish_refuses_existing_version(tmp_path, training_files):
+    registry = str(tmp_path / "registry")
+    version_dir = publish(registry, "v1", training_files)
+    with pytest.raises(ValueError, match="already exists"):
+        publish(registry, "v1", dict(training_files, **{"model.npz": training_files["label_map.pkl"]}))
+    verify(version_dir)  # the published files are untouched
@@ -0,0 +1,36 @@
+import os
+import time
+
+import numpy as np
+
+from packed_dataset import PackedDataset, pack_dataset, stale_reason
+
+
+def make_tree(base, gestures=("hello", "thanks"), per_gesture=3):
+    rng = np.random.default_rng(0)
+    for gesture in gestures:
+        os.makedirs(base / "A" / gesture)
+        for i in range(per_gesture):
+            np.save(base / "A" / gesture / f"{i}.npy", rng.random((5 + i, 6), dtype=np.float32))
+
+
+def test_pack_matches_tree_until_it_changes(tmp_path):
+    tree, pack = tmp_path / "ISL_Keypoints", str(tmp_path / "packed")
+    make_tree(tree)
+    pack_dataset(str(tree), pack)
+    assert len(PackedDataset(pack)) == 6
+    assert stale_reason(pack, str(tree)) is None
+
+    # Packed an hour ago, then one sample file was rewritten
+    packed_at = time.time() - 3600
+    for path in tree.rglob("*.npy"):
+        os.utime(path, (packed_at - 1, packed_at - 1))
+    os.utime(os.path.join(pack, "frames.npy"), (packed_at, packed_at))
+    os.utime(tree / "A" / "hello" / "0.npy")
+    assert "1 samples" in stale_reason(pack, str(tree))
+
+    pack_dataset(str(tree), pack)
+    assert stale_reason(pack, str(tree)) is None
+    np.save(tree / "A" / "thanks" / "new.npy", np.zeros((4, 6), dtype=np.float32))
+    (tree / "A" / "hello" / "1.npy").unlink()
+    assert "1 samples added and 1 removed" in stale_reason(pack, str(tree))
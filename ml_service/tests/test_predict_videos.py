@@ -0,0 +1,35 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# predict_videos.py imports the service modules as the ml_service package (run from ml_service/);
+# appended so that `main` still resolves to the service, not ml_service/main.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import predict_videos
+
+
+class StubModel:
+    def predict_on_batch(self, batch):
+        return np.tile([[0.1, 0.9]], (len(batch), 1))
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setattr(predict_videos, "_model", StubModel())
+    monkeypatch.setattr(predict_videos, "_actions", ["Hello", "Thanks"])
+
+
+def test_video_without_decoded_frames_is_an_error(worker, monkeypatch):
+    monkeypatch.setattr(predict_videos, "video_keypoints", lambda path, holistic, layout: (np.empty((0, 8), np.float32), 30.0))
+    record = predict_videos.process_video("empty.mp4", 20, 1, 64, 0.3, 3)
+    assert record["error"] is not None and record["frames"] == 0
+    assert "windows" not in record
+
+
+def test_short_video_is_padded_to_one_window(worker, monkeypatch):
+    monkeypatch.setattr(predict_videos, "video_keypoints", lambda path, holistic, layout: (np.ones((5, 8), np.float32), 30.0))
+    record = predict_videos.process_video("short.mp4", 20, 1, 64, 0.3, 3)
+    assert record["error"] is None
+    assert [w["gesture"] for w in record["windows"]] == ["Thanks"]
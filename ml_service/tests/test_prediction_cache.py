@@ -0,0 +1,30 @@
+import threading
+
+import numpy as np
+
+from metrics import render
+from prediction_cache import PredictionCache
+
+
+def test_counters_are_exact_under_concurrency():
+    cache = PredictionCache(lambda seq: seq.sum(keepdims=True), capacity=8)
+    windows = [np.full((4, 3), i, dtype=np.float32) for i in range(4)]  # window 0 is all zeros
+    per_thread = 200
+
+    def worker():
+        for i in range(per_thread):
+            cache.predict(windows[i % len(windows)])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = cache.stats()
+    assert stats["zero_window_hits"] == 8 * per_thread // 4
+    assert stats["hits"] + stats["misses"] == 8 * per_thread * 3 // 4
+    assert stats["size"] == 3 and stats["misses"] >= 3
+    text = render()
+    assert 'ml_prediction_cache_lookups_total{result="zero_window"}' in text
+    assert 'ml_prediction_cache_lookups_total{result="hit"}' in text
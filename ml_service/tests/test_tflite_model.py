@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from numpy_model import LSTMNetwork, NumpyModel
+from test_incremental import SEQ_LEN, make_stream, random_weights
+from tflite_model import TFLiteModel, build_tflite
+
+# float16 weights are exact to ~1e-3 relative; int8 ones to 1/254 of each column's range
+TOLERANCES = {"float32": 1e-5, "float16": 1e-3, "int8": 5e-2}
+
+
+@pytest.mark.parametrize("variant", sorted(TOLERANCES))
+def test_tflite_variants_match_numpy_model(variant):
+    weights = random_weights()
+    windows = np.stack([make_stream(SEQ_LEN, seed=s) for s in range(6)])
+    windows[0] = 0.0  # fully masked window
+    windows[1, SEQ_LEN // 2:] = 0.0  # trailing padding
+    reference = NumpyModel(LSTMNetwork(weights)).predict_on_batch(windows)
+
+    model = TFLiteModel(build_tflite(weights, variant, SEQ_LEN))
+    assert (model.seq_len, model.feature_dim) == windows.shape[1:]
+    np.testing.assert_allclose(model.predict_on_batch(windows), reference, atol=TOLERANCES[variant])
+    # Batch size changes resize the interpreter input
+    np.testing.assert_allclose(model.predict(windows[2:3]), reference[2:3], atol=TOLERANCES[variant])
+
+
+def test_quantized_builds_are_smaller():
+    weights = random_weights()
+    sizes = {variant: len(build_tflite(weights, variant, SEQ_LEN)) for variant in TOLERANCES}
+    assert sizes["int8"] < sizes["float16"] < sizes["float32"]